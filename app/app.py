@@ -34,6 +34,9 @@ from routes.adminPanelUsers import (
 from routes.adminPanelActivity import (
     adminPanelActivityBlueprint,
 )
+from routes.adminPanelQueries import (
+    adminPanelQueriesBlueprint,
+)
 from routes.category import (
     categoryBlueprint,
 )
@@ -67,10 +70,13 @@ from routes.login import (
 from routes.logout import (
     logoutBlueprint,
 )
+from routes.metrics import metricsBlueprint
+from routes.postsFeed import postsFeedBlueprint
 from routes.passwordReset import (
     passwordResetBlueprint,
 )
 from routes.post import postBlueprint
+from routes.postBanner import postBannerBlueprint
 from routes.postStats import postStatsBlueprint
 from routes.postsAnalytics import (
     analyticsBlueprint,
@@ -107,6 +113,8 @@ from utils.contextProcessor.returnUserProfilePicture import returnUserProfilePic
 from utils.contextProcessor.translations import injectTranslations
 from utils.contextProcessor.markdown import markdown_processor
 from utils.contextProcessor.blockchain import inject_blockchain
+from utils.analyticsRetention import RetentionWorker
+from utils.db import Checkpointer, releaseConnections
 from utils.dbChecker import (
     analyticsTable,
     commentsTable,
@@ -114,6 +122,8 @@ from utils.dbChecker import (
     postsTable,
     usersTable,
     blacklistTable,
+    pragmaProfile,
+    tableIndexes,
 )
 from utils.errorHandlers.csrfErrorHandler import (
     csrfErrorHandler,
@@ -126,6 +136,7 @@ from utils.errorHandlers.unauthorizedErrorHandler import (
 )
 from utils.generateUrlIdFromPost import getSlugFromPostTitle
 from utils.log import Log
+from utils.postIndexer import PostIndexer
 from utils.terminalASCII import terminalASCII
 from utils.time import currentTimeStamp
 from utils.torrent import ensure_seeding
@@ -169,6 +180,7 @@ app.context_processor(injectTranslations)
 app.context_processor(markdown_processor)
 app.context_processor(inject_blockchain)
 app.before_request(browserLanguage)
+app.teardown_appcontext(releaseConnections)
 app.jinja_env.globals.update(getSlugFromPostTitle=getSlugFromPostTitle)
 
 if Settings.WERKZEUG_LOGGER:
@@ -236,6 +248,35 @@ postsTable()
 commentsTable()
 analyticsTable()
 blacklistTable()
+pragmaProfile()
+tableIndexes()
+
+
+if Settings.DB_CHECKPOINT:
+    Log.info("WAL checkpointer is on")
+    Checkpointer().start()
+else:
+    Log.info("WAL checkpointer is off")
+
+
+Log.info(f"SQL trace mode: {Settings.DB_TRACE_MODE}")
+
+
+if Settings.ANALYTICS_RETENTION_DAYS is not None:
+    Log.info(
+        f"Analytics retention: {Settings.ANALYTICS_RETENTION_DAYS} days, "
+        f"{Settings.ANALYTICS_RETENTION_ACTION}"
+    )
+    RetentionWorker().start()
+else:
+    Log.info("Analytics retention is off")
+
+
+if Settings.POST_INDEXER:
+    Log.info("Post indexer is on")
+    PostIndexer().start()
+else:
+    Log.info("Post indexer is off")
 
 
 @app.errorhandler(404)
@@ -271,6 +312,7 @@ def afterRequest(response):
 
 
 app.register_blueprint(postBlueprint)
+app.register_blueprint(postBannerBlueprint)
 app.register_blueprint(userBlueprint)
 app.register_blueprint(indexBlueprint)
 app.register_blueprint(aboutBlueprint)
@@ -300,7 +342,10 @@ app.register_blueprint(analyticsBlueprint)
 app.register_blueprint(returnPostAnalyticsDataBlueprint)
 app.register_blueprint(postStatsBlueprint)
 app.register_blueprint(adminPanelActivityBlueprint)
+app.register_blueprint(adminPanelQueriesBlueprint)
 app.register_blueprint(commentsBlueprint)
+app.register_blueprint(metricsBlueprint)
+app.register_blueprint(postsFeedBlueprint)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""
+Lookup benchmark for the shared GeoIP resolver.
+
+Replays a skewed stream of visitor addresses, where a few addresses and
+networks make most of the requests, against the previous per-request
+``reader.country`` lookup and against ``GeoIPResolver`` keyed by address and
+by /24 network. Reports lookups per second and the cache hit rate.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.geoIP --lookups 200000 --addresses 20000
+"""
+
+import argparse
+import random
+import time
+
+from geoip2 import database, errors
+
+from settings import Settings
+from utils.geoIP import GeoIPResolver
+
+
+def makeStream(lookups, addresses, networks, seed):
+    rng = random.Random(seed)
+    prefixes = [
+        f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}"
+        for _ in range(networks)
+    ]
+    pool = [
+        f"{prefixes[int(rng.paretovariate(1.2)) % networks]}.{rng.randint(1, 254)}"
+        for _ in range(addresses)
+    ]
+    return [pool[int(rng.paretovariate(1.1)) % addresses] for _ in range(lookups)]
+
+
+def uncached(path):
+    reader = database.Reader(path)
+
+    def lookup(ip):
+        try:
+            response = reader.country(ip)
+            return response.country.name, response.continent.name
+        except errors.AddressNotFoundError:
+            return "Unknown", "Unknown"
+
+    return lookup
+
+
+def measure(label, lookup, stream, stats=None):
+    start = time.perf_counter()
+    for ip in stream:
+        lookup(ip)
+    seconds = time.perf_counter() - start
+    hitRate = f"{stats()['hitRate']:>7.2%} hits" if stats else ""
+    print(f"{label:<28} {len(stream) / seconds:>12,.0f} lookups/s {hitRate}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", default=Settings.GEOIP_DB_ROOT)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--addresses", type=int, default=20000)
+    parser.add_argument("--networks", type=int, default=2000)
+    parser.add_argument("--cache-size", type=int, default=Settings.GEOIP_CACHE_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stream = makeStream(args.lookups, args.addresses, args.networks, args.seed)
+    print(
+        f"{args.lookups} lookups of {len(set(stream))} addresses, "
+        f"cache size {args.cache_size}"
+    )
+    measure("reader per request (before)", uncached(args.database), stream)
+    for label, prefixKeys in (
+        ("GeoIPResolver", False),
+        ("GeoIPResolver /24 keys", True),
+    ):
+        resolver = GeoIPResolver(args.database, args.cache_size, prefixKeys)
+        if resolver.reader() is None:
+            parser.error(f"GeoIP database not found at {args.database}")
+        measure(label, resolver.lookup, stream, resolver.stats)
+
+
+if __name__ == "__main__":
+    main()
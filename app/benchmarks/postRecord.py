@@ -0,0 +1,109 @@
+"""
+Micro-benchmark for decoding on-chain post tuples.
+
+Compares the previous decoding (``split("|", 5)`` into a dict holding every
+field) with ``PostRecord`` with its body kept and with ``withBody=False`` as
+used by list views. Reports the retained memory per record and the decode time.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.postRecord --posts 2000 --body-words 800
+"""
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+
+from utils.postRecord import PostRecord
+
+
+def decodeDict(postID, onchain):
+    """The dict decoding the routes used before ``PostRecord``."""
+    parts = onchain[1].split("|", 5)
+    return {
+        "id": postID,
+        "title": parts[0] if len(parts) > 0 else "",
+        "tags": parts[1] if len(parts) > 1 else "",
+        "abstract": parts[2] if len(parts) > 2 else "",
+        "content": parts[3] if len(parts) > 3 else "",
+        "category": parts[4] if len(parts) > 4 else "",
+        "author": onchain[0],
+        "magnet": onchain[2],
+        "authorInfo": onchain[3],
+        "blacklisted": bool(onchain[5]),
+        "imageIds": list(onchain[6]),
+        "bannerImageId": onchain[7],
+        "videoIds": list(onchain[8]),
+    }
+
+
+def makePosts(count, bodyWords):
+    authors = [f"0x{index:040x}" for index in range(16)]
+    body = " ".join(f"word{index % 97}" for index in range(bodyWords))
+    return [
+        (
+            authors[postID % len(authors)],
+            f"Post title {postID}|tag,another|A short abstract of post {postID}|"
+            f"<p>{body}</p>|Technology",
+            f"magnet:?xt=urn:btih:{postID:040x}",
+            "author info",
+            True,
+            False,
+            [f"{postID}-banner", f"{postID}-inline"],
+            f"{postID}-banner",
+            [],
+        )
+        for postID in range(count)
+    ]
+
+
+def measure(label, decode, posts, repeat):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    records = [decode(postID, onchain) for postID, onchain in enumerate(posts)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    seconds = min(
+        timeit.repeat(
+            lambda: [decode(postID, onchain) for postID, onchain in enumerate(posts)],
+            number=1,
+            repeat=repeat,
+        )
+    )
+    del records
+    print(
+        f"{label:<28} {retained / len(posts):>10.0f} B/record "
+        f"{seconds / len(posts) * 1e6:>8.2f} us/record"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--body-words", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    posts = makePosts(args.posts, args.body_words)
+    print(f"{args.posts} posts, {args.body_words} body words each")
+    measure("dict (before)", decodeDict, posts, args.repeat)
+    measure("PostRecord", PostRecord.fromGetPost, posts, args.repeat)
+    measure(
+        "PostRecord withBody=False",
+        lambda postID, onchain: PostRecord.fromGetPost(postID, onchain, False),
+        posts,
+        args.repeat,
+    )
+    measure(
+        "PostRecord.content on access",
+        lambda postID, onchain: PostRecord.fromGetPost(postID, onchain).content,
+        posts,
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Offline benchmark for the chain-backed routes.
+
+Seeds a ``LocalChain`` with N posts and N * --comments-per-post comments,
+serves it on a loopback port and drives ``post``, ``comment_tree``,
+``adminPanelPosts`` and ``adminPanelUsers`` through the Flask test client.
+Reports p50/p95/p99 latency, JSON-RPC calls and HTTP round trips per request
+for every data size. The app runs against throwaway databases in a temporary
+folder; nothing leaves the machine.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.routes --sizes 50,200,1000 --requests 30
+    python -m benchmarks.routes --cold --indexer
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from settings import Settings
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def configure(folder):
+    """Point logging and every SQLite database at ``folder``."""
+    Settings.TAMGA_LOGGER = False
+    Settings.LOG_TO_FILE = False
+    Settings.POST_INDEXER = False
+    Settings.ANALYTICS = False
+    Settings.LOG_FOLDER_ROOT = str(folder) + "/"
+    Settings.LOG_FILE_ROOT = str(folder / "log.log")
+    Settings.DB_FOLDER_ROOT = str(folder)
+    for name in ("USERS", "POSTS", "COMMENTS", "ANALYTICS", "BLACKLIST"):
+        setattr(Settings, f"DB_{name}_ROOT", str(folder / f"{name.lower()}.db"))
+
+
+def seed(posts, commentsPerPost):
+    from utils.localChain import LocalChain
+
+    chain = LocalChain()
+    authors = [f"0x{index + 1:040x}" for index in range(max(posts // 10, 1))]
+    body = " ".join(f"word{index % 97}" for index in range(400))
+    for postID in range(posts):
+        chain.createPost(
+            authors[postID % len(authors)],
+            f"Benchmark post {postID}|bench|Abstract {postID}|<p>{body}</p>|Technology",
+        )
+    for commentID in range(posts * commentsPerPost):
+        chain.addComment(
+            commentID % posts,
+            authors[commentID % len(authors)],
+            f"Comment {commentID} about benchmark post {commentID % posts}",
+        )
+    return chain
+
+
+def resetCaches():
+    from utils.postCache import postCache
+    from utils.rpcResilience import rpcReads
+
+    postCache.clear()
+    rpcReads.clear()
+
+
+def run(client, chain, paths, requests, cold):
+    latencies = []
+    calls = httpRequests = errors = 0
+    for index in range(requests):
+        if cold:
+            resetCaches()
+        path = paths[index % len(paths)]
+        callsBefore = sum(chain.calls.values())
+        httpBefore = chain.httpRequests
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        calls += sum(chain.calls.values()) - callsBefore
+        httpRequests += chain.httpRequests - httpBefore
+        errors += response.status_code >= 500
+    return {
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "calls": calls / requests,
+        "http": httpRequests / requests,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="50,200,1000")
+    parser.add_argument("--comments-per-post", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="clear the post and RPC caches before every request",
+    )
+    parser.add_argument(
+        "--indexer", action="store_true", help="sync the post indexer before measuring"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    configure(Path(tempfile.mkdtemp(prefix="flaskBlogBenchmark")))
+
+    import sqlite3
+
+    from app import app
+    from utils.generateUrlIdFromPost import getSlugFromPostTitle
+    from utils.postIndexer import PostIndexer
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(
+            walletAddress="0xbenchmark",
+            userRole="admin",
+            userName="admin",
+            language="en",
+        )
+
+    randomizer = random.Random(args.seed)
+    print(
+        f"{'posts':>6} {'route':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'rpc/req':>9} {'http/req':>9} {'5xx':>4}"
+    )
+    for size in [int(size) for size in args.sizes.split(",")]:
+        chain = seed(size, args.comments_per_post)
+        Settings.BLOCKCHAIN_RPC_URL = chain.serve()
+        resetCaches()
+        with sqlite3.connect(Settings.DB_POSTS_ROOT) as connection:
+            connection.execute("delete from onchainPosts")
+            connection.execute("delete from indexerState")
+        if args.indexer:
+            PostIndexer().syncOnce()
+
+        postIDs = [randomizer.randrange(size) for _ in range(args.requests)]
+        routes = {
+            "post": [
+                f"/post/{getSlugFromPostTitle(f'Benchmark post {postID}')}-{postID}"
+                for postID in postIDs
+            ],
+            "comment_tree": [f"/post/{postID}/comment-tree" for postID in postIDs],
+            "adminPanelPosts": ["/admin/posts"],
+            "adminPanelUsers": ["/admin/users"],
+        }
+        for route, paths in routes.items():
+            result = run(client, chain, paths, args.requests, args.cold)
+            print(
+                f"{size:>6} {route:<16} {result['p50']:>9.2f} {result['p95']:>9.2f} "
+                f"{result['p99']:>9.2f} {result['calls']:>9.1f} {result['http']:>9.1f} "
+                f"{result['errors']:>4}"
+            )
+
+
+if __name__ == "__main__":
+    main()
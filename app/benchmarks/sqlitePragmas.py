@@ -0,0 +1,140 @@
+"""
+Concurrent read/write benchmark for the SQLite PRAGMA profile.
+
+Mimics the analytics database under load: writer threads insert one
+``userActivity`` row per transaction like ``afterRequestLogger`` while reader
+threads run the aggregate queries of the analytics pages. Runs once with
+SQLite's defaults (rollback journal, ``synchronous=FULL``) and once with
+``Settings.DB_PRAGMAS`` and reports operations per second and
+``database is locked`` errors for both.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.sqlitePragmas --writers 4 --readers 4 --seconds 5
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from settings import Settings
+from utils.db import applyPragmas
+
+SCHEMA = """
+create table userActivity(
+    id integer primary key autoincrement,
+    ip text,
+    path text,
+    method text,
+    country text,
+    userName text,
+    timeStamp integer
+)
+"""
+
+READS = [
+    "select count(*) from userActivity",
+    "select country, count(*) from userActivity group by country",
+    "select path, count(*) from userActivity where timeStamp > ? group by path",
+]
+
+
+def prepare(path, rows, pragmas):
+    connection = sqlite3.connect(path)
+    applyPragmas(connection, pragmas)
+    connection.execute(SCHEMA)
+    connection.executemany(
+        "insert into userActivity(ip, path, method, country, userName, timeStamp) values (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                f"10.0.{index % 256}.{index % 13}",
+                f"/post/{index % 50}",
+                "GET",
+                "TR",
+                None,
+                index,
+            )
+            for index in range(rows)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def worker(path, pragmas, deadline, operation, counters):
+    connection = sqlite3.connect(path)
+    applyPragmas(connection, pragmas)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            operation(connection, done)
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    connection.close()
+    with counters["lock"]:
+        counters["ops"] += done
+        counters["errors"] += errors
+
+
+def write(connection, index):
+    connection.execute(
+        "insert into userActivity(ip, path, method, country, userName, timeStamp) values (?, ?, ?, ?, ?, ?)",
+        ("127.0.0.1", f"/post/{index % 50}", "GET", "TR", None, int(time.time())),
+    )
+    connection.commit()
+
+
+def read(connection, index):
+    query = READS[index % len(READS)]
+    connection.execute(query, (index,) if "?" in query else ()).fetchall()
+
+
+def run(label, pragmas, args):
+    folder = Path(tempfile.mkdtemp(prefix="flaskBlogPragmas"))
+    path = str(folder / "analytics.db")
+    prepare(path, args.rows, pragmas)
+    deadline = time.monotonic() + args.seconds
+    writes = {"ops": 0, "errors": 0, "lock": threading.Lock()}
+    reads = {"ops": 0, "errors": 0, "lock": threading.Lock()}
+    threads = [
+        threading.Thread(target=worker, args=(path, pragmas, deadline, write, writes))
+        for _ in range(args.writers)
+    ] + [
+        threading.Thread(target=worker, args=(path, pragmas, deadline, read, reads))
+        for _ in range(args.readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(
+        f"{label:<10} {writes['ops'] / args.seconds:>10.0f} {reads['ops'] / args.seconds:>10.0f} "
+        f"{writes['errors'] + reads['errors']:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument(
+        "--busy-timeout",
+        type=int,
+        default=100,
+        help="busy timeout in ms for both runs, low values expose lock errors",
+    )
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'writes/s':>10} {'reads/s':>10} {'locked':>8}")
+    run("default", {"busy_timeout": args.busy_timeout}, args)
+    run("tuned", {**Settings.DB_PRAGMAS, "busy_timeout": args.busy_timeout}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
-import sqlite3
-
 from flask import Blueprint, redirect, render_template, request, session
 from settings import Settings
+from utils.db import getConnection
 from utils.delete import Delete
 from utils.log import Log
 
@@ -11,10 +10,7 @@ accountSettingsBlueprint = Blueprint("accountSettings", __name__)
 @accountSettingsBlueprint.route("/accountsettings", methods=["GET", "POST"])
 def accountSettings():
     if "userName" in session:
-        Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_USERS_ROOT)
         cursor = connection.cursor()
         cursor.execute(
             """select userName from users where userName = ? """,
@@ -4,6 +4,7 @@ from collections import OrderedDict
 
 from flask import Blueprint, render_template, request, session
 from settings import Settings
+from utils.db import getConnection
 from utils.log import Log
 
 adminPanelActivityBlueprint = Blueprint("adminPanelActivity", __name__)
@@ -13,9 +14,10 @@ adminPanelActivityBlueprint = Blueprint("adminPanelActivity", __name__)
 def adminPanelActivity():
     if "walletAddress" in session and session.get("userRole") == "admin":
         Log.info(f"Admin: {session['walletAddress']} reached to activity admin panel")
-        with sqlite3.connect(Settings.DB_ANALYTICS_ROOT) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
+        with getConnection(Settings.DB_ANALYTICS_ROOT) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            rows = cursor.execute(
                 """
                 SELECT ip, country, path, method, userName, timeStamp
                 FROM userActivity
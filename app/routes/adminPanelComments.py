@@ -1,10 +1,11 @@
-import sqlite3
 from math import ceil
 
 from flask import Blueprint, redirect, render_template, request, session
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
 from utils.log import Log
-from web3 import Web3
+from utils.web3Client import readMapping
 
 adminPanelCommentsBlueprint = Blueprint("adminPanelComments", __name__)
 
@@ -22,21 +23,18 @@ def adminPanelComments():
                 Log.info(
                     f"Admin: {session['walletAddress']} blacklisted comment: {comment_id}"
                 )
-                connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-                connection.set_trace_callback(Log.database)
-                cursor = connection.cursor()
-                cursor.execute(
-                    "insert or ignore into deletedComments(commentID) values(?)",
-                    (comment_id,),
+                write(
+                    Settings.DB_COMMENTS_ROOT,
+                    lambda cursor: cursor.execute(
+                        "insert or ignore into deletedComments(commentID) values(?)",
+                        (comment_id,),
+                    ),
                 )
-                connection.commit()
-                connection.close()
                 return redirect("/admin/comments")
 
         deleted = set()
         try:
-            connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_COMMENTS_ROOT)
             cursor = connection.cursor()
             cursor.execute("select commentID from deletedComments")
             deleted = {row[0] for row in cursor.fetchall()}
@@ -46,12 +44,9 @@ def adminPanelComments():
 
         comments = []
         try:  # pragma: no cover - external calls
-            w3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_RPC_URL))
-            info = Settings.BLOCKCHAIN_CONTRACTS["CommentStorage"]
-            contract = w3.eth.contract(address=info["address"], abi=info["abi"])
-            next_id = contract.functions.nextCommentId().call()
-            for cid in range(next_id):
-                data = contract.functions.comments(cid).call()
+            for cid, data in readMapping("CommentStorage", "comments", "nextCommentId"):
+                if data is None:
+                    continue
                 author, post_id, content, exists, blacklisted = data
                 if not exists or blacklisted or cid in deleted:
                     continue
@@ -1,6 +1,8 @@
 from flask import Blueprint, redirect, render_template, request, session
 from settings import Settings
 from utils.log import Log
+from utils.postCache import postCache
+from utils.web3Client import resetContracts
 
 adminPanelContractsBlueprint = Blueprint("adminPanelContracts", __name__)
 
@@ -16,6 +18,11 @@ def adminPanelContracts():
                         f"Admin: {session['walletAddress']} updated address for {name}"
                     )
                     Settings.BLOCKCHAIN_CONTRACTS[name]["address"] = address
+                    resetContracts(name)
+                    # Decoded posts of the old contract; the indexer resets its
+                    # mirror on its next sync.
+                    if name == "PostStorage":
+                        postCache.clear()
         Log.info("Rendering adminPanelContracts.html")
         return render_template(
             "adminPanelContracts.html",
@@ -1,12 +1,14 @@
 """Admin panel for listing and blacklisting posts."""
 
-import sqlite3
 from math import ceil
 
 from flask import Blueprint, redirect, render_template, request, session
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
 from utils.log import Log
-from web3 import Web3
+from utils.postRecord import PostRecord
+from utils.web3Client import readMapping
 
 adminPanelPostsBlueprint = Blueprint("adminPanelPosts", __name__)
 
@@ -24,22 +26,19 @@ def adminPanelPosts():
                 Log.info(
                     f"Admin: {session['walletAddress']} blacklisted post: {post_id}"
                 )
-                connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-                connection.set_trace_callback(Log.database)
-                cursor = connection.cursor()
-                cursor.execute(
-                    "insert or ignore into deletedPosts(urlID) values(?)",
-                    (post_id,),
+                write(
+                    Settings.DB_POSTS_ROOT,
+                    lambda cursor: cursor.execute(
+                        "insert or ignore into deletedPosts(urlID) values(?)",
+                        (post_id,),
+                    ),
                 )
-                connection.commit()
-                connection.close()
                 return redirect("/admin/posts")
 
         # Fetch existing blacklisted post IDs
         deleted = set()
         try:
-            connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_POSTS_ROOT)
             cursor = connection.cursor()
             cursor.execute("select urlID from deletedPosts")
             deleted = {row[0] for row in cursor.fetchall()}
@@ -50,28 +49,20 @@ def adminPanelPosts():
         # Gather posts from blockchain
         posts = []
         try:  # pragma: no cover - external calls
-            w3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_RPC_URL))
-            contract_info = Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]
-            contract = w3.eth.contract(
-                address=contract_info["address"], abi=contract_info["abi"]
-            )
-            next_id = contract.functions.nextPostId().call()
-            for pid in range(next_id - 1, -1, -1):
-                data = contract.functions.posts(pid).call()
-                author = data[0]
-                content_hash = data[1]
-                exists = data[4]
-                blacklisted = data[5]
-                banner_id = data[6]
-                if not exists or blacklisted or str(pid) in deleted:
+            for pid, data in reversed(
+                readMapping("PostStorage", "posts", "nextPostId")
+            ):
+                if data is None:
+                    continue
+                record = PostRecord.fromPosts(pid, data)
+                if not record.exists or record.blacklisted or str(pid) in deleted:
                     continue
-                title = content_hash.split("|", 1)[0] if content_hash else ""
                 posts.append(
                     {
                         "id": pid,
-                        "title": title,
-                        "author": author,
-                        "banner": banner_id,
+                        "title": record.title,
+                        "author": record.author,
+                        "banner": record.bannerImageId,
                     }
                 )
         except Exception as exc:  # pragma: no cover - network errors
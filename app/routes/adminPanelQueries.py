@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, session
+from settings import Settings
+from utils import sqlTrace
+from utils.log import Log
+
+adminPanelQueriesBlueprint = Blueprint("adminPanelQueries", __name__)
+
+
+@adminPanelQueriesBlueprint.route("/admin/queries")
+def adminPanelQueries():
+    if "walletAddress" in session and session.get("userRole") == "admin":
+        Log.info(f"Admin: {session['walletAddress']} reached to queries admin panel")
+        queries = [
+            {
+                **query,
+                "lastSeen": datetime.utcfromtimestamp(query["lastSeen"]).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            }
+            for query in sqlTrace.slowQueries()
+        ]
+        return render_template(
+            "adminPanelQueries.html",
+            queries=queries,
+            mode=Settings.DB_TRACE_MODE,
+            slowMs=Settings.DB_TRACE_SLOW_MS,
+            admin_check=True,
+        )
+    Log.error(
+        f"{request.remote_addr} tried to reach queries admin panel without being admin"
+    )
+    return render_template("notFound.html")
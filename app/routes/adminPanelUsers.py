@@ -1,14 +1,15 @@
 """Admin panel for listing authors from on-chain and DB content."""
 
-import sqlite3
 from collections import defaultdict
 
 from flask import Blueprint, redirect, render_template, request, session
 from settings import Settings
 from utils.blacklist import Blacklist
+from utils.db import getConnection
 from utils.delete import Delete
 from utils.log import Log
-from web3 import Web3
+from utils.postRecord import PostRecord
+from utils.web3Client import readMapping
 
 adminPanelUsersBlueprint = Blueprint("adminPanelUsers", __name__)
 
@@ -39,9 +40,7 @@ def adminPanelUsers():
 
         # Gather authors from database tables
         try:
-            Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-            connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_POSTS_ROOT)
             cursor = connection.cursor()
             cursor.execute("select author from posts")
             for (addr,) in cursor.fetchall():
@@ -51,9 +50,7 @@ def adminPanelUsers():
             Log.error(f"Fetching post authors failed: {exc}")
 
         try:
-            Log.database(f"Connecting to '{Settings.DB_COMMENTS_ROOT}' database")
-            connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_COMMENTS_ROOT)
             cursor = connection.cursor()
             cursor.execute(
                 "select user from comments where id not in (select commentID from deletedComments)"
@@ -66,26 +63,15 @@ def adminPanelUsers():
 
         # Gather authors from blockchain contracts
         try:  # pragma: no cover - external calls
-            w3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_RPC_URL))
-            post_info = Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]
-            post_contract = w3.eth.contract(
-                address=post_info["address"], abi=post_info["abi"]
-            )
-            next_post_id = post_contract.functions.nextPostId().call()
-            for pid in range(next_post_id):
-                data = post_contract.functions.posts(pid).call()
-                if data[4]:  # exists
-                    addr = data[0]
-                    authors[addr]["posts"] += 1
+            for pid, data in readMapping("PostStorage", "posts", "nextPostId"):
+                if data is None:
+                    continue
+                record = PostRecord.fromPosts(pid, data)
+                if record.exists:
+                    authors[record.author]["posts"] += 1
 
-            comment_info = Settings.BLOCKCHAIN_CONTRACTS["CommentStorage"]
-            comment_contract = w3.eth.contract(
-                address=comment_info["address"], abi=comment_info["abi"]
-            )
-            next_comment_id = comment_contract.functions.nextCommentId().call()
-            for cid in range(next_comment_id):
-                data = comment_contract.functions.comments(cid).call()
-                if data[3]:  # exists
+            for _, data in readMapping("CommentStorage", "comments", "nextCommentId"):
+                if data and data[3]:  # exists
                     addr = data[0]
                     authors[addr]["comments"] += 1
         except Exception as exc:  # pragma: no cover - external calls
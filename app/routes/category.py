@@ -12,7 +12,6 @@ from json import load
 from flask import Blueprint, abort, redirect, render_template, session
 from settings import Settings
 from utils.log import Log
-from utils.paginate import paginate_query
 from utils.categories import get_categories, DEFAULT_CATEGORIES
 
 categoryBlueprint = Blueprint("category", __name__)
@@ -27,7 +26,8 @@ def category(category, by="timeStamp", sort="desc"):
     :param category: The category name that is requested
     :param by: The field to sort the posts by
     :param sort: The sorting order of the posts
-    :return: A rendered template with the posts and the category as context
+    :return: A rendered template with the category as context; the page
+        loads its posts from /api/v1/posts
     """
 
     categories = [c.lower() for c in get_categories()]
@@ -44,13 +44,6 @@ def category(category, by="timeStamp", sort="desc"):
     if category.lower() not in categories:
         abort(404)
 
-    posts, page, total_pages = paginate_query(
-        Settings.DB_POSTS_ROOT,
-        "select count(*) from posts where lower(category) = ?",
-        f"select * from posts where lower(category) = ? order by {by} {sort}",
-        [category.lower()],
-    )
-
     if by == "timeStamp":
         by = "create"
     elif by == "lastEditTimeStamp":
@@ -67,13 +60,10 @@ def category(category, by="timeStamp", sort="desc"):
 
     return render_template(
         "category.html",
-        posts=posts,
         category=translations["categories"].get(category.lower(), category),
         raw_category=category,
         sortName=sortName,
         source=f"/category/{category}",
-        page=page,
-        total_pages=total_pages,
         categories=get_categories(),
         post_contract_address=Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]["address"],
         post_contract_abi=Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]["abi"],
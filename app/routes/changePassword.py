@@ -1,5 +1,3 @@
-import sqlite3
-
 from flask import (
     Blueprint,
     redirect,
@@ -9,6 +7,8 @@ from flask import (
 )
 from passlib.hash import sha512_crypt as encryption
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
 from utils.flashMessage import flashMessage
 from utils.forms.ChangePasswordForm import ChangePasswordForm
 from utils.log import Log
@@ -38,10 +38,7 @@ def changePassword():
             oldPassword = request.form["oldPassword"]
             password = request.form["password"]
             passwordConfirm = request.form["passwordConfirm"]
-            Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-            connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_USERS_ROOT)
             cursor = connection.cursor()
 
             cursor.execute(
@@ -68,18 +65,15 @@ def changePassword():
 
                 if oldPassword != password and password == passwordConfirm:
                     newPassword = encryption.hash(password)
-                    Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-                    connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-                    connection.set_trace_callback(Log.database)
-                    cursor = connection.cursor()
-                    cursor.execute(
-                        """update users set password = ? where userName = ? """,
-                        [(newPassword), (session["userName"])],
+                    userName = session["userName"]
+                    write(
+                        Settings.DB_USERS_ROOT,
+                        lambda cursor: cursor.execute(
+                            """update users set password = ? where userName = ? """,
+                            [(newPassword), (userName)],
+                        ),
                     )
 
-                    connection.commit()
-
                     Log.success(
                         f'User: "{session["userName"]}" changed his password',
                     )
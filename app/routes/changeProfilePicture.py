@@ -1,5 +1,3 @@
-import sqlite3
-
 from flask import (
     Blueprint,
     redirect,
@@ -8,6 +6,7 @@ from flask import (
     session,
 )
 from settings import Settings
+from utils.dbWriter import write
 from utils.flashMessage import flashMessage
 from utils.forms.ChangeProfilePictureForm import ChangeProfilePictureForm
 from utils.log import Log
@@ -24,18 +23,14 @@ def changeProfilePicture():
             newProfilePictureSeed = request.form["newProfilePictureSeed"]
 
             newProfilePicture = f"https://api.dicebear.com/7.x/identicon/svg?seed={newProfilePictureSeed}&radius=10"
-            Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-            Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-            connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-            connection.set_trace_callback(Log.database)
-            cursor = connection.cursor()
-
-            cursor.execute(
-                """update users set profilePicture = ? where userName = ? """,
-                [(newProfilePicture), (session["userName"])],
+            userName = session["userName"]
+            write(
+                Settings.DB_USERS_ROOT,
+                lambda cursor: cursor.execute(
+                    """update users set profilePicture = ? where userName = ? """,
+                    [(newProfilePicture), (userName)],
+                ),
             )
-            connection.commit()
 
             Log.success(
                 f'User: "{session["userName"]}" changed his profile picture to "{newProfilePicture}"',
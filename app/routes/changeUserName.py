@@ -1,5 +1,3 @@
-import sqlite3
-
 from flask import (
     Blueprint,
     redirect,
@@ -8,6 +6,8 @@ from flask import (
     session,
 )
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import writeAttached
 from utils.flashMessage import flashMessage
 from utils.forms.ChangeUserNameForm import ChangeUserNameForm
 from utils.log import Log
@@ -41,10 +41,7 @@ def changeUserName():
         if request.method == "POST":
             newUserName = request.form["newUserName"]
             newUserName = newUserName.replace(" ", "")
-            Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-            connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_USERS_ROOT)
             cursor = connection.cursor()
             cursor.execute(
                 """select userName from users where userName = ? """,
@@ -62,29 +59,30 @@ def changeUserName():
                     )
                 else:
                     if userNameCheck is None:
-                        cursor.execute(
-                            """update users set userName = ? where userName = ? """,
-                            [(newUserName), (session["userName"])],
-                        )
-                        connection.commit()
-
-                        connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-                        connection.set_trace_callback(Log.database)
-                        cursor = connection.cursor()
-                        cursor.execute(
-                            """update posts set Author = ? where author = ? """,
-                            [(newUserName), (session["userName"])],
-                        )
-                        connection.commit()
-
-                        connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-                        connection.set_trace_callback(Log.database)
-                        cursor = connection.cursor()
-                        cursor.execute(
-                            """update comments set user = ? where user = ? """,
-                            [(newUserName), (session["userName"])],
+                        oldUserName = session["userName"]
+
+                        def renameUser(cursor):
+                            cursor.execute(
+                                """update users.users set userName = ? where userName = ? """,
+                                [(newUserName), (oldUserName)],
+                            )
+                            cursor.execute(
+                                """update posts.posts set Author = ? where author = ? """,
+                                [(newUserName), (oldUserName)],
+                            )
+                            cursor.execute(
+                                """update comments.comments set user = ? where user = ? """,
+                                [(newUserName), (oldUserName)],
+                            )
+
+                        writeAttached(
+                            [
+                                Settings.DB_USERS_ROOT,
+                                Settings.DB_POSTS_ROOT,
+                                Settings.DB_COMMENTS_ROOT,
+                            ],
+                            renameUser,
                         )
-                        connection.commit()
                         Log.success(
                             f'User: "{session["userName"]}" changed his username to "{newUserName}"'
                         )
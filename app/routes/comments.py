@@ -1,6 +1,5 @@
 from flask import Blueprint, jsonify, request
-from settings import Settings
-from web3 import Web3
+from utils.web3Client import getContract
 
 commentsBlueprint = Blueprint("comments", __name__)
 
@@ -13,9 +12,7 @@ def add_comment():
     if post_id is None or not content:
         return jsonify({"error": "postID and content are required"}), 400
 
-    contract_info = Settings.BLOCKCHAIN_CONTRACTS["CommentStorage"]
-    w3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_RPC_URL))
-    contract = w3.eth.contract(address=contract_info["address"], abi=contract_info["abi"])
+    contract = getContract("CommentStorage")
     try:
         tx_hash = contract.functions.addComment(post_id, content).transact()
         return jsonify({"txHash": tx_hash.hex()}), 200
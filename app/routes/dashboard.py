@@ -1,4 +1,3 @@
-import sqlite3
 from json import load
 
 from flask import (
@@ -10,9 +9,11 @@ from flask import (
     url_for,
 )
 from settings import Settings
+from utils.db import getConnection
 from utils.delete import Delete
 from utils.flashMessage import flashMessage
 from utils.log import Log
+from utils.postColumns import LIST_SELECT, postRowFactory
 # Removed paginate_query; dashboard now shows combined activity
 
 dashboardBlueprint = Blueprint("dashboard", __name__)
@@ -31,21 +32,18 @@ def dashboard(userName):
                         301,
                     )
             # Fetch all posts for user
-            Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-            p_conn = sqlite3.connect(Settings.DB_POSTS_ROOT)
-            p_conn.set_trace_callback(Log.database)
+            p_conn = getConnection(Settings.DB_POSTS_ROOT)
             p_cur = p_conn.cursor()
+            p_cur.row_factory = postRowFactory
             p_cur.execute(
-                "select * from posts where author = ? order by timeStamp desc",
+                f"select {LIST_SELECT} from posts where author = ? order by timeStamp desc",
                 (session["userName"],),
             )
-            posts = [list(row) for row in p_cur.fetchall()]
+            posts = p_cur.fetchall()
             p_conn.close()
 
             # Fetch all comments for user
-            Log.database(f"Connecting to '{Settings.DB_COMMENTS_ROOT}' database")
-            c_conn = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-            c_conn.set_trace_callback(Log.database)
+            c_conn = getConnection(Settings.DB_COMMENTS_ROOT)
             c_cur = c_conn.cursor()
             c_cur.execute(
                 """select * from comments where lower(user) = ? and id not in (select commentID from deletedComments) order by timeStamp desc""",
@@ -59,13 +57,21 @@ def dashboard(userName):
             translationFile = f"./translations/{language}.json"
             with open(translationFile, "r", encoding="utf-8") as file:
                 translations = load(file)
-            for post in posts:
-                post[9] = translations["categories"].get(post[9].lower(), post[9])
+            posts = [
+                post._replace(
+                    category=translations["categories"].get(
+                        post.category.lower(), post.category
+                    )
+                )
+                for post in posts
+            ]
 
             # Combine posts and comments into activity list
             activity = []
             for post in posts:
-                activity.append({"type": "post", "timestamp": post[7], "data": post})
+                activity.append(
+                    {"type": "post", "timestamp": post.timeStamp, "data": post}
+                )
             for comment in comments:
                 activity.append({"type": "comment", "timestamp": comment[4], "data": comment})
             activity.sort(key=lambda x: x["timestamp"], reverse=True)
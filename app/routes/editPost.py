@@ -1,9 +1,10 @@
-import sqlite3
 import math
 import os
 
 from flask import Blueprint, redirect, render_template, request, session, flash
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
 from utils.flashMessage import flashMessage
 from utils.forms.CreatePostForm import CreatePostForm
 from utils.log import Log
@@ -31,19 +32,13 @@ def editPost(urlID):
     """
 
     if "userName" in session:
-        Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_POSTS_ROOT)
         cursor = connection.cursor()
         cursor.execute("select urlID from posts where urlID = ?", (urlID,))
         posts = str(cursor.fetchall())
 
         if str(urlID) in posts:
-            Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-
-            connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_POSTS_ROOT)
             cursor = connection.cursor()
             cursor.execute(
                 """select * from posts where urlID = ? """,
@@ -73,7 +68,7 @@ def editPost(urlID):
                     postBannerFile = request.files["postBanner"]
                     postBanner = postBannerFile.read()
 
-                    connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
+                    connection = getConnection(Settings.DB_POSTS_ROOT)
                     cursor = connection.cursor()
                     cursor.execute("SELECT author, COUNT(*) FROM posts GROUP BY author")
                     rows = cursor.fetchall()
@@ -128,29 +123,6 @@ def editPost(urlID):
                             f'User: "{session["userName"]}" tried to edit a post with empty content',
                         )
                     else:
-                        connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-                        connection.set_trace_callback(Log.database)
-                        cursor = connection.cursor()
-                        cursor.execute(
-                            """update posts set title = ? where id = ? """,
-                            (postTitle, post[0]),
-                        )
-                        cursor.execute(
-                            """update posts set tags = ? where id = ? """,
-                            (postTags, post[0]),
-                        )
-                        cursor.execute(
-                            """update posts set content = ? where id = ? """,
-                            (postContent, post[0]),
-                        )
-                        cursor.execute(
-                            """update posts set abstract = ? where id = ? """,
-                            (postAbstract, post[0]),
-                        )
-                        cursor.execute(
-                            """update posts set category = ? where id = ? """,
-                            (postCategory, post[0]),
-                        )
                         if postBanner != b"":
                             images_dir = os.path.join(Settings.APP_ROOT_PATH, "app", "images")
                             os.makedirs(images_dir, exist_ok=True)
@@ -158,16 +130,30 @@ def editPost(urlID):
                             with open(image_path, "wb") as f:
                                 f.write(postBanner)
                             seed_file(image_path)
+
+                        def updatePost(cursor):
                             cursor.execute(
-                                """update posts set banner = ? where id = ? """,
-                                (postBanner, post[0]),
+                                """update posts set title = ?, tags = ?, content = ?, abstract = ?, category = ? where id = ? """,
+                                (
+                                    postTitle,
+                                    postTags,
+                                    postContent,
+                                    postAbstract,
+                                    postCategory,
+                                    post[0],
+                                ),
+                            )
+                            if postBanner != b"":
+                                cursor.execute(
+                                    """update posts set banner = ? where id = ? """,
+                                    (postBanner, post[0]),
+                                )
+                            cursor.execute(
+                                """update posts set lastEditTimeStamp = ? where id = ? """,
+                                [(currentTimeStamp()), (post[0])],
                             )
-                        cursor.execute(
-                            """update posts set lastEditTimeStamp = ? where id = ? """,
-                            [(currentTimeStamp()), (post[0])],
-                        )
 
-                        connection.commit()
+                        write(Settings.DB_POSTS_ROOT, updatePost)
                         Log.success(f'Post: "{postTitle}" edited')
                         flashMessage(
                             page="editPost",
@@ -0,0 +1,59 @@
+"""
+This module contains the admin metrics API.
+"""
+
+from flask import Blueprint, make_response, session
+from utils import (
+    analyticsRetention,
+    asyncChain,
+    db,
+    dbWriter,
+    rpcResilience,
+    rpcTrace,
+    sqlTrace,
+    userAgent,
+    web3Client,
+)
+from utils.analyticsIngest import analyticsIngest
+from utils.geoIP import geoIP
+from utils.postCache import postCache
+
+metricsBlueprint = Blueprint("metrics", __name__)
+
+
+@metricsBlueprint.route("/api/v1/metrics")
+def metrics() -> dict:
+    """
+    Returns runtime counters for the admin panel.
+
+    Returns:
+        `200 OK`: Counters grouped by subsystem.
+        `403 Forbidden`: If the client is not an admin.
+    """
+
+    if "walletAddress" in session and session.get("userRole") == "admin":
+        response = make_response(
+            {
+                "payload": {
+                    "web3": web3Client.stats(),
+                    "asyncChain": asyncChain.stats(),
+                    "rpcResilience": rpcResilience.stats(),
+                    "rpcTrace": rpcTrace.stats(),
+                    "postCache": postCache.stats(),
+                    "db": db.stats(),
+                    "dbWriter": dbWriter.stats(),
+                    "analyticsIngest": analyticsIngest.stats(),
+                    "analyticsRetention": analyticsRetention.stats(),
+                    "geoIP": geoIP.stats(),
+                    "userAgent": userAgent.stats(),
+                    "sqlTrace": sqlTrace.stats(),
+                }
+            },
+            200,
+        )
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    return make_response(
+        {"message": "client don't have permission", "error": "request denied"},
+        403,
+    )
@@ -1,5 +1,4 @@
 import smtplib
-import sqlite3
 import ssl
 from email.message import EmailMessage
 from random import randint
@@ -13,6 +12,8 @@ from flask import (
 )
 from passlib.hash import sha512_crypt as encryption
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
 from utils.flashMessage import flashMessage
 from utils.forms.PasswordResetForm import PasswordResetForm
 from utils.log import Log
@@ -42,10 +43,7 @@ def passwordReset(codeSent):
     form = PasswordResetForm(request.form)
 
     if codeSent == "true":
-        Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_USERS_ROOT)
         cursor = connection.cursor()
         if request.method == "POST":
             userName = request.form["userName"]
@@ -71,11 +69,13 @@ def passwordReset(codeSent):
                         passwordResetCodesStorage.pop(userName)
 
                         password = encryption.hash(password)
-                        cursor.execute(
-                            """update users set password = ? where lower(userName) = ? """,
-                            [(password), (userName.lower())],
+                        write(
+                            Settings.DB_USERS_ROOT,
+                            lambda cursor: cursor.execute(
+                                """update users set password = ? where lower(userName) = ? """,
+                                [(password), (userName.lower())],
+                            ),
                         )
-                        connection.commit()
                         Log.success(f'User: "{userName}" changed his password')
                         flashMessage(
                             page="passwordReset",
@@ -109,9 +109,7 @@ def passwordReset(codeSent):
             userName = request.form["userName"]
             email = request.form["email"]
             userName = userName.replace(" ", "")
-            Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-            connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_USERS_ROOT)
             cursor = connection.cursor()
             cursor.execute(
                 """select * from users where lower(userName) = ? and lower(email) = ? """,
@@ -1,7 +1,6 @@
 import os
 from math import ceil
 from re import sub
-import sqlite3
 
 from flask import (
     Blueprint,
@@ -15,34 +14,68 @@ from flask import (
 )
 from gtts import gTTS
 from settings import Settings
+from utils.asyncChain import concurrentCall
+from utils.db import getConnection
+from utils.dbWriter import WriterBusy, submit
 from utils.generateUrlIdFromPost import getSlugFromPostTitle
 from utils.commentTree import build_comment_tree
 from utils.log import Log
-from web3 import Web3
+from utils.postCache import postCache
+from utils.postIndexer import getIndexedPost
+from utils.postRecord import PostRecord
+from utils.rpcResilience import resilientRead
+from utils.web3Client import getContract
+from web3.exceptions import ContractLogicError
 
 postBlueprint = Blueprint("post", __name__)
 
 
 def _get_onchain_post(urlID: int):
-    """Retrieve post data from the blockchain."""
+    """Retrieve post data from the local mirror, falling back to the blockchain."""
 
-    contract_info = Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]
-    w3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_RPC_URL))
-    contract = w3.eth.contract(
-        address=contract_info["address"], abi=contract_info["abi"]
-    )
-    try:
+    indexed = getIndexedPost(urlID)
+    if indexed is False:
+        return None
+    if indexed is not None:
+        return indexed
+
+    Log.info(f"Post: '{urlID}' not indexed yet, reading from chain")
+    contract = getContract("PostStorage")
+
+    def fetch():
         return contract.functions.getPost(urlID).call()
-    except Exception as exc:  # pragma: no cover - network errors
+
+    # A revert is not cached, so a post created after the miss is found.
+    try:
+        return resilientRead(
+            (Settings.BLOCKCHAIN_RPC_URL, contract.address, "getPost", urlID), fetch
+        )
+    except ContractLogicError as exc:
         Log.error(f"Post: '{urlID}' not found on chain: {exc}")
         return None
+    except Exception as exc:  # pragma: no cover - network errors
+        Log.error(f"Post: '{urlID}' could not be read from chain: {exc}")
+        return None
+
+
+def _get_post_record(urlID: int):
+    """Return the decoded post record for ``urlID``, served from ``postCache`` when possible."""
+
+    record = postCache.get(urlID)
+    if record is not None:
+        return record
+    onchain = _get_onchain_post(urlID)
+    if not onchain:
+        return None
+    record = PostRecord.fromGetPost(urlID, onchain)
+    postCache.set(urlID, record)
+    return record
 
 
 @postBlueprint.route("/post/<int:urlID>", methods=["GET"])
 @postBlueprint.route("/post/<slug>-<int:urlID>", methods=["GET"])
 def post(urlID: int, slug: str | None = None):
-    with sqlite3.connect(Settings.DB_POSTS_ROOT) as connection:
-        connection.set_trace_callback(Log.database)
+    with getConnection(Settings.DB_POSTS_ROOT) as connection:
         cursor = connection.cursor()
         cursor.execute(
             "select 1 from deletedPosts where urlID = ?",
@@ -51,46 +84,39 @@ def post(urlID: int, slug: str | None = None):
         if cursor.fetchone():
             return render_template("notFound.html")
 
-    onchain = _get_onchain_post(urlID)
-    if not onchain:
+    record = _get_post_record(urlID)
+    if record is None:
         return render_template("notFound.html")
 
-    # onchain tuple: (author, contentHash, magnetURI, authorInfo, exists, blacklisted, imageIds, bannerImageId, videoIds)
-    content_hash = onchain[1]
-    parts = content_hash.split("|", 5)
-    title = parts[0] if len(parts) > 0 else ""
-    tags = parts[1] if len(parts) > 1 else ""
-    abstract = parts[2] if len(parts) > 2 else ""
-    content = parts[3] if len(parts) > 3 else ""
-    category = parts[4] if len(parts) > 4 else ""
-    author = onchain[0]
-    author_info = onchain[3]
-    video_ids = onchain[8] if len(onchain) > 8 else []
-
+    title = record.title
     postSlug = getSlugFromPostTitle(title) if title else slug
     if title and slug != postSlug:
         return redirect(url_for("post.post", urlID=urlID, slug=postSlug))
 
+    content = record.content
+
     clean_text = sub(r"<[^>]+>", "", content)
     reading_time = max(1, ceil(len(clean_text.split()) / 200))
 
     if Settings.ANALYTICS:
+
+        def updateStats(cursor):
+            cursor.execute(
+                "INSERT OR IGNORE INTO postStats(postID) VALUES (?)",
+                (urlID,),
+            )
+            cursor.execute(
+                "UPDATE postStats SET estimatedReadTime=? WHERE postID=?",
+                (reading_time, urlID),
+            )
+
+        # The view does not wait for the analytics writer.
         try:
-            with sqlite3.connect(Settings.DB_ANALYTICS_ROOT) as conn:
-                conn.execute(
-                    "INSERT OR IGNORE INTO postStats(postID) VALUES (?)",
-                    (urlID,),
-                )
-                conn.execute(
-                    "UPDATE postStats SET estimatedReadTime=? WHERE postID=?",
-                    (reading_time, urlID),
-                )
-                conn.commit()
-        except Exception as exc:  # pragma: no cover - analytics DB may be missing
+            submit(Settings.DB_ANALYTICS_ROOT, updateStats)
+        except WriterBusy as exc:
             Log.error(f"Failed to update postStats for {urlID}: {exc}")
 
-    with sqlite3.connect(Settings.DB_COMMENTS_ROOT) as connection:
-        connection.set_trace_callback(Log.database)
+    with getConnection(Settings.DB_COMMENTS_ROOT) as connection:
         cursor = connection.cursor()
         cursor.execute("select commentID from deletedComments")
         deleted_comments = [row[0] for row in cursor.fetchall()]
@@ -99,9 +125,9 @@ def post(urlID: int, slug: str | None = None):
         "post.html",
         id=urlID,
         title=title,
-        tags=tags,
-        abstract=abstract,
-        author=author,
+        tags=record.tags,
+        abstract=record.abstract,
+        author=record.author,
         views=0,
         downvotes=0,
         timeStamp="",
@@ -112,8 +138,8 @@ def post(urlID: int, slug: str | None = None):
         blogPostUrl=request.root_url,
         idForRandomVisitor=None,
         sort="new",
-        banner_magnet=onchain[2],
-        video_ids=video_ids,
+        banner_magnet=record.magnetURI,
+        video_ids=list(record.videoIds),
         rpc_url=Settings.BLOCKCHAIN_RPC_URL,
         post_contract_address=Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]["address"],
         post_contract_abi=Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]["abi"],
@@ -123,7 +149,7 @@ def post(urlID: int, slug: str | None = None):
         tip_jar_abi=Settings.BLOCKCHAIN_CONTRACTS["TipJar"]["abi"],
         content=content,
         reading_time=reading_time,
-        author_info=author_info,
+        author_info=record.authorInfo,
         blacklisted_comments=deleted_comments,
         hideNavbar=True,
         hideSearch=True,
@@ -132,12 +158,11 @@ def post(urlID: int, slug: str | None = None):
 
 @postBlueprint.route("/post/<int:urlID>/audio")
 def post_audio(urlID: int):
-    onchain = _get_onchain_post(urlID)
-    if not onchain:
+    record = _get_post_record(urlID)
+    if record is None:
         abort(404)
 
-    parts = onchain[1].split("|", 5)
-    text = sub(r"<[^>]+>", "", parts[3] if len(parts) > 3 else "")
+    text = sub(r"<[^>]+>", "", record.content)
     audio_dir = os.path.join(Settings.APP_ROOT_PATH, "static", "audio")
     os.makedirs(audio_dir, exist_ok=True)
     file_path = os.path.join(audio_dir, f"{urlID}.mp3")
@@ -151,21 +176,30 @@ def post_audio(urlID: int):
 def comment_tree(urlID: int):
     """Return a similarity tree for comments on ``urlID``."""
 
-    contract_info = Settings.BLOCKCHAIN_CONTRACTS["CommentStorage"]
-    w3 = Web3(Web3.HTTPProvider(Settings.BLOCKCHAIN_RPC_URL))
-    contract = w3.eth.contract(
-        address=contract_info["address"], abi=contract_info["abi"]
-    )
-    try:
+    contract = getContract("CommentStorage")
+
+    def fetch():
         next_id = contract.functions.nextCommentId().call()
+        # Reverted ids (no comment) stay None; a failed call raises instead
+        # of caching an incomplete tree.
+        return concurrentCall(
+            "CommentStorage",
+            "getComment",
+            [(cid,) for cid in range(next_id)],
+            strict=True,
+        )
+
+    try:
+        results = resilientRead(
+            (Settings.BLOCKCHAIN_RPC_URL, contract.address, "getComment"), fetch
+        )
     except Exception as exc:  # pragma: no cover - network errors
-        Log.error(f"comment-tree: nextCommentId failed: {exc}")
+        Log.error(f"comment-tree: reading comments failed: {exc}")
         return jsonify({"nodes": [], "links": []})
 
     deleted = set()
     try:
-        connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_COMMENTS_ROOT)
         cursor = connection.cursor()
         cursor.execute("select commentID from deletedComments")
         deleted = {row[0] for row in cursor.fetchall()}
@@ -174,11 +208,8 @@ def comment_tree(urlID: int):
         Log.error(f"Fetching deleted comments failed: {exc}")
 
     comments = []
-    for cid in range(next_id):
-        try:
-            c = contract.functions.getComment(cid).call()
-        except Exception as exc:  # pragma: no cover - network errors
-            Log.error(f"comment-tree: getComment failed: {cid} {exc}")
+    for cid, c in enumerate(results):
+        if c is None:
             continue
         author, post_id, content, exists, blacklisted = c
         if not exists or blacklisted or post_id != urlID or cid in deleted:
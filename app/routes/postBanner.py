@@ -0,0 +1,70 @@
+"""
+This module contains the route serving post banners.
+
+List views no longer read the ``banner`` BLOB with the post rows; the post
+cards of the search, user and dashboard pages load the image from here. It
+is served with an ETag derived from the post's ``lastEditTimeStamp`` and
+the banner's size, so browsers revalidate it without downloading it again.
+"""
+
+from flask import Blueprint, abort, make_response, request
+from settings import Settings
+from utils.db import getConnection
+
+postBannerBlueprint = Blueprint("postBanner", __name__)
+
+# Leading bytes of the image formats accepted as banners.
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"RIFF", "image/webp"),
+)
+
+
+def bannerMimetype(banner):
+    """Return the image mimetype of ``banner`` from its leading bytes."""
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if banner.startswith(signature):
+            return mimetype
+    return "application/octet-stream"
+
+
+@postBannerBlueprint.route("/post/<int:postID>/banner")
+def postBanner(postID):
+    """
+    Returns the banner image of a post.
+
+    Returns:
+        `200 OK`: The image.
+        `304 Not Modified`: If `If-None-Match` matches the current ETag.
+        `404 Not Found`: If the post does not exist or has no banner.
+    """
+
+    connection = getConnection(Settings.DB_POSTS_ROOT)
+    # length() reads the BLOB's size from its record header, not its pages.
+    row = connection.execute(
+        "select lastEditTimeStamp, length(banner) from posts where id = ?",
+        (postID,),
+    ).fetchone()
+    if row is None or not row[1]:
+        connection.close()
+        abort(404)
+
+    etag = f"{postID}-{row[0]}-{row[1]}"
+    if etag in request.if_none_match:
+        connection.close()
+        response = make_response("", 304)
+    else:
+        banner = connection.execute(
+            "select banner from posts where id = ?", (postID,)
+        ).fetchone()[0]
+        connection.close()
+        response = make_response(bytes(banner), 200)
+        response.mimetype = bannerMimetype(banner)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = (
+        f"public, max-age={Settings.POST_BANNER_MAX_AGE}"
+    )
+    return response
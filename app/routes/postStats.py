@@ -1,14 +1,15 @@
-import sqlite3
 import time
 from flask import Blueprint, request, jsonify, session
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
 
 postStatsBlueprint = Blueprint("postStats", __name__)
 DB_PATH = Settings.DB_ANALYTICS_ROOT
 
 
 def _init_db() -> None:
-    with sqlite3.connect(DB_PATH) as conn:
+    with getConnection(DB_PATH) as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS postStats(
@@ -36,63 +37,58 @@ def _init_db() -> None:
 _init_db()
 
 
+def _statsRow(cursor, post_id):
+    cursor.execute("SELECT * FROM postStats WHERE postID=?", (post_id,))
+    columns = [column[0] for column in cursor.description]
+    return dict(zip(columns, cursor.fetchone()))
+
+
 @postStatsBlueprint.route("/api/v1/postStats", methods=["GET"])
 def get_post_stats():
     post_id = request.args.get("postID", type=int)
     if post_id is None:
         return jsonify({"error": "postID is required"}), 400
     now = int(time.time())
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        conn.execute(
+
+    def refresh(cursor):
+        cursor.execute(
             "DELETE FROM postActiveReaders WHERE lastSeen < ?",
             (now - 30,),
         )
         # Ensure a stats row exists for the post
-        row = conn.execute(
-            "SELECT * FROM postStats WHERE postID=?", (post_id,)
-        ).fetchone()
-        if row is None:
-            conn.execute("INSERT INTO postStats(postID) VALUES (?)", (post_id,))
-            conn.commit()
-            row = conn.execute(
-                "SELECT * FROM postStats WHERE postID=?", (post_id,)
-            ).fetchone()
+        cursor.execute("INSERT OR IGNORE INTO postStats(postID) VALUES (?)", (post_id,))
 
         # Fetch up-to-date analytics for the post
-        analytics = conn.execute(
+        # Visits older than the analytics retention are in postsAnalyticsCompacted
+        total_readers, avg_time = cursor.execute(
             """
-            SELECT COUNT(*) AS totalReaders,
-                   AVG(timeSpendDuration) AS avgTimeOnPage
-            FROM postsAnalytics
-            WHERE postID=?
+            SELECT SUM(visits) AS totalReaders,
+                   SUM(timeSpent) * 1.0 / SUM(visits) AS avgTimeOnPage
+            FROM (
+                SELECT COUNT(*) AS visits, SUM(timeSpendDuration) AS timeSpent
+                FROM postsAnalytics
+                WHERE postID=?
+                UNION ALL
+                SELECT visits, timeSpendDuration
+                FROM postsAnalyticsCompacted
+                WHERE postID=?
+            )
             """,
-            (post_id,),
+            (post_id, post_id),
         ).fetchone()
 
-        total_readers = analytics["totalReaders"] or 0
-        avg_time = analytics["avgTimeOnPage"] or 0
-
         # Persist the calculated analytics to the stats table
-        conn.execute(
-            "UPDATE postStats SET totalReaders=?, avgTimeOnPage=? WHERE postID=?",
-            (total_readers, avg_time, post_id),
-        )
-        current = conn.execute(
+        current = cursor.execute(
             "SELECT COUNT(*) FROM postActiveReaders WHERE postID=?",
             (post_id,),
         ).fetchone()[0]
-        conn.execute(
-            "UPDATE postStats SET currentReaders=? WHERE postID=?",
-            (current, post_id),
+        cursor.execute(
+            "UPDATE postStats SET totalReaders=?, avgTimeOnPage=?, currentReaders=? WHERE postID=?",
+            (total_readers or 0, avg_time or 0, current, post_id),
         )
-        conn.commit()
-
-        row = conn.execute(
-            "SELECT * FROM postStats WHERE postID=?", (post_id,)
-        ).fetchone()
+        return _statsRow(cursor, post_id)
 
-    data = dict(row)
+    data = write(DB_PATH, refresh)
     response = jsonify(data)
     response.headers["Cache-Control"] = "no-store"
     return response
@@ -120,10 +116,12 @@ def update_post_stats():
         return jsonify({"error": "no fields to update"}), 400
     placeholders = ", ".join(f"{k}=?" for k in fields.keys())
     values = list(fields.values()) + [post_id]
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute("INSERT OR IGNORE INTO postStats(postID) VALUES (?)", (post_id,))
-        conn.execute(f"UPDATE postStats SET {placeholders} WHERE postID=?", values)
-        conn.commit()
+
+    def update(cursor):
+        cursor.execute("INSERT OR IGNORE INTO postStats(postID) VALUES (?)", (post_id,))
+        cursor.execute(f"UPDATE postStats SET {placeholders} WHERE postID=?", values)
+
+    write(DB_PATH, update)
     return jsonify({"message": "ok"})
 
 
@@ -141,53 +139,44 @@ def post_activity():
     ):
         return jsonify({"error": "invalid request"}), 400
     now = int(time.time())
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            "INSERT OR IGNORE INTO postStats(postID) VALUES (?)", (post_id,)
-        )
-        conn.execute(
+
+    def record(cursor):
+        cursor.execute("INSERT OR IGNORE INTO postStats(postID) VALUES (?)", (post_id,))
+        cursor.execute(
             "DELETE FROM postActiveReaders WHERE lastSeen < ?",
             (now - 30,),
         )
         if action in {"enter", "heartbeat"}:
-            conn.execute(
+            cursor.execute(
                 "INSERT OR REPLACE INTO postActiveReaders(postID, sessionID, lastSeen) VALUES (?, ?, ?)",
                 (post_id, session_id, now),
             )
         else:  # leave
-            conn.execute(
+            cursor.execute(
                 "DELETE FROM postActiveReaders WHERE postID=? AND sessionID=?",
                 (post_id, session_id),
             )
-            row = conn.execute(
+            total, avg = cursor.execute(
                 "SELECT totalReaders, avgTimeOnPage FROM postStats WHERE postID=?",
                 (post_id,),
             ).fetchone()
-            total, avg = row
             if time_spent and total > 0:
                 avg = ((avg * (total - 1)) + float(time_spent)) / total
-            conn.execute(
+            cursor.execute(
                 "UPDATE postStats SET avgTimeOnPage=? WHERE postID=?",
                 (avg, post_id),
             )
         if action == "enter":
-            total = (
-                conn.execute(
-                    "SELECT totalReaders FROM postStats WHERE postID=?", (post_id,)
-                ).fetchone()[0]
-                + 1
-            )
-            conn.execute(
-                "UPDATE postStats SET totalReaders=? WHERE postID=?",
-                (total, post_id),
+            cursor.execute(
+                "UPDATE postStats SET totalReaders=totalReaders + 1 WHERE postID=?",
+                (post_id,),
             )
-        current = conn.execute(
-            "SELECT COUNT(*) FROM postActiveReaders WHERE postID=?",
-            (post_id,),
-        ).fetchone()[0]
-        conn.execute(
-            "UPDATE postStats SET currentReaders=? WHERE postID=?",
-            (current, post_id),
+        cursor.execute(
+            """UPDATE postStats SET currentReaders=(
+                SELECT COUNT(*) FROM postActiveReaders WHERE postID=?
+            ) WHERE postID=?""",
+            (post_id, post_id),
         )
-        conn.commit()
+
+    write(DB_PATH, record)
     return jsonify({"message": "ok"})
@@ -2,17 +2,18 @@
 This module contains the code for the posts analytics page.
 """
 
-import sqlite3
 
 from flask import Blueprint, render_template, request, session
 from settings import Settings
+from utils.db import getConnection
 from utils.getAnalyticsPageData import (
     getAnalyticsPageOSGraphData,
     getAnalyticsPageTrafficGraphData,
     getSiteOSGraphData,
-    getSiteTrafficGraphData,
+    getSiteTotals,
 )
 from utils.log import Log
+from utils.postColumns import LIST_SELECT
 
 analyticsBlueprint = Blueprint("analytics", __name__)
 
@@ -22,42 +23,16 @@ def analyticsSite():
     """Render site-wide analytics page."""
     if Settings.ANALYTICS:
         if "walletAddress" in session and session.get("userRole") == "admin":
-            connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-            connection.set_trace_callback(Log.database)
-            cursor = connection.cursor()
-
-            cursor.execute("select count(*) from postsAnalytics")
-            totalVisitor = cursor.fetchone()[0] or 0
-            connection.close()
-
-            todaysVisitorData = getSiteTrafficGraphData(hours=24)
-            todaysVisitor = 0
-            for views in todaysVisitorData:
-                todaysVisitor += int(views[1])
-
+            totals = getSiteTotals()
             osGraphData = getSiteOSGraphData()
 
-            connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-            connection.set_trace_callback(Log.database)
-            cursor = connection.cursor()
-            cursor.execute("select count(*) from posts")
-            totalPosts = cursor.fetchone()[0] or 0
-            connection.close()
-
-            connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-            connection.set_trace_callback(Log.database)
-            cursor = connection.cursor()
-            cursor.execute("select count(*) from comments")
-            totalComments = cursor.fetchone()[0] or 0
-            connection.close()
-
             return render_template(
                 "siteAnalytics.html",
-                totalVisitor=totalVisitor,
-                todaysVisitor=todaysVisitor,
+                totalVisitor=totals["totalVisitor"],
+                todaysVisitor=totals["todaysVisitor"],
                 osGraphData=osGraphData,
-                totalPosts=totalPosts,
-                totalComments=totalComments,
+                totalPosts=totals["totalPosts"],
+                totalComments=totals["totalComments"],
             )
         else:
             Log.error(f"{request.remote_addr} tried to reach admin analytics without permission")
@@ -79,8 +54,7 @@ def analyticsPost(urlID):
     """
     if Settings.ANALYTICS:
         if "walletAddress" in session and session.get("userRole") == "admin":
-            connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-            connection.set_trace_callback(Log.database)
+            connection = getConnection(Settings.DB_POSTS_ROOT)
             cursor = connection.cursor()
 
             cursor.execute("select urlID from posts")
@@ -89,14 +63,11 @@ def analyticsPost(urlID):
             if urlID in posts:
                 Log.success(f'post: "{urlID}" loaded')
 
-                Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-
-                connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-                connection.set_trace_callback(Log.database)
+                connection = getConnection(Settings.DB_POSTS_ROOT)
                 cursor = connection.cursor()
 
                 cursor.execute(
-                    """select * from posts where urlID = ? """,
+                    f"""select {LIST_SELECT} from posts where urlID = ? """,
                     [(urlID)],
                 )
                 post = cursor.fetchone()
@@ -0,0 +1,58 @@
+"""
+This module contains the paginated post feed API used by the index and
+category pages.
+"""
+
+from flask import Blueprint, make_response, request
+from settings import Settings
+from utils.log import Log
+from utils.postFeed import getFeedPage
+
+postsFeedBlueprint = Blueprint("postsFeed", __name__)
+
+
+@postsFeedBlueprint.route("/api/v1/posts")
+def postsFeed() -> dict:
+    """
+    Returns a page of posts, newest first.
+
+    Args (Query Parameters):
+        - `category` (str, optional): Only return posts in this category.
+        - `blacklisted` (str, optional): `exclude` (default), `include` or `only`.
+        - `cursor` (int, optional): `nextCursor` of the previous page.
+        - `limit` (int, optional): Page size.
+
+    Returns:
+        - `200 OK`: `{"payload": {"posts": [...], "nextCursor": int | None, "total": int}}`.
+        - `304 Not Modified`: If `If-None-Match` matches the current ETag.
+        - `400 Bad Request`: If `blacklisted` is not a known filter.
+    """
+
+    blacklisted = request.args.get("blacklisted", "exclude")
+    if blacklisted not in ("exclude", "include", "only"):
+        return make_response(
+            {"message": "unknown blacklisted filter", "error": "bad request"},
+            400,
+        )
+
+    try:
+        page, etag = getFeedPage(
+            category=request.args.get("category") or None,
+            blacklisted=blacklisted,
+            cursor=request.args.get("cursor", type=int),
+            limit=request.args.get("limit", type=int),
+        )
+    except Exception as exc:
+        Log.error(f"Post feed: building page failed: {exc}")
+        return make_response(
+            {"message": "post feed is unavailable", "error": "service unavailable"},
+            503,
+        )
+
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        response = make_response({"payload": page}, 200)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={Settings.POST_FEED_MAX_AGE}"
+    return response
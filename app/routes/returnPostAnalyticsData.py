@@ -1,14 +1,15 @@
-import sqlite3
-
 from flask import Blueprint, make_response, request, session
 from settings import Settings
+from utils.counters import counter
+from utils.db import getConnection
+from utils.dbWriter import execute
 from utils.getAnalyticsPageData import (
     getAnalyticsPageCountryGraphData,
     getAnalyticsPageTrafficGraphData,
     getSiteCountryGraphData,
+    getSiteTotals,
     getSiteTrafficGraphData,
 )
-from utils.log import Log
 
 returnPostAnalyticsDataBlueprint = Blueprint("returnPostTrafficGraphData", __name__)
 
@@ -191,44 +192,7 @@ def return_site_stats() -> dict:
     if Settings.ANALYTICS:
         if "walletAddress" in session and session.get("userRole") == "admin":
             try:
-                connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-                connection.set_trace_callback(Log.database)
-                cursor = connection.cursor()
-
-                cursor.execute("select count(*) from postsAnalytics")
-                totalVisitor = cursor.fetchone()[0] or 0
-                connection.close()
-
-                todaysVisitorData = getSiteTrafficGraphData(hours=24)
-                todaysVisitor = 0
-                for views in todaysVisitorData:
-                    todaysVisitor += int(views[1])
-
-                connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-                connection.set_trace_callback(Log.database)
-                cursor = connection.cursor()
-                cursor.execute("select count(*) from posts")
-                totalPosts = cursor.fetchone()[0] or 0
-                connection.close()
-
-                connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-                connection.set_trace_callback(Log.database)
-                cursor = connection.cursor()
-                cursor.execute("select count(*) from comments")
-                totalComments = cursor.fetchone()[0] or 0
-                connection.close()
-
-                response = make_response(
-                    {
-                        "payload": {
-                            "totalVisitor": totalVisitor,
-                            "todaysVisitor": todaysVisitor,
-                            "totalPosts": totalPosts,
-                            "totalComments": totalComments,
-                        }
-                    },
-                    200,
-                )
+                response = make_response({"payload": getSiteTotals()}, 200)
                 response.headers["Cache-Control"] = "no-store"
                 return response
             except Exception:
@@ -252,15 +216,12 @@ def return_post_analytics_stats() -> dict:
         if "walletAddress" in session and session.get("userRole") == "admin":
             if postID:
                 try:
-                    connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-                    connection.set_trace_callback(Log.database)
+                    connection = getConnection(Settings.DB_ANALYTICS_ROOT)
                     cursor = connection.cursor()
 
-                    cursor.execute(
-                        "select count(*) from postsAnalytics where postID = ?",
-                        (postID,),
+                    totalVisitor = counter(cursor, "postVisitors", postID) + counter(
+                        cursor, "archivedPostVisitors", postID
                     )
-                    totalVisitor = cursor.fetchone()[0] or 0
                     connection.close()
 
                     todaysVisitorData = getAnalyticsPageTrafficGraphData(
@@ -325,15 +286,11 @@ def storeTimeSpendsDuraton() -> dict:
             spendTime = visitorData.get("spendTime")
 
             try:
-                connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-                connection.set_trace_callback(Log.database)
-                cursor = connection.cursor()
-
-                cursor.execute(
+                execute(
+                    Settings.DB_ANALYTICS_ROOT,
                     """update postsAnalytics set timeSpendDuration = ? where id = ? """,
                     (spendTime, visitorID),
-                )
-                connection.commit()
+                ).result(timeout=Settings.DB_WRITER_RESULT_TIMEOUT)
                 return make_response({"message": "Successfully upadated"}, 200)
             except Exception:
                 return make_response({"message": "Unexpected error occured"}, 500)
@@ -1,9 +1,10 @@
-import sqlite3
 from math import ceil
 
 from flask import Blueprint, render_template, request
 from settings import Settings
+from utils.db import getConnection
 from utils.log import Log
+from utils.postColumns import LIST_SELECT
 
 searchBlueprint = Blueprint("search", __name__)
 
@@ -19,10 +20,7 @@ def search(query):
 
     Log.info(f"Searching for query: {query}")
 
-    Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-    connection.set_trace_callback(Log.database)
+    connection = getConnection(Settings.DB_USERS_ROOT)
     cursor = connection.cursor()
 
     queryUsers = cursor.execute(
@@ -38,49 +36,46 @@ def search(query):
             ("%" + queryNoWhiteSpace + "%"),
         ],
     ).fetchall()
-    Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-    connection.set_trace_callback(Log.database)
+    connection = getConnection(Settings.DB_POSTS_ROOT)
     cursor = connection.cursor()
 
     queryTags = cursor.execute(
-        """select * from posts where tags like ? order by timeStamp desc""",
+        """select id from posts where tags like ? order by timeStamp desc""",
         [
             ("%" + query + "%"),
         ],
     ).fetchall()
 
     queryTitles = cursor.execute(
-        """select * from posts where title like ? order by timeStamp desc""",
+        """select id from posts where title like ? order by timeStamp desc""",
         [
             ("%" + query + "%"),
         ],
     ).fetchall()
 
     queryAuthors = cursor.execute(
-        """select * from posts where author like ? order by timeStamp desc""",
+        """select id from posts where author like ? order by timeStamp desc""",
         [
             ("%" + query + "%"),
         ],
     ).fetchall()
 
     queryTags = cursor.execute(
-        """select * from posts where tags like ? order by timeStamp desc""",
+        """select id from posts where tags like ? order by timeStamp desc""",
         [
             ("%" + queryNoWhiteSpace + "%"),
         ],
     ).fetchall()
 
     queryTitles = cursor.execute(
-        """select * from posts where title like ? order by timeStamp desc""",
+        """select id from posts where title like ? order by timeStamp desc""",
         [
             ("%" + queryNoWhiteSpace + "%"),
         ],
     ).fetchall()
 
     queryAuthors = cursor.execute(
-        """select * from posts where author like ? order by timeStamp desc""",
+        """select id from posts where author like ? order by timeStamp desc""",
         [
             ("%" + queryNoWhiteSpace + "%"),
         ],
@@ -114,21 +109,20 @@ def search(query):
             if post[0] not in resultsID:
                 resultsID.append(post[0])
 
+    total_posts = len(resultsID)
+    total_pages = max(ceil(total_posts / per_page), 1)
+    offset = (page - 1) * per_page
+
     posts = []
 
-    for postID in resultsID:
+    for postID in resultsID[offset : offset + per_page]:
         cursor.execute(
-            """select * from posts where id = ? """,
+            f"""select {LIST_SELECT} from posts where id = ? """,
             [(postID)],
         )
 
         posts.append(cursor.fetchall())
 
-    total_posts = len(posts)
-    total_pages = max(ceil(total_posts / per_page), 1)
-    offset = (page - 1) * per_page
-    posts = posts[offset : offset + per_page]
-
     Log.info(
         f"Rendering search.html: params: query={query} | users={users} | posts={len(posts)} | empty={empty}"
     )
@@ -2,11 +2,10 @@
 This module contains the route for viewing user profiles.
 """
 
-import sqlite3
-
 from flask import Blueprint, render_template
-from settings import Settings
+from utils.db import getAttachedConnection
 from utils.log import Log
+from utils.postColumns import LIST_SELECT
 
 userBlueprint = Blueprint("user", __name__)
 
@@ -22,46 +21,30 @@ def user(userName):
     :rtype: flask.Response
     """
     userName = userName.lower()
-    Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-    connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-    connection.set_trace_callback(Log.database)
+    connection = getAttachedConnection()
     cursor = connection.cursor()
-    cursor.execute("select userName from users")
-    users = cursor.fetchall()
     """
-    This if statement checks if the given username exists in the database.
-    If the username exists, the function fetches the user details and the number of views their posts have received.
-    It also fetches all the posts made by the user and all the comments made by the user.
+    The user details and the number of views their posts have received are read
+    in one query; the views come from the authorViews counter of the posts database.
+    If the user exists, all the posts and comments made by the user are fetched too.
     """
-    if userName in str(users).lower():
+    cursor.execute(
+        """select users.*, coalesce((select value from posts.counters
+        where name = 'authorViews' and key = users.userName), 0)
+        from users.users as users where lower(users.userName) = ?""",
+        [(userName)],
+    )
+    row = cursor.fetchone()
+    if row is not None:
         Log.success(f'User: "{userName}" found')
+        user, views = row[:-1], int(row[-1])
         cursor.execute(
-            """select * from users where lower(userName) = ? """,
-            [(userName)],
-        )
-        user = cursor.fetchone()
-        Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-        connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-        connection.set_trace_callback(Log.database)
-        cursor = connection.cursor()
-        cursor.execute(
-            """select views from posts where author = ? order by timeStamp desc""",
-            [(user[1])],
-        )
-        viewsData = cursor.fetchall()
-        views = 0
-        for view in viewsData:
-            views += int(view[0])
-        cursor.execute(
-            """select * from posts where author = ? order by timeStamp desc""",
+            f"""select {LIST_SELECT} from posts.posts where author = ? order by timeStamp desc""",
             [(user[1])],
         )
         posts = cursor.fetchall()
-        connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-        connection.set_trace_callback(Log.database)
-        cursor = connection.cursor()
         cursor.execute(
-            """select * from comments where lower(user) = ? and id not in (select commentID from deletedComments) """,
+            """select * from comments.comments where lower(user) = ? and id not in (select commentID from comments.deletedComments) """,
             [(userName.lower())],
         )
         comments = cursor.fetchall()
@@ -36,6 +36,33 @@ class Settings:
         DB_ANALYTICS_ROOT (str): Root path of the analytics database.
         DB_CATEGORIES_ROOT (str): Root path of the categories configuration file.
         DB_BLACKLIST_ROOT (str): Root path of the blacklist database.
+        DB_STATEMENT_CACHE_SIZE (int): Number of prepared statements cached per pooled SQLite connection.
+        DB_PRAGMAS (dict): PRAGMA profile applied to every SQLite connection, in order.
+        DB_CHECKPOINT (bool): Toggle the background WAL checkpointer.
+        DB_CHECKPOINT_INTERVAL (int): Seconds between passive WAL checkpoints of every database.
+        DB_TRACE_MODE (str): SQL tracing mode, "off", "sampled" or "slow".
+        DB_TRACE_SAMPLE_PERCENT (float): Percentage of statements logged in "sampled" mode.
+        DB_TRACE_SLOW_MS (float): Duration in ms from which a statement is recorded in "slow" mode.
+        DB_TRACE_SLOW_TOP (int): Number of slowest statements kept for the admin panel.
+        DB_TRACE_SLOW_WINDOW (int): Seconds a slow statement stays in the admin panel table after it was last seen.
+        DB_WRITER_QUEUE_SIZE (int): Write jobs a database writer queues before submitters block.
+        DB_WRITER_BATCH_SIZE (int): Write jobs a database writer runs in one transaction at most.
+        DB_WRITER_SUBMIT_TIMEOUT (float): Seconds a submitter waits for room in a full write queue before WriterBusy is raised.
+        DB_WRITER_RESULT_TIMEOUT (float): Seconds a caller waits for its write job to commit.
+        ANALYTICS_INGEST_QUEUE_SIZE (int): Analytics events queued for the flusher before the overflow policy applies.
+        ANALYTICS_INGEST_BATCH_SIZE (int): Analytics events written in one transaction at most.
+        ANALYTICS_INGEST_FLUSH_MS (float): Milliseconds after the first queued analytics event at which a partial batch is written.
+        ANALYTICS_INGEST_OVERFLOW (str): What a full analytics queue does with new events, "drop" or "block".
+        ANALYTICS_INGEST_BLOCK_TIMEOUT (float): Seconds a request waits for room in a full analytics queue in "block" mode before the event is dropped.
+        ANALYTICS_ROLLUP_MIN_BUCKETS (int): Buckets a traffic chart window needs at least; the coarsest rollup giving as many is read.
+        ANALYTICS_RETENTION_DAYS (int | None): Days raw postsAnalytics and userActivity rows are kept before they are compacted and removed, None keeps them forever.
+        ANALYTICS_RETENTION_ACTION (str): What happens to removed raw rows, "archive" into monthly partition files or "drop".
+        ANALYTICS_RETENTION_INTERVAL (int): Seconds between runs of the analytics retention worker.
+        ANALYTICS_ARCHIVE_FOLDER_ROOT (str): Root path of the folder of the monthly analytics partition files.
+        GEOIP_DB_ROOT (str): Root path of the DB-IP country database.
+        GEOIP_CACHE_SIZE (int): Number of resolved addresses or networks kept in the GeoIP LRU cache.
+        GEOIP_PREFIX_KEYS (bool): Cache GeoIP results per /24 (IPv4) or /48 (IPv6) network instead of per address.
+        USER_AGENT_CACHE_SIZE (int): Number of distinct user-agent strings whose classification is kept in memory.
         SMTP_SERVER (str): SMTP server address.
         SMTP_PORT (int): SMTP server port.
         SMTP_MAIL (str): SMTP mail address.
@@ -50,6 +77,33 @@ class Settings:
         RECAPTCHA_SITE_KEY (str): reCAPTCHA site key.
         RECAPTCHA_SECRET_KEY (str): reCAPTCHA secret key.
         RECAPTCHA_VERIFY_URL (str): reCAPTCHA verify URL.
+        BLOCKCHAIN_TIMEOUT (int): Seconds before an RPC request times out.
+        BLOCKCHAIN_POOL_CONNECTIONS (int): Number of keep-alive connection pools per RPC session.
+        BLOCKCHAIN_POOL_MAXSIZE (int): Maximum number of keep-alive connections per pool.
+        BLOCKCHAIN_BATCH_SIZE (int): Maximum number of calls packed into one JSON-RPC batch.
+        BLOCKCHAIN_ASYNC_CONCURRENCY (int): Maximum number of concurrent calls made by the async chain reader.
+        BLOCKCHAIN_CALL_TIMEOUT (float): Seconds before a single async contract call times out.
+        BLOCKCHAIN_CALL_RETRIES (int): Number of retries for a failed async contract call.
+        BLOCKCHAIN_RETRY_BACKOFF (float): Base backoff in seconds between retries, doubled per attempt and jittered.
+        RPC_BREAKER_FAILURE_THRESHOLD (int): Consecutive RPC failures that open the circuit breaker.
+        RPC_BREAKER_RESET_TIMEOUT (int): Seconds an open circuit breaker waits before sending a probe request.
+        RPC_STALE_MAX_AGE (int): Seconds an RPC read is served as fresh before it is refreshed in the background.
+        RPC_STALE_MAX_ENTRIES (int): Maximum number of last known good RPC reads kept in memory.
+        RPC_REFRESH_WORKERS (int): Number of background threads refreshing stale RPC reads.
+        RPC_CALL_BUDGET (int | None): JSON-RPC calls a request may make before a warning is logged, None disables the check.
+        RPC_CALL_BUDGETS (dict): Per-endpoint overrides of RPC_CALL_BUDGET, keyed by Flask endpoint name.
+        POST_INDEXER (bool): Toggle the background PostStorage event indexer.
+        POST_INDEXER_POLL_INTERVAL (int): Seconds between indexer polls.
+        POST_INDEXER_BLOCK_RANGE (int): Maximum number of blocks per eth_getLogs request.
+        POST_INDEXER_START_BLOCK (int | None): Block to start replaying events from, None snapshots the current head.
+        POST_CACHE_MAX_ENTRIES (int): Maximum number of decoded posts kept in memory.
+        POST_CACHE_MAX_BYTES (int): Memory ceiling of the decoded post cache in bytes.
+        POST_CACHE_TTL (int): Seconds before a cached post is read again.
+        POST_FEED_PAGE_SIZE (int): Default number of posts per /api/v1/posts page.
+        POST_FEED_MAX_PAGE_SIZE (int): Maximum number of posts per /api/v1/posts page.
+        POST_FEED_MAX_AGE (int): Seconds browsers may cache a feed page.
+        POST_FEED_TTL (int): Seconds a chain-read feed snapshot is kept before the indexer has synced.
+        POST_BANNER_MAX_AGE (int): Seconds browsers may cache a post banner served by /post/<id>/banner.
     """
 
     # Application Configuration
@@ -128,6 +182,54 @@ class Settings:
     DB_ANALYTICS_ROOT = str(_DB_PATH / "analytics.db")
     DB_CATEGORIES_ROOT = str(_DB_PATH / "categories.json")
     DB_BLACKLIST_ROOT = str(_DB_PATH / "blacklist.db")
+    DB_STATEMENT_CACHE_SIZE = 512
+    DB_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+    }
+    DB_CHECKPOINT = True
+    DB_CHECKPOINT_INTERVAL = 300
+    DB_TRACE_MODE = "slow"
+    DB_TRACE_SAMPLE_PERCENT = 1
+    DB_TRACE_SLOW_MS = 50
+    DB_TRACE_SLOW_TOP = 25
+    DB_TRACE_SLOW_WINDOW = 24 * 60 * 60
+    DB_WRITER_QUEUE_SIZE = 1000
+    DB_WRITER_BATCH_SIZE = 64
+    DB_WRITER_SUBMIT_TIMEOUT = 5
+    DB_WRITER_RESULT_TIMEOUT = 30
+
+    # Analytics Ingestion Configuration
+    ANALYTICS_INGEST_QUEUE_SIZE = 10000
+    ANALYTICS_INGEST_BATCH_SIZE = 500
+    ANALYTICS_INGEST_FLUSH_MS = 250
+    ANALYTICS_INGEST_OVERFLOW = "drop"
+    ANALYTICS_INGEST_BLOCK_TIMEOUT = 0.05
+    ANALYTICS_ROLLUP_MIN_BUCKETS = 48
+
+    # Analytics Retention Configuration
+    ANALYTICS_RETENTION_DAYS = 90
+    ANALYTICS_RETENTION_ACTION = "archive"
+    ANALYTICS_RETENTION_INTERVAL = 60 * 60
+    ANALYTICS_ARCHIVE_FOLDER_ROOT = str(_DB_PATH / "analyticsArchive")
+
+    # GeoIP Configuration
+    GEOIP_DB_ROOT = str(
+        Path(__file__).resolve().parent
+        / "static"
+        / "geoIP2database"
+        / "dbip-country-lite-2025-02.mmdb"
+    )
+    GEOIP_CACHE_SIZE = 50000
+    GEOIP_PREFIX_KEYS = False
+
+    # User Agent Configuration
+    USER_AGENT_CACHE_SIZE = 4096
 
     # SMTP Mail Configuration
     SMTP_SERVER = "smtp.gmail.com"
@@ -173,3 +275,46 @@ class Settings:
             "abi": json.loads((ABI_PATH / "TipJar.json").read_text()),
         },
     }
+
+    # Web3 Client Configuration
+    BLOCKCHAIN_TIMEOUT = 10
+    BLOCKCHAIN_POOL_CONNECTIONS = 4
+    BLOCKCHAIN_POOL_MAXSIZE = 16
+    BLOCKCHAIN_BATCH_SIZE = 200
+    BLOCKCHAIN_ASYNC_CONCURRENCY = 16
+    BLOCKCHAIN_CALL_TIMEOUT = 5
+    BLOCKCHAIN_CALL_RETRIES = 2
+    BLOCKCHAIN_RETRY_BACKOFF = 0.2
+
+    # RPC Resilience Configuration
+    RPC_BREAKER_FAILURE_THRESHOLD = 5
+    RPC_BREAKER_RESET_TIMEOUT = 30
+    RPC_STALE_MAX_AGE = 10
+    RPC_STALE_MAX_ENTRIES = 512
+    RPC_REFRESH_WORKERS = 2
+    RPC_CALL_BUDGET = 100
+    RPC_CALL_BUDGETS = {
+        "post.comment_tree": 400,
+        "adminPanelPosts.adminPanelPosts": 400,
+        "adminPanelUsers.adminPanelUsers": 1000,
+    }
+
+    # Post Indexer Configuration
+    POST_INDEXER = True
+    POST_INDEXER_POLL_INTERVAL = 15
+    POST_INDEXER_BLOCK_RANGE = 5000
+    POST_INDEXER_START_BLOCK = None
+
+    # Post Cache Configuration
+    POST_CACHE_MAX_ENTRIES = 1024
+    POST_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    POST_CACHE_TTL = 300
+
+    # Post Feed Configuration
+    POST_FEED_PAGE_SIZE = 24
+    POST_FEED_MAX_PAGE_SIZE = 100
+    POST_FEED_MAX_AGE = 15
+    POST_FEED_TTL = 30
+
+    # Post Banner Configuration
+    POST_BANNER_MAX_AGE = 24 * 60 * 60
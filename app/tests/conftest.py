@@ -0,0 +1,70 @@
+"""
+Shared fixtures for the test suite.
+
+Every test gets throwaway databases in ``tmp_path`` and, through the
+``chain`` fixture, a fresh ``LocalChain`` behind new RPC sessions and circuit
+breakers, so no test touches the network or the state of another test.
+
+Run from the ``app`` directory:
+
+    python -m pytest
+"""
+
+import tempfile
+
+import pytest
+from settings import Settings
+
+# utils.log builds the logger on import, so this has to run before the
+# test modules import anything from utils.
+Settings.TAMGA_LOGGER = False
+Settings.LOG_TO_FILE = False
+Settings.LOG_FOLDER_ROOT = tempfile.mkdtemp() + "/"
+Settings.LOG_FILE_ROOT = Settings.LOG_FOLDER_ROOT + "log.log"
+
+DATABASES = ("USERS", "POSTS", "COMMENTS", "ANALYTICS", "BLACKLIST")
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """Point every SQLite database at ``tmp_path`` and migrate them."""
+    from utils import dbWriter, migrations
+    from utils.postCache import postCache
+
+    monkeypatch.setattr(Settings, "POST_INDEXER", False)
+    monkeypatch.setattr(Settings, "ANALYTICS", False)
+    monkeypatch.setattr(Settings, "DB_FOLDER_ROOT", str(tmp_path))
+    for name in DATABASES:
+        monkeypatch.setattr(
+            Settings, f"DB_{name}_ROOT", str(tmp_path / f"{name.lower()}.db")
+        )
+    migrations.migrateAll()
+    postCache.clear()
+    yield tmp_path
+    dbWriter.stopWriters()
+    postCache.clear()
+
+
+@pytest.fixture
+def chain(databases, monkeypatch):
+    """
+    Return a ``LocalChain`` installed as ``Settings.BLOCKCHAIN_RPC_URL``.
+
+    Clients, contracts, breakers and cached reads of earlier tests are
+    dropped first, so ``breakerFor()`` is a new closed breaker.
+    """
+    from utils import rpcResilience, web3Client
+    from utils.localChain import LocalChain
+
+    monkeypatch.setattr(Settings, "BLOCKCHAIN_RPC_URL", Settings.BLOCKCHAIN_RPC_URL)
+    with web3Client._lock:
+        web3Client._sessions.clear()
+        web3Client._clients.clear()
+        web3Client._contracts.clear()
+    with rpcResilience._breakersLock:
+        rpcResilience._breakers.clear()
+    rpcResilience.rpcReads.clear()
+    localChain = LocalChain()
+    localChain.install()
+    yield localChain
+    rpcResilience.rpcReads.clear()
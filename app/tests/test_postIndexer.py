@@ -0,0 +1,144 @@
+import pytest
+import requests
+from settings import Settings
+from utils.postCache import postCache
+from utils.postIndexer import PostIndexer, getIndexedPost
+from utils.postRecord import PostRecord
+from utils.rpcResilience import IncompleteReadError
+
+AUTHOR = "0x" + "11" * 20
+
+
+def failBatches(chain, monkeypatch):
+    """Answer every item of a JSON-RPC batch with a non-revert error."""
+    handle = chain.handle
+
+    def failing(payload):
+        if isinstance(payload, list):
+            return [
+                {
+                    "jsonrpc": "2.0",
+                    "id": item.get("id"),
+                    "error": {"code": -32000, "message": "header not found"},
+                }
+                for item in payload
+            ]
+        return handle(payload)
+
+    monkeypatch.setattr(chain, "handle", failing)
+
+
+def seed(chain, posts=3):
+    return [
+        chain.createPost(AUTHOR, f"Post {index}|tag|Abstract|<p>body</p>|Technology")
+        for index in range(posts)
+    ]
+
+
+def test_bootstrapSnapshotsLivePostsAndDeletedOnes(chain):
+    seed(chain)
+    chain.deletePost(1)
+    indexer = PostIndexer()
+
+    assert indexer.syncOnce() == 0
+
+    assert getIndexedPost(0)[1].startswith("Post 0|")
+    assert getIndexedPost(0)[7] == "0-banner"
+    assert getIndexedPost(1) is False
+    assert getIndexedPost(2)[0] == chain.posts[2]["author"]
+    assert getIndexedPost(3) is None
+    assert indexer.lastBlock() == chain.blockNumber
+
+
+def test_syncAppliesNewEvents(chain):
+    seed(chain)
+    indexer = PostIndexer()
+    indexer.syncOnce()
+    invalidations = postCache.invalidations
+    for postID in (0, 1, 2):
+        postCache.set(postID, PostRecord.fromGetPost(postID, getIndexedPost(postID)))
+
+    newPost = chain.createPost(AUTHOR, "New post|tag|Abstract|<p>body</p>|Technology")
+    chain.setPostBlacklist(0, True)
+    chain.setBannerImage(0, "0-other")
+    chain.updateAuthorInfo(2, "Author info")
+    chain.deletePost(1)
+
+    # PostCreated and BannerImageSet for the new post, then one event each.
+    assert indexer.syncOnce() == 6
+
+    assert getIndexedPost(newPost)[1].startswith("New post|")
+    assert getIndexedPost(0)[5] is True
+    assert getIndexedPost(0)[7] == "0-other"
+    assert getIndexedPost(2)[3] == "Author info"
+    assert getIndexedPost(1) is False
+    assert indexer.lastBlock() == chain.blockNumber
+    assert postCache.invalidations - invalidations == 3
+    assert all(postCache.get(postID) is None for postID in (0, 1, 2))
+    assert indexer.syncOnce() == 0
+
+
+def test_replayFromStartBlockHandlesDeletedPosts(chain, monkeypatch):
+    monkeypatch.setattr(Settings, "POST_INDEXER_START_BLOCK", 1)
+    monkeypatch.setattr(Settings, "POST_INDEXER_BLOCK_RANGE", 2)
+    seed(chain)
+    chain.deletePost(1)
+    indexer = PostIndexer()
+
+    assert indexer.syncOnce() == 7
+
+    # getPost reverts for the deleted post, so PostCreated falls back to the
+    # event arguments before PostDeleted marks it.
+    assert getIndexedPost(0)[1].startswith("Post 0|")
+    assert getIndexedPost(1) is False
+    assert getIndexedPost(2)[1].startswith("Post 2|")
+    assert indexer.lastBlock() == chain.blockNumber
+
+
+def test_failedSyncWritesNothingAndIsRetried(chain):
+    seed(chain)
+    indexer = PostIndexer()
+    indexer.syncOnce()
+    lastBlock = indexer.lastBlock()
+    newPost = chain.createPost(AUTHOR, "New post|tag|Abstract|<p>body</p>|Technology")
+
+    chain.injectFaults(errorRate=1.0)
+    with pytest.raises(requests.HTTPError):
+        indexer.syncOnce()
+    chain.injectFaults()
+
+    assert indexer.lastBlock() == lastBlock
+    assert getIndexedPost(newPost) is None
+    assert indexer.syncOnce() == 2
+    assert getIndexedPost(newPost)[1].startswith("New post|")
+
+
+def test_failedPostFetchWritesNothing(chain, monkeypatch):
+    seed(chain)
+    indexer = PostIndexer()
+    indexer.syncOnce()
+    lastBlock = indexer.lastBlock()
+    newPost = chain.createPost(AUTHOR, "New post|tag|Abstract|<p>body</p>|Technology")
+    chain.deletePost(0)
+
+    with monkeypatch.context() as patch:
+        failBatches(chain, patch)
+        with pytest.raises(IncompleteReadError):
+            indexer.syncOnce()
+
+    assert indexer.lastBlock() == lastBlock
+    assert getIndexedPost(newPost) is None
+    assert getIndexedPost(0)[4] is True
+    assert indexer.syncOnce() == 3
+    assert getIndexedPost(0) is False
+
+
+def test_failedBootstrapWritesNothing(chain, monkeypatch):
+    seed(chain)
+    with monkeypatch.context() as patch:
+        failBatches(chain, patch)
+        with pytest.raises(IncompleteReadError):
+            PostIndexer().syncOnce()
+
+    assert PostIndexer().lastBlock() is None
+    assert getIndexedPost(0) is None
@@ -0,0 +1,184 @@
+import time
+
+import pytest
+import requests
+from settings import Settings
+from utils import rpcResilience
+from utils.rpcResilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    IncompleteReadError,
+    breakerFor,
+    rpcReads,
+)
+from utils.web3Client import batchCall, getWeb3, readMapping
+
+AUTHOR = "0x" + "22" * 20
+
+
+def seed(chain, posts=4):
+    for index in range(posts):
+        chain.createPost(AUTHOR, f"Post {index}|tag|Abstract|<p>body</p>|Technology")
+
+
+def waitFor(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_breakerOpensAfterConsecutiveFailures():
+    breaker = CircuitBreaker("test", failureThreshold=3, resetTimeout=60)
+    breaker.recordFailure()
+    breaker.recordFailure()
+    breaker.recordSuccess()
+    breaker.recordFailure()
+    breaker.recordFailure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.recordFailure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.rejected == 1
+
+
+def test_breakerLetsOneProbeThroughAfterTheResetTimeout():
+    breaker = CircuitBreaker("test", failureThreshold=1, resetTimeout=60)
+    breaker.recordFailure()
+    breaker.openedAt -= 60
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.recordFailure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow()
+
+    breaker.openedAt -= 60
+    assert breaker.allow()
+    breaker.recordSuccess()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_deadEndpointTripsTheBreakerAndStopsSendingRequests(chain):
+    breaker = breakerFor()
+    w3 = getWeb3()
+    chain.injectFaults(down=True)
+    for _ in range(breaker.failureThreshold):
+        with pytest.raises(requests.ConnectionError):
+            w3.eth.get_block_number()
+    sent = chain.httpRequests
+
+    with pytest.raises(CircuitOpenError):
+        w3.eth.get_block_number()
+
+    assert chain.httpRequests == sent
+    assert (
+        rpcResilience.stats()["breakers"][Settings.BLOCKCHAIN_RPC_URL]["state"]
+        == "open"
+    )
+
+    chain.injectFaults()
+    breaker.openedAt -= breaker.resetTimeout
+    assert w3.eth.block_number == chain.blockNumber
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_serverErrorsCountAsFailures(chain):
+    breaker = breakerFor()
+    chain.injectFaults(errorRate=1.0)
+    for _ in range(breaker.failureThreshold):
+        with pytest.raises(requests.HTTPError):
+            getWeb3().eth.get_block_number()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        batchCall("PostStorage", "getPost", [(0,)])
+
+
+def test_batchCallPacksCallsIntoOneRequest(chain):
+    seed(chain)
+    sent = chain.httpRequests
+
+    posts = batchCall("PostStorage", "getPost", [(i,) for i in range(4)])
+
+    assert chain.httpRequests - sent == 1
+    assert [post[1].split("|")[0] for post in posts] == [f"Post {i}" for i in range(4)]
+
+
+def test_batchCallFallsBackToSequentialCalls(chain):
+    seed(chain)
+    chain.deletePost(2)
+    chain.injectFaults(batchLimit=0)
+    calls = chain.calls["eth_call"]
+
+    posts = batchCall("PostStorage", "getPost", [(i,) for i in range(4)], strict=True)
+
+    assert chain.calls["eth_call"] - calls == 4
+    assert posts[2] is None
+    assert [post[1].split("|")[0] for post in posts if post] == [
+        "Post 0",
+        "Post 1",
+        "Post 3",
+    ]
+
+
+def test_batchCallTellsRevertsFromFailures(chain):
+    seed(chain)
+    chain.deletePost(1)
+
+    posts = batchCall("PostStorage", "getPost", [(0,), (1,)], strict=True)
+    assert posts[0] is not None and posts[1] is None
+
+    chain.injectFaults(callErrorRate=1.0)
+    assert batchCall("PostStorage", "getPost", [(0,), (1,)]) == [None, None]
+    with pytest.raises(IncompleteReadError):
+        batchCall("PostStorage", "getPost", [(0,), (1,)], strict=True)
+
+    chain.injectFaults(callErrorRate=1.0, batchLimit=0)
+    with pytest.raises(IncompleteReadError):
+        batchCall("PostStorage", "getPost", [(0,), (1,)], strict=True)
+
+
+def test_readMappingKeepsOnlyCompleteReads(chain):
+    seed(chain)
+    # With this seed the nextPostId call succeeds and some entries fail.
+    chain.random.seed(0)
+    chain.injectFaults(callErrorRate=0.5)
+
+    with pytest.raises(IncompleteReadError):
+        readMapping("PostStorage", "posts", "nextPostId")
+
+    chain.injectFaults()
+    entries = readMapping("PostStorage", "posts", "nextPostId")
+    assert [postID for postID, _ in entries] == [0, 1, 2, 3]
+    assert entries[3][1][1].startswith("Post 3|")
+
+
+def test_readMappingServesTheLastGoodReadWhileTheEndpointIsDown(chain, monkeypatch):
+    seed(chain)
+    entries = readMapping("PostStorage", "posts", "nextPostId")
+    chain.createPost(AUTHOR, "Post 4|tag|Abstract|<p>body</p>|Technology")
+
+    sent = chain.httpRequests
+    assert readMapping("PostStorage", "posts", "nextPostId") == entries
+    assert chain.httpRequests == sent
+
+    monkeypatch.setattr(rpcReads, "maxAge", 0)
+    chain.injectFaults(down=True)
+    failures = rpcReads.refreshFailures
+    assert readMapping("PostStorage", "posts", "nextPostId") == entries
+    waitFor(lambda: rpcReads.refreshFailures > failures)
+
+    chain.injectFaults()
+    refreshes = rpcReads.refreshes
+    readMapping("PostStorage", "posts", "nextPostId")
+    waitFor(lambda: rpcReads.refreshes > refreshes)
+    assert len(readMapping("PostStorage", "posts", "nextPostId")) == 5
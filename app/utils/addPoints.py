@@ -1,6 +1,5 @@
-import sqlite3
-
 from settings import Settings
+from utils.dbWriter import write
 from utils.log import Log
 
 
@@ -8,13 +7,11 @@ def addPoints(points, user):
     """
     Adds the specified number of points to the user with the specified username.
     """
-    Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-    connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-    connection.set_trace_callback(Log.database)
-    cursor = connection.cursor()
-    cursor.execute(
-        """update users set points = points+? where userName = ? """,
-        [(points), (user)],
+    write(
+        Settings.DB_USERS_ROOT,
+        lambda cursor: cursor.execute(
+            """update users set points = points+? where userName = ? """,
+            [(points), (user)],
+        ),
     )
-    connection.commit()
     Log.info(f'{points} points added to "{user}"')
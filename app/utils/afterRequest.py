@@ -1,52 +1,15 @@
-import os
-import sqlite3
 import time
 
 from flask import request, session
-from geoip2 import database, errors
-from user_agents import parse
 
+from utils.analyticsIngest import analyticsIngest
+from utils.geoIP import geoIP
 from utils.log import Log
+from utils.userAgent import classify
+from utils import rpcTrace
+from utils.web3Client import requestStats
 from settings import Settings
 
-_reader = None
-
-
-def _get_reader():
-    global _reader
-    if _reader is None:
-        db_path = os.path.join(
-            Settings.APP_ROOT_PATH, "static", "geoIP2database", "dbip-country-lite-2025-02.mmdb"
-        )
-        if os.path.exists(db_path):
-            try:
-                _reader = database.Reader(db_path)
-            except Exception as exc:  # pragma: no cover - defensive
-                Log.error(f"GeoIP load failed: {exc}")
-                _reader = None
-        else:
-            _reader = None
-    return _reader
-
-
-def _lookup_geo(ip: str) -> tuple[str, str]:
-    """Return (country, continent) for ``ip``.
-
-    If lookup fails or database missing, returns ("Unknown", "Unknown").
-    """
-
-    reader = _get_reader()
-    if not reader:
-        return "Unknown", "Unknown"
-    try:
-        resp = reader.country(ip)
-        return resp.country.name or "Unknown", resp.continent.name or "Unknown"
-    except errors.AddressNotFoundError:
-        return "Unknown", "Unknown"
-    except Exception as exc:  # pragma: no cover - defensive
-        Log.error(f"GeoIP lookup failed: {exc}")
-        return "Unknown", "Unknown"
-
 
 def afterRequestLogger(response):
     """
@@ -71,58 +34,43 @@ def afterRequestLogger(response):
     else:
         Log.info(message)
 
+    rpc = requestStats()
+    trace = rpcTrace.finishRequest()
+    if trace:
+        response.headers["Server-Timing"] = rpcTrace.serverTiming(trace)
+    if rpc["rpcRequests"] or trace:
+        message = (
+            f"RPC requests: {rpc['rpcRequests']} | New connections: {rpc['newConnections']} | "
+            f"Reuse ratio: {rpc['reuseRatio']}"
+        )
+        if trace:
+            message += (
+                f" | RPC calls: {trace['calls']} | RPC time: {trace['ms']} ms | "
+                f"RPC bytes: {trace['bytes']} | Top calls: {trace['functions']}"
+            )
+        Log.info(message)
+
     ip = request.remote_addr or "Unknown"
-    country, continent = _lookup_geo(ip)
+    country, continent = geoIP.lookup(ip)
     user = session.get("walletAddress")
     time_stamp = int(time.time())
-    try:
-        os_name = parse(request.user_agent.string).os.family
-    except Exception:  # pragma: no cover - best effort
-        os_name = "Unknown"
-
-    try:
-        with sqlite3.connect(Settings.DB_ANALYTICS_ROOT) as conn:
-            conn.execute(
-                """
-                create table if not exists userActivity(
-                    id integer primary key autoincrement,
-                    ip text,
-                    path text,
-                    method text,
-                    country text,
-                    userName text,
-                    timeStamp integer
-                )
-                """
-            )
-            conn.execute(
-                "insert into userActivity(ip, path, method, country, userName, timeStamp) values (?, ?, ?, ?, ?, ?)",
-                (ip, request.path, request.method, country, user, time_stamp),
-            )
-
-            # Record post view in analytics
-            parts = request.path.strip("/").split("/")
-            if (
-                Settings.ANALYTICS
-                and request.method == "GET"
-                and len(parts) == 2
-                and parts[0] == "post"
-            ):
-                post_id_str = parts[1].split("-")[-1]
-                if post_id_str.isdigit():
-                    conn.execute(
-                        "insert into postsAnalytics(postID, visitorUserName, country, os, continent, timeStamp) values (?, ?, ?, ?, ?, ?)",
-                        (
-                            int(post_id_str),
-                            user,
-                            country,
-                            os_name,
-                            continent,
-                            time_stamp,
-                        ),
-                    )
-            conn.commit()
-    except Exception as exc:  # pragma: no cover - analytics is optional
-        Log.error(f"Failed to log user activity: {exc}")
+    os_name = classify(request.user_agent.string).os
+
+    visit = None
+    parts = request.path.strip("/").split("/")
+    if (
+        Settings.ANALYTICS
+        and request.method == "GET"
+        and len(parts) == 2
+        and parts[0] == "post"
+    ):
+        post_id_str = parts[1].split("-")[-1]
+        if post_id_str.isdigit():
+            visit = (int(post_id_str), user, country, os_name, continent, time_stamp)
+    activity = (ip, request.path, request.method, country, user, time_stamp)
+
+    # The response only queues the rows; the ingest flusher writes them in
+    # batches.
+    analyticsIngest.record(activity, visit)
 
     return response
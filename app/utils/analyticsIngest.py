@@ -0,0 +1,162 @@
+"""
+This module contains the batched ingestion of the per-request analytics rows.
+
+``afterRequestLogger`` only calls ``record``, which puts the request's
+``userActivity`` row, and its ``postsAnalytics`` row for post views, on a
+bounded queue. A flusher thread collects them until
+``Settings.ANALYTICS_INGEST_BATCH_SIZE`` events are waiting or
+``Settings.ANALYTICS_INGEST_FLUSH_MS`` passed since the first one, and writes
+the batch with ``executemany`` in one transaction of the analytics database
+writer (``utils.dbWriter``), together with the visits' traffic rollups
+(``utils.trafficRollups``).
+
+When the queue is full, ``Settings.ANALYTICS_INGEST_OVERFLOW`` decides:
+``"drop"`` discards the event at once, ``"block"`` waits up to
+``Settings.ANALYTICS_INGEST_BLOCK_TIMEOUT`` seconds for room and then drops
+it. Dropped events are counted. ``stop`` flushes everything still queued; it
+runs at interpreter exit before the database writers are stopped.
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+from settings import Settings
+from utils.dbWriter import write
+from utils.log import Log
+from utils.trafficRollups import recordVisits
+
+_STOP = object()
+
+
+class AnalyticsIngest:
+    """Bounded queue of analytics events and the thread flushing it in batches."""
+
+    def __init__(self, path=None):
+        self.path = path or Settings.DB_ANALYTICS_ROOT
+        self._queue = queue.Queue(maxsize=Settings.ANALYTICS_INGEST_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "flushed": 0,
+            "failed": 0,
+            "batches": 0,
+            "maxDepth": 0,
+            "flushMs": 0.0,
+            "maxFlushMs": 0.0,
+        }
+
+    def start(self):
+        """Start the flusher thread."""
+        self._thread = threading.Thread(
+            target=self.run, name="analyticsIngest", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def record(self, activity, visit=None):
+        """
+        Queues one request's analytics rows.
+
+        Args:
+            activity (tuple): ``(ip, path, method, country, userName, timeStamp)``.
+            visit (tuple | None): ``(postID, visitorUserName, country, os,
+                continent, timeStamp)`` for post views.
+
+        Returns:
+            bool: ``False`` if the event was dropped because the queue is full.
+        """
+        try:
+            if Settings.ANALYTICS_INGEST_OVERFLOW == "block":
+                self._queue.put(
+                    (activity, visit), timeout=Settings.ANALYTICS_INGEST_BLOCK_TIMEOUT
+                )
+            else:
+                self._queue.put_nowait((activity, visit))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+        depth = self._queue.qsize()
+        with self._lock:
+            self._stats["enqueued"] += 1
+            self._stats["maxDepth"] = max(self._stats["maxDepth"], depth)
+        return True
+
+    def run(self):
+        """Flush batches until ``stop`` is called, then flush what is left."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + Settings.ANALYTICS_INGEST_FLUSH_MS / 1000
+            while len(batch) < Settings.ANALYTICS_INGEST_BATCH_SIZE:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self.flush(batch)
+
+    def flush(self, batch):
+        """Write ``batch`` in one transaction of the analytics database writer."""
+        activities = [activity for activity, _ in batch]
+        visits = [visit for _, visit in batch if visit is not None]
+
+        def insert(cursor):
+            cursor.executemany(
+                "insert into userActivity(ip, path, method, country, userName, timeStamp) values (?, ?, ?, ?, ?, ?)",
+                activities,
+            )
+            if visits:
+                cursor.executemany(
+                    "insert into postsAnalytics(postID, visitorUserName, country, os, continent, timeStamp) values (?, ?, ?, ?, ?, ?)",
+                    visits,
+                )
+                recordVisits(cursor, visits)
+
+        start = time.perf_counter()
+        try:
+            write(self.path, insert)
+            failed = False
+        except Exception as exc:
+            Log.error(f"Analytics: flushing {len(batch)} events failed: {exc}")
+            failed = True
+        ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._stats["failed" if failed else "flushed"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["flushMs"] += ms
+            self._stats["maxFlushMs"] = max(self._stats["maxFlushMs"], ms)
+
+    def stop(self):
+        """Flush the queued events and stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._stats)
+        return {
+            **counters,
+            "depth": self._queue.qsize(),
+            "queueSize": self._queue.maxsize,
+            "overflow": Settings.ANALYTICS_INGEST_OVERFLOW,
+            "flushMs": round(counters["flushMs"] / (counters["batches"] or 1), 3),
+            "maxFlushMs": round(counters["maxFlushMs"], 3),
+        }
+
+
+analyticsIngest = AnalyticsIngest().start()
+atexit.register(analyticsIngest.stop)
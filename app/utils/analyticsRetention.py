@@ -0,0 +1,331 @@
+"""
+This module contains the retention policy of the raw analytics rows.
+
+``postsAnalytics`` and ``userActivity`` get one row per request. Rows older
+than ``Settings.ANALYTICS_RETENTION_DAYS`` days, counted from the start of the
+current UTC day, are removed from ``analytics.db`` one UTC day at a time:
+
+1. With ``Settings.ANALYTICS_RETENTION_ACTION`` ``"archive"`` the day's rows
+   are copied, ids included, into the monthly partition file
+   ``analytics-YYYY-MM.db`` in ``Settings.ANALYTICS_ARCHIVE_FOLDER_ROOT``.
+   With ``"drop"`` they are not kept.
+2. One write job of the analytics database writer adds the day's visits to
+   ``postsAnalyticsCompacted``, visits and time spent per post, country and
+   operating system, and deletes the day's raw rows.
+
+The traffic rollups (``utils.trafficRollups``) already hold the visits per
+time bucket, so nothing is lost for the charts; minute rollups older than the
+cutoff are dropped with the raw rows, as charts that old read hours or days.
+The country, operating system and reader queries add
+``postsAnalyticsCompacted`` to the live rows, and the visit totals add the
+``archivedVisits`` counters, so they cover the archived partitions too.
+
+The copy is idempotent and the compaction deletes the rows it compacts in the
+same transaction, so an interrupted or concurrent run does not count a visit
+twice. ``RetentionWorker`` applies the policy every
+``Settings.ANALYTICS_RETENTION_INTERVAL`` seconds. From the ``app`` directory:
+
+    python -m utils.analyticsRetention            # show live and archived rows
+    python -m utils.analyticsRetention --enforce  # apply the policy now
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import threading
+import time
+
+from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
+from utils.log import Log
+
+DAY = 24 * 60 * 60
+
+# Raw table -> columns copied into the partitions
+ARCHIVED_COLUMNS = {
+    "postsAnalytics": (
+        "id",
+        "postID",
+        "visitorUserName",
+        "country",
+        "os",
+        "continent",
+        "timeSpendDuration",
+        "timeStamp",
+    ),
+    "userActivity": (
+        "id",
+        "ip",
+        "path",
+        "method",
+        "country",
+        "userName",
+        "timeStamp",
+    ),
+}
+
+ARCHIVE_TABLES = [
+    """
+    create table if not exists postsAnalytics(
+        "id" integer primary key,
+        "postID" integer,
+        "visitorUserName" text,
+        "country" text,
+        "os" text,
+        "continent" text,
+        "timeSpendDuration" int default 0,
+        "timeStamp" integer
+    )""",
+    """
+    create table if not exists userActivity(
+        "id" integer primary key,
+        "ip" text,
+        "path" text,
+        "method" text,
+        "country" text,
+        "userName" text,
+        "timeStamp" integer
+    )""",
+]
+
+_lock = threading.Lock()
+_stats = {
+    "runs": 0,
+    "days": 0,
+    "archivedRows": 0,
+    "compactedVisits": 0,
+    "deletedRows": 0,
+    "lastRun": None,
+    "lastRunMs": 0.0,
+}
+
+
+def cutoff(now=None):
+    """Return the Unix time raw rows older than are removed, at a UTC day start."""
+    now = int(time.time() if now is None else now)
+    today = now - now % DAY
+    return today - Settings.ANALYTICS_RETENTION_DAYS * DAY
+
+
+def archivePath(timeStamp):
+    """Return the partition file holding the rows of ``timeStamp``'s UTC month."""
+    month = time.strftime("%Y-%m", time.gmtime(timeStamp))
+    return os.path.join(Settings.ANALYTICS_ARCHIVE_FOLDER_ROOT, f"analytics-{month}.db")
+
+
+def archives():
+    """Return the partition files, oldest first."""
+    return sorted(
+        glob.glob(
+            os.path.join(Settings.ANALYTICS_ARCHIVE_FOLDER_ROOT, "analytics-*.db")
+        )
+    )
+
+
+def oldestRow():
+    """Return the ``timeStamp`` of the oldest raw row, ``None`` if there is none."""
+    connection = getConnection(Settings.DB_ANALYTICS_ROOT)
+    row = connection.execute(
+        """select min(timeStamp) from (
+        select min(timeStamp) as timeStamp from postsAnalytics
+        union all select min(timeStamp) from userActivity)"""
+    ).fetchone()
+    connection.close()
+    return row[0]
+
+
+def archiveDay(start, end):
+    """Copy the raw rows of ``[start, end)`` into their partition; return the row count."""
+    os.makedirs(Settings.ANALYTICS_ARCHIVE_FOLDER_ROOT, exist_ok=True)
+    source = getConnection(Settings.DB_ANALYTICS_ROOT)
+    # Partitions are cold files written once a day; they are not pooled.
+    archive = sqlite3.connect(archivePath(start))
+    copied = 0
+    try:
+        for statement in ARCHIVE_TABLES:
+            archive.execute(statement)
+        for table, columns in ARCHIVED_COLUMNS.items():
+            names = ", ".join(columns)
+            rows = source.execute(
+                f"select {names} from {table} where timeStamp >= ? and timeStamp < ?",
+                (start, end),
+            ).fetchall()
+            archive.executemany(
+                f"insert or ignore into {table}({names}) values ({', '.join('?' * len(columns))})",
+                rows,
+            )
+            copied += len(rows)
+        archive.commit()
+    except Exception:
+        archive.rollback()
+        raise
+    finally:
+        source.close()
+        archive.close()
+    return copied
+
+
+def compactDay(start, end):
+    """
+    Compacts and deletes the raw rows of ``[start, end)`` in one write job.
+
+    Returns:
+        tuple: ``(compacted visits, deleted rows)``.
+    """
+
+    def compact(cursor):
+        visits = cursor.execute(
+            "select count(*) from postsAnalytics where timeStamp >= ? and timeStamp < ?",
+            (start, end),
+        ).fetchone()[0]
+        cursor.execute(
+            """insert into postsAnalyticsCompacted(postID, country, os, visits, timeSpendDuration)
+            select coalesce(postID, 0), coalesce(country, 'Unknown'), coalesce(os, 'Unknown'),
+            count(*), coalesce(sum(timeSpendDuration), 0)
+            from postsAnalytics where timeStamp >= ? and timeStamp < ?
+            group by 1, 2, 3
+            on conflict(postID, country, os) do update set
+            visits = visits + excluded.visits,
+            timeSpendDuration = timeSpendDuration + excluded.timeSpendDuration""",
+            (start, end),
+        )
+        deleted = 0
+        for table in ARCHIVED_COLUMNS:
+            deleted += cursor.execute(
+                f"delete from {table} where timeStamp >= ? and timeStamp < ?",
+                (start, end),
+            ).rowcount
+        cursor.execute("delete from trafficMinute where bucket < ?", (end,))
+        return visits, deleted
+
+    return write(Settings.DB_ANALYTICS_ROOT, compact)
+
+
+def enforce(now=None):
+    """
+    Applies the retention policy to every raw row older than ``cutoff(now)``.
+
+    Returns:
+        dict: Days processed, rows archived and raw rows deleted by this run.
+    """
+    if Settings.ANALYTICS_RETENTION_DAYS is None:
+        return {"days": 0, "archivedRows": 0, "compactedVisits": 0, "deletedRows": 0}
+    begin = time.perf_counter()
+    limit = cutoff(now)
+    days = archived = deleted = compacted = 0
+    while True:
+        oldest = oldestRow()
+        if oldest is None or oldest >= limit:
+            break
+        start = oldest - oldest % DAY
+        end = start + DAY
+        if Settings.ANALYTICS_RETENTION_ACTION == "archive":
+            archived += archiveDay(start, end)
+        visits, rows = compactDay(start, end)
+        compacted += visits
+        deleted += rows
+        days += 1
+    ms = (time.perf_counter() - begin) * 1000
+    with _lock:
+        _stats["runs"] += 1
+        _stats["days"] += days
+        _stats["archivedRows"] += archived
+        _stats["compactedVisits"] += compacted
+        _stats["deletedRows"] += deleted
+        _stats["lastRun"] = int(time.time())
+        _stats["lastRunMs"] = round(ms, 3)
+    if days:
+        Log.info(
+            f"Analytics retention: {days} days before {time.strftime('%Y-%m-%d', time.gmtime(limit))} "
+            f"compacted, {deleted} raw rows removed, {archived} archived"
+        )
+    return {
+        "days": days,
+        "archivedRows": archived,
+        "compactedVisits": compacted,
+        "deletedRows": deleted,
+    }
+
+
+class RetentionWorker:
+    """Background worker applying the analytics retention policy."""
+
+    def __init__(self, interval=None):
+        self.interval = interval or Settings.ANALYTICS_RETENTION_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """Apply the policy now and every ``interval`` seconds until ``stop`` is called."""
+        Log.info("Analytics retention: started")
+        while True:
+            try:
+                enforce()
+            except Exception as exc:
+                Log.error(f"Analytics retention: run failed: {exc}")
+            if self._stop.wait(self.interval):
+                break
+        Log.info("Analytics retention: stopped")
+
+    def start(self):
+        """Start the worker in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.run, name="analyticsRetention", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def stats():
+    """Return the counters of the retention runs of this process."""
+    with _lock:
+        return {
+            **_stats,
+            "retentionDays": Settings.ANALYTICS_RETENTION_DAYS,
+            "action": Settings.ANALYTICS_RETENTION_ACTION,
+            "partitions": len(archives()),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show or apply the analytics retention policy."
+    )
+    parser.add_argument(
+        "--enforce", action="store_true", help="apply the retention policy now"
+    )
+    args = parser.parse_args()
+    if args.enforce:
+        print(enforce())
+    connection = getConnection(Settings.DB_ANALYTICS_ROOT)
+    live, compacted = connection.execute(
+        """select (select count(*) from postsAnalytics),
+        (select coalesce(sum(visits), 0) from postsAnalyticsCompacted)"""
+    ).fetchone()
+    connection.close()
+    print(f"{Settings.DB_ANALYTICS_ROOT}: {live} live visits, {compacted} compacted")
+    for path in archives():
+        archive = sqlite3.connect(path)
+        counts = [
+            archive.execute(f"select count(*) from {table}").fetchone()[0]
+            for table in ARCHIVED_COLUMNS
+        ]
+        archive.close()
+        print(
+            f"{path}: "
+            + ", ".join(
+                f"{count} {table} rows"
+                for table, count in zip(ARCHIVED_COLUMNS, counts)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
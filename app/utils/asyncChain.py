@@ -0,0 +1,266 @@
+"""
+This module contains the asyncio chain reader used to fan out contract calls.
+
+Flask routes are synchronous, so ``concurrentCall`` hands the work to one
+background event loop thread and blocks until every call has finished. On the
+loop each call runs through an ``AsyncWeb3`` client with at most
+``Settings.BLOCKCHAIN_ASYNC_CONCURRENCY`` calls in flight, a per-call timeout
+and retries with jittered exponential backoff. Results keep the order of the
+arguments. Calls are reported to the endpoint's circuit breaker from
+``utils.rpcResilience`` and are not sent while it is open, and every attempt
+is added to the calling request's RPC trace.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from eth_utils import get_abi_output_types
+from settings import Settings
+from utils import rpcTrace
+from utils.log import Log
+from utils.rpcResilience import IncompleteReadError, breakerFor
+from utils.web3Client import decodeCallResult
+from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3.exceptions import ContractLogicError
+
+_lock = threading.Lock()
+_loop = None
+_clients = {}
+_contracts = {}
+_clientsLock = None
+_semaphore = None
+_stats = {"calls": 0, "retries": 0, "timeouts": 0, "reverts": 0, "failures": 0}
+
+
+def _count(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _getLoop():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="asyncChain", daemon=True
+            ).start()
+        return _loop
+
+
+async def _getWeb3(rpcUrl):
+    global _clientsLock
+    client = _clients.get(rpcUrl)
+    if client is not None:
+        return client
+    if _clientsLock is None:
+        _clientsLock = asyncio.Lock()
+    # Calls of the first wave all miss; only one of them builds the client.
+    async with _clientsLock:
+        client = _clients.get(rpcUrl)
+        if client is None:
+            provider = AsyncHTTPProvider(
+                rpcUrl, exception_retry_configuration=None, cache_allowed_requests=True
+            )
+            session = ClientSession(
+                connector=TCPConnector(limit=Settings.BLOCKCHAIN_POOL_MAXSIZE),
+                timeout=ClientTimeout(total=Settings.BLOCKCHAIN_TIMEOUT),
+            )
+            try:
+                await provider.cache_async_session(session)
+                client = AsyncWeb3(provider)
+                # Prime the eth_chainId cache before calls run concurrently,
+                # otherwise every call in the first wave requests it again.
+                await client.eth.chain_id
+            except BaseException:
+                await session.close()
+                raise
+            _clients[rpcUrl] = client
+    return client
+
+
+async def _getContract(name, rpcUrl):
+    info = Settings.BLOCKCHAIN_CONTRACTS[name]
+    key = (name, info["address"], rpcUrl)
+    contract = _contracts.get(key)
+    if contract is None:
+        w3 = await _getWeb3(rpcUrl)
+        contract = w3.eth.contract(address=info["address"], abi=info["abi"])
+        for stale in [k for k in _contracts if k[0] == name and k != key]:
+            del _contracts[stale]
+        _contracts[key] = contract
+    return contract
+
+
+async def callAsync(contract, functionName, args, trace=None, strict=False):
+    """
+    Calls a read-only contract function with bounded concurrency.
+
+    The call is retried ``Settings.BLOCKCHAIN_CALL_RETRIES`` times on timeouts
+    and transport errors, sleeping a random fraction of an exponentially
+    growing backoff in between. Reverts and replies that fail to decode are
+    not retried.
+
+    Args:
+        contract: ``AsyncContract`` to call.
+        functionName (str): View function to call.
+        args (tuple): Call arguments.
+        trace (list): Receives one ``utils.rpcTrace`` entry per attempt.
+        strict (bool): Raise instead of returning ``None`` when the call
+            keeps failing.
+
+    Returns:
+        The decoded result or ``None`` if the call reverted, kept failing or
+        its reply could not be decoded.
+
+    Raises:
+        CircuitOpenError: If the endpoint's circuit breaker is open.
+        IncompleteReadError: If ``strict`` and the call kept failing or its
+            reply could not be decoded.
+    """
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(Settings.BLOCKCHAIN_ASYNC_CONCURRENCY)
+    breaker = breakerFor(str(contract.w3.provider.endpoint_uri))
+    attempts = Settings.BLOCKCHAIN_CALL_RETRIES + 1
+    for attempt in range(attempts):
+        async with _semaphore:
+            breaker.check()
+            _count("calls")
+            started = time.perf_counter()
+            size = 0
+            failed = True
+            try:
+                data = await asyncio.wait_for(
+                    contract.w3.eth.call(
+                        {
+                            "to": contract.address,
+                            "data": contract.functions[functionName](
+                                *args
+                            )._encode_transaction_data(),
+                        }
+                    ),
+                    Settings.BLOCKCHAIN_CALL_TIMEOUT,
+                )
+                size = len(data)
+                failed = False
+                breaker.recordSuccess()
+            except ContractLogicError as exc:
+                failed = False
+                breaker.recordSuccess()
+                _count("reverts")
+                Log.warning(f"RPC: {functionName}{tuple(args)} reverted: {exc}")
+                return None
+            except asyncio.TimeoutError:
+                breaker.recordFailure()
+                _count("timeouts")
+                error = "timed out"
+            except Exception as exc:
+                breaker.recordFailure()
+                error = exc
+            finally:
+                if trace is not None:
+                    trace.append(
+                        rpcTrace.recordCall(
+                            _contractName(contract),
+                            functionName,
+                            time.perf_counter() - started,
+                            size,
+                            error=failed,
+                        )
+                    )
+        if not failed:
+            break
+        if attempt + 1 < attempts:
+            _count("retries")
+            await asyncio.sleep(
+                random.uniform(0, Settings.BLOCKCHAIN_RETRY_BACKOFF * 2**attempt)
+            )
+    else:
+        _count("failures")
+        message = (
+            f"{functionName}{tuple(args)} failed after {attempts} attempts: {error}"
+        )
+        Log.error(f"RPC: {message}")
+        if strict:
+            raise IncompleteReadError(message)
+        return None
+    # Decoded outside the retry loop: the endpoint answered, so a bad reply
+    # is neither retried nor reported to the breaker as a failure.
+    try:
+        return decodeCallResult(contract.w3, _outputTypes(contract, functionName), data)
+    except Exception as exc:
+        _count("failures")
+        message = f"decoding {functionName}{tuple(args)} failed: {exc}"
+        Log.error(f"RPC: {message}")
+        if strict:
+            raise IncompleteReadError(message) from exc
+        return None
+
+
+def _outputTypes(contract, functionName):
+    return get_abi_output_types(contract.get_function_by_name(functionName).abi)
+
+
+def _contractName(contract):
+    for name, info in Settings.BLOCKCHAIN_CONTRACTS.items():
+        if info["address"].lower() == contract.address.lower():
+            return name
+    return contract.address
+
+
+async def _gather(name, functionName, argsList, rpcUrl, trace, strict):
+    contract = await _getContract(name, rpcUrl)
+    return await asyncio.gather(
+        *(callAsync(contract, functionName, args, trace, strict) for args in argsList)
+    )
+
+
+def runSync(coroutine):
+    """Run ``coroutine`` on the background event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, _getLoop()).result()
+
+
+def concurrentCall(name, functionName, argsList, rpcUrl=None, strict=False):
+    """
+    Calls a read-only contract function for every argument tuple concurrently.
+
+    Args:
+        name (str): Contract name in ``Settings.BLOCKCHAIN_CONTRACTS``.
+        functionName (str): View function to call, e.g. ``"getComment"``.
+        argsList (list[tuple]): Arguments for each call.
+        rpcUrl (str): RPC endpoint, defaults to ``Settings.BLOCKCHAIN_RPC_URL``.
+        strict (bool): Raise if any call keeps failing, so only reverts give
+            ``None``; for reads cached as last known good.
+
+    Returns:
+        list: Results in the order of ``argsList``; ``None`` for every call
+        that reverted or failed.
+
+    Raises:
+        CircuitOpenError: If the endpoint's circuit breaker is open.
+        IncompleteReadError: If ``strict`` and a call kept failing or could
+            not be decoded.
+    """
+    rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+    argsList = [tuple(args) for args in argsList]
+    if not argsList:
+        return []
+    trace = []
+    try:
+        return runSync(_gather(name, functionName, argsList, rpcUrl, trace, strict))
+    finally:
+        rpcTrace.addEntries(trace)
+
+
+def stats():
+    """Return call, retry, timeout, revert and failure counters."""
+    with _lock:
+        return {
+            **_stats,
+            "concurrency": Settings.BLOCKCHAIN_ASYNC_CONCURRENCY,
+            "clients": len(_clients),
+        }
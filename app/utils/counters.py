@@ -0,0 +1,157 @@
+"""
+This module contains the aggregate counters kept current by SQLite triggers.
+
+The posts, comments and analytics databases each have a ``counters`` table of
+``(name, key, value)`` rows. Triggers on the counted tables update it on every
+insert and delete, and on updates of the counted columns, in the same
+transaction as the change, so the stats endpoints read a total with one
+primary key lookup instead of scanning the table:
+
+- ``posts`` (``key`` ``''``): number of posts.
+- ``authorViews`` (``key`` author): sum of the author's post ``views``.
+- ``comments`` (``key`` ``''``): number of comments.
+- ``postsAnalytics`` (``key`` ``''``): number of recorded visits.
+- ``postVisitors`` (``key`` postID): number of recorded visits of the post.
+- ``archivedVisits`` (``key`` ``''``): number of visits compacted out of
+  ``postsAnalytics`` by ``utils.analyticsRetention``.
+- ``archivedPostVisitors`` (``key`` postID): number of compacted visits of the
+  post.
+
+The visit totals are the sum of the live and the archived counters.
+
+The tables and triggers are created by ``utils.migrations``, which holds its
+own copy of their SQL and of the queries filling them. ``rebuild``
+recomputes the counters from the tables, e.g. after rows were changed with the
+triggers dropped; ``verify`` reports counters that drifted. From the ``app``
+directory:
+
+    python -m utils.counters            # report drift
+    python -m utils.counters --rebuild  # recompute every counter
+"""
+
+import argparse
+
+from settings import Settings
+from utils.db import getConnection
+from utils.log import Log
+
+# Database setting -> counter name -> query returning (key, value) rows
+COUNTERS = {
+    "DB_POSTS_ROOT": {
+        "posts": "select '', count(*) from posts",
+        "authorViews": "select author, coalesce(sum(views), 0) from posts group by author",
+    },
+    "DB_COMMENTS_ROOT": {
+        "comments": "select '', count(*) from comments",
+    },
+    "DB_ANALYTICS_ROOT": {
+        "postsAnalytics": "select '', count(*) from postsAnalytics",
+        "postVisitors": "select coalesce(postID, ''), count(*) from postsAnalytics group by postID",
+    },
+}
+
+# Counters of the compacted visits of utils.analyticsRetention, added by
+# analytics migration 5
+ARCHIVED_COUNTERS = {
+    "DB_ANALYTICS_ROOT": {
+        "archivedVisits": "select '', coalesce(sum(visits), 0) from postsAnalyticsCompacted",
+        "archivedPostVisitors": "select postID, sum(visits) from postsAnalyticsCompacted group by postID",
+    },
+}
+
+
+def counterQueries(setting):
+    """Return counter name -> query for every counter of ``setting``."""
+    return {**COUNTERS[setting], **ARCHIVED_COUNTERS.get(setting, {})}
+
+
+def rebuildCounters(cursor, setting):
+    """Recompute every counter of ``setting`` with ``cursor``, inside the caller's transaction."""
+    for name, query in counterQueries(setting).items():
+        cursor.execute("delete from counters where name = ?", (name,))
+        cursor.execute(
+            f"insert into counters(name, key, value) select ?, * from ({query})",
+            (name,),
+        )
+
+
+def counter(cursor, name, key="", schema="main"):
+    """
+    Returns one counter.
+
+    Args:
+        cursor: Cursor on the counter's database, or on the attached connection.
+        name (str): Counter name, e.g. ``"postVisitors"``.
+        key: Counter key, e.g. the post id; ``''`` for totals.
+        schema (str): Schema holding the ``counters`` table.
+
+    Returns:
+        int: The value, 0 if the counter has no row.
+    """
+    row = cursor.execute(
+        f"select value from {schema}.counters where name = ? and key = ?",
+        (name, str(key)),
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def verify(setting):
+    """Return ``(name, key, counted, actual)`` for every counter of ``setting`` that drifted."""
+    connection = getConnection(getattr(Settings, setting))
+    drift = []
+    for name, query in counterQueries(setting).items():
+        counted = dict(
+            connection.execute(
+                "select key, value from counters where name = ? and value != 0",
+                (name,),
+            ).fetchall()
+        )
+        actual = {
+            str(key): value
+            for key, value in connection.execute(query).fetchall()
+            if value != 0
+        }
+        for key in counted.keys() | actual.keys():
+            if counted.get(key, 0) != actual.get(key, 0):
+                drift.append((name, key, counted.get(key, 0), actual.get(key, 0)))
+    connection.close()
+    return drift
+
+
+def rebuild(setting):
+    """Recompute every counter of ``setting`` in one write transaction."""
+    path = getattr(Settings, setting)
+    connection = getConnection(path)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("begin immediate")
+        rebuildCounters(cursor, setting)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    Log.success(f'Counters: "{path}" rebuilt')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check or rebuild the aggregate counters."
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="recompute every counter"
+    )
+    args = parser.parse_args()
+    for setting in COUNTERS:
+        if args.rebuild:
+            rebuild(setting)
+        drift = verify(setting)
+        print(
+            f"{getattr(Settings, setting)}: "
+            + (f"{len(drift)} drifted counters {drift[:10]}" if drift else "in sync")
+        )
+
+
+if __name__ == "__main__":
+    main()
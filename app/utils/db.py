@@ -0,0 +1,302 @@
+"""
+This module contains the SQLite connection manager.
+
+``getConnection`` hands out one pooled connection per database and thread.
+A connection is opened once with a statement cache of
+``Settings.DB_STATEMENT_CACHE_SIZE`` prepared statements and reused by every
+later request served by the same thread, instead of opening and re-parsing on
+each call. ``close()`` on a pooled connection only returns it to the pool: an
+open transaction is rolled back and the row factory is reset. All connections
+borrowed during a request are returned on ``teardown_appcontext`` by
+``releaseConnections``. Within a request every caller on the thread shares the
+connection, so ``close()`` resets the row factory at once; callers set row
+factories on their cursors and leave other connection state unchanged.
+
+``getAttachedConnection`` returns a pooled connection with all five databases
+attached as the schemas ``users``, ``posts``, ``comments``, ``analytics`` and
+``blacklist``, so views spanning several stores run as one SQL query with
+joins. Writes go through each database's own writer in ``utils.dbWriter``;
+cascades spanning several databases run on this connection through
+``utils.dbWriter.writeAttached`` while those writers are held.
+
+Every new connection gets the PRAGMA profile in ``Settings.DB_PRAGMAS``
+(WAL journaling, ``synchronous=NORMAL``, a busy timeout, memory mapping and
+a larger page cache) so the per-request analytics writes no longer block the
+readers. ``Checkpointer`` runs a passive WAL checkpoint on every database
+every ``Settings.DB_CHECKPOINT_INTERVAL`` seconds so the WAL files stay small
+between SQLite's own automatic checkpoints.
+
+Statements run on ``utils.sqlTrace.TracedCursor`` cursors unless
+``Settings.DB_TRACE_MODE`` is ``off``; see ``utils.sqlTrace`` for the sampled
+and slow-only modes.
+"""
+
+import sqlite3
+import threading
+import weakref
+
+from flask import g, has_app_context
+from settings import Settings
+from utils import sqlTrace
+from utils.log import Log
+
+_local = threading.local()
+_lock = threading.Lock()
+_stats = {"opened": 0, "closed": 0, "borrows": 0, "reuses": 0}
+_open = {}
+_borrowed = {}
+_checkpoints = {}
+
+
+def databases():
+    """Return the paths of the app's SQLite databases."""
+    return [
+        Settings.DB_USERS_ROOT,
+        Settings.DB_POSTS_ROOT,
+        Settings.DB_COMMENTS_ROOT,
+        Settings.DB_ANALYTICS_ROOT,
+        Settings.DB_BLACKLIST_ROOT,
+    ]
+
+
+ATTACHED = ":attached:"
+
+
+def attachedSchemas():
+    """Return the schema name and path of every database attached by ``ATTACHED``."""
+    return {
+        "users": Settings.DB_USERS_ROOT,
+        "posts": Settings.DB_POSTS_ROOT,
+        "comments": Settings.DB_COMMENTS_ROOT,
+        "analytics": Settings.DB_ANALYTICS_ROOT,
+        "blacklist": Settings.DB_BLACKLIST_ROOT,
+    }
+
+
+def applyPragmas(connection, pragmas=None, schema=None):
+    """
+    Applies a PRAGMA profile to ``connection``.
+
+    Parameters:
+        connection (sqlite3.Connection): Connection to configure.
+        pragmas (dict): PRAGMA names and values, defaults to ``Settings.DB_PRAGMAS``.
+        schema (str): Attached schema to apply them to, defaults to ``main``.
+
+    Returns:
+        dict: The value SQLite reports for each PRAGMA after setting it.
+    """
+    applied = {}
+    prefix = f"{schema}." if schema else ""
+    for name, value in (Settings.DB_PRAGMAS if pragmas is None else pragmas).items():
+        row = connection.execute(f"pragma {prefix}{name} = {value}").fetchone()
+        if row is None:
+            row = connection.execute(f"pragma {prefix}{name}").fetchone()
+        applied[name] = row[0] if row else None
+    return applied
+
+
+class PooledConnection(sqlite3.Connection):
+    """``sqlite3.Connection`` whose ``close`` returns it to the pool."""
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = sqlTrace.TracedCursor if sqlTrace.enabled() else sqlite3.Cursor
+        return super().cursor(factory)
+
+    # sqlite3 creates the cursors of these shortcuts without calling ``cursor``.
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters, /):
+        return self.cursor().executemany(sql, parameters)
+
+    def close(self):
+        # The next caller on this thread must not inherit a row factory. Set
+        # factories on cursors instead; they keep theirs after this reset.
+        self.row_factory = None
+        # Inside a request other callers may still hold this connection; it is
+        # released on teardown instead.
+        if not has_app_context():
+            release(self)
+
+    def closePhysically(self):
+        """Close the underlying SQLite connection."""
+        release(self)
+        super().close()
+        self.finalizer()
+
+
+def _count(counters, path, delta):
+    with _lock:
+        counters[path] = counters.get(path, 0) + delta
+
+
+def _closed(path):
+    _count(_open, path, -1)
+    with _lock:
+        _stats["closed"] += 1
+
+
+def _openConnection(path):
+    Log.database(f"Connecting to '{path}' database")
+    connection = sqlite3.connect(
+        ":memory:" if path == ATTACHED else path,
+        factory=PooledConnection,
+        cached_statements=Settings.DB_STATEMENT_CACHE_SIZE,
+    )
+    applyPragmas(connection)
+    if path == ATTACHED:
+        for schema, file in attachedSchemas().items():
+            connection.execute(f"attach database ? as {schema}", (file,))
+            applyPragmas(connection, schema=schema)
+    connection.dbPath = path
+    connection.borrowed = False
+    # Threads of the server pool come and go; count their connections closed
+    # when the thread's pool is collected.
+    connection.finalizer = weakref.finalize(connection, _closed, path)
+    _count(_open, path, 1)
+    with _lock:
+        _stats["opened"] += 1
+    return connection
+
+
+def getConnection(path):
+    """
+    Returns the calling thread's pooled connection to the database at ``path``.
+
+    Parameters:
+        path (str): Database file, one of the ``Settings.DB_*_ROOT`` paths.
+
+    Returns:
+        PooledConnection: The connection; it is returned to the pool on
+        ``close()`` or at the end of the request.
+    """
+    pool = getattr(_local, "connections", None)
+    if pool is None:
+        pool = _local.connections = {}
+    connection = pool.get(path)
+    if connection is None:
+        connection = pool[path] = _openConnection(path)
+    else:
+        with _lock:
+            _stats["reuses"] += 1
+    if not connection.borrowed:
+        connection.borrowed = True
+        _count(_borrowed, path, 1)
+        with _lock:
+            _stats["borrows"] += 1
+    if has_app_context():
+        g.setdefault("dbConnections", set()).add(path)
+    return connection
+
+
+def getAttachedConnection():
+    """
+    Returns the calling thread's pooled connection with every database attached.
+
+    Tables must be qualified with their schema, e.g. ``posts.posts`` or
+    ``analytics.postsAnalytics``; see ``attachedSchemas``.
+    """
+    return getConnection(ATTACHED)
+
+
+def release(connection):
+    """Return ``connection`` to the pool, rolling back any open transaction."""
+    if not connection.borrowed:
+        return
+    try:
+        if connection.in_transaction:
+            Log.warning(
+                f"Rolling back uncommitted transaction on '{connection.dbPath}'"
+            )
+            connection.rollback()
+    except sqlite3.ProgrammingError:
+        pass
+    connection.row_factory = None
+    connection.borrowed = False
+    _count(_borrowed, connection.dbPath, -1)
+
+
+def releaseConnections(exception=None):
+    """Return every connection borrowed by the current request to the pool."""
+    pool = getattr(_local, "connections", {})
+    for path in g.pop("dbConnections", ()):
+        connection = pool.get(path)
+        if connection is not None:
+            release(connection)
+
+
+def closeConnections():
+    """Close the calling thread's pooled connections."""
+    for connection in getattr(_local, "connections", {}).values():
+        connection.closePhysically()
+    _local.connections = {}
+
+
+def checkpoint(path, mode="PASSIVE"):
+    """
+    Runs a WAL checkpoint on the database at ``path``.
+
+    Returns:
+        tuple: ``(busy, walPages, checkpointedPages)`` as reported by SQLite.
+    """
+    connection = getConnection(path)
+    try:
+        result = tuple(connection.execute(f"pragma wal_checkpoint({mode})").fetchone())
+    finally:
+        connection.close()
+    with _lock:
+        counters = _checkpoints.setdefault(path, {"runs": 0, "busy": 0})
+        counters["runs"] += 1
+        counters["busy"] += bool(result[0])
+        counters["walPages"] = result[1]
+        counters["checkpointedPages"] = result[2]
+    return result
+
+
+class Checkpointer:
+    """Background worker checkpointing the WAL of every database."""
+
+    def __init__(self, interval=None):
+        self.interval = interval or Settings.DB_CHECKPOINT_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """Checkpoint every database until ``stop`` is called."""
+        Log.info("Checkpointer: started")
+        while not self._stop.wait(self.interval):
+            for path in databases():
+                try:
+                    checkpoint(path)
+                except sqlite3.Error as exc:
+                    Log.error(f"Checkpointer: checkpointing '{path}' failed: {exc}")
+        Log.info("Checkpointer: stopped")
+
+    def start(self):
+        """Start the checkpointer in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.run, name="dbCheckpointer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def stats():
+    """Return pool counters: open and borrowed connections per database."""
+    with _lock:
+        return {
+            **_stats,
+            "open": {path: count for path, count in _open.items() if count},
+            "borrowed": {path: count for path, count in _borrowed.items() if count},
+            "statementCacheSize": Settings.DB_STATEMENT_CACHE_SIZE,
+            "pragmas": Settings.DB_PRAGMAS,
+            "checkpoints": {
+                path: dict(counters) for path, counters in _checkpoints.items()
+            },
+        }
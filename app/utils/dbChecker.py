@@ -6,17 +6,17 @@ The database consists of three tables:
 2. Posts: stores information about the posts, including their title, tags, content, author, date, time, views, last edit date, and last edit time.
 3. Comments: stores information about the comments, including the post they are associated with, the comment text, the user who wrote the comment, the date, and the time.
 
-This file contains functions to create the tables if they do not already exist, and to ensure that they have the correct structure.
+This file contains functions to create the databases if they do not already exist and bring their schemas up to date with ``utils.migrations``.
 """
 
-import sqlite3
 from os import mkdir
 from os.path import exists
 
-from passlib.hash import sha512_crypt as encryption
 from settings import Settings
+from utils.db import applyPragmas, databases, getConnection
 from utils.log import Log
-from utils.time import currentTimeStamp
+from utils.migrations import migrate
+from utils.trafficRollups import ROLLUPS
 
 
 def dbFolder():
@@ -37,369 +37,199 @@ def dbFolder():
         Log.success(f'Database folder: "/{Settings.DB_FOLDER_ROOT}" created')
 
 
+def _databaseFile(name, path):
+    """Create the database file at ``path`` if it does not exist."""
+
+    if exists(path):
+        Log.info(f'{name} database: "{path}" found')
+    else:
+        Log.error(f'{name} database: "{path}" not found')
+
+        open(path, "x")
+
+        Log.success(f'{name} database: "{path}" created')
+
+
 def usersTable():
     """
-    Checks if the users' table exists in the database, and create it if it does not.
-    Checks if default admin is true create an admin user with custom admin account settings if it is.
+    Checks if the users database exists, creates it if it does not and applies
+    its pending migrations. The first migration adds the default admin if
+    ``Settings.DEFAULT_ADMIN`` is true.
 
     Returns:
         None
     """
 
-    if exists(Settings.DB_USERS_ROOT):
-        Log.info(f'Users database: "{Settings.DB_USERS_ROOT}" found')
-    else:
-        Log.error(f'Users database: "{Settings.DB_USERS_ROOT}" not found')
+    _databaseFile("Users", Settings.DB_USERS_ROOT)
+    migrate("DB_USERS_ROOT")
 
-        open(Settings.DB_USERS_ROOT, "x")
 
-        Log.success(f'Users database: "{Settings.DB_USERS_ROOT}" created')
-    Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-    connection.set_trace_callback(Log.database)
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""select userID from users; """).fetchall()
-
-        Log.info(f'Table: "users" found in "{Settings.DB_USERS_ROOT}"')
+def postsTable():
+    """
+    Checks if the posts database exists, creates it if it does not and applies
+    its pending migrations.
 
-        connection.close()
-    except Exception:
-        Log.error(f'Table: "users" not found in "{Settings.DB_USERS_ROOT}"')
-
-        usersTable = """
-        create table if not exists Users(
-            "userID"    integer not null unique,
-            "userName"  text unique,
-            "email" text unique,
-            "password"  text,
-            "profilePicture" text,
-            "role"  text,
-            "points"    integer,
-            "timeStamp" integer,
-            "isVerified"    text,
-            primary key("userID" autoincrement)
-        );"""
-
-        cursor.execute(usersTable)
-
-        if Settings.DEFAULT_ADMIN:
-            password = encryption.hash(Settings.DEFAULT_ADMIN_PASSWORD)
-
-            cursor.execute(
-                """
-                insert into Users(userName,email,password,profilePicture,role,points,timeStamp,isVerified) \
-                values(?,?,?,?,?,?,?,?)
-                """,
-                (
-                    Settings.DEFAULT_ADMIN_USERNAME,
-                    Settings.DEFAULT_ADMIN_EMAIL,
-                    password,
-                    Settings.DEFAULT_ADMIN_PROFILE_PICTURE,
-                    "admin",
-                    Settings.DEFAULT_ADMIN_POINT,
-                    currentTimeStamp(),
-                    "True",
-                ),
-            )
+    Returns:
+        None
+    """
 
-            connection.commit()
+    _databaseFile("Posts", Settings.DB_POSTS_ROOT)
+    migrate("DB_POSTS_ROOT")
 
-            Log.success(
-                f'Admin: "{Settings.DEFAULT_ADMIN_USERNAME}" added to database as initial admin',
-            )
 
-        connection.commit()
+def commentsTable():
+    """
+    Checks if the comments database exists, creates it if it does not and
+    applies its pending migrations.
 
-        connection.close()
+    Returns:
+        None
+    """
 
-        Log.success(f'Table: "users" created in "{Settings.DB_USERS_ROOT}"')
+    _databaseFile("Comments", Settings.DB_COMMENTS_ROOT)
+    migrate("DB_COMMENTS_ROOT")
 
 
-def postsTable():
+def analyticsTable():
     """
-    Checks if the posts table exists in the database, and creates it if it does not.
+    Checks if the analytics database exists, creates it if it does not and
+    applies its pending migrations.
 
     Returns:
         None
     """
 
-    if exists(Settings.DB_POSTS_ROOT):
-        Log.info(f'Posts database: "{Settings.DB_POSTS_ROOT}" found')
-    else:
-        Log.error(f'Posts database: "{Settings.DB_POSTS_ROOT}" not found')
-
-        open(Settings.DB_POSTS_ROOT, "x")
-
-        Log.success(f'Posts database: "{Settings.DB_POSTS_ROOT}" created')
-    Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-    connection.set_trace_callback(Log.database)
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""select id from posts; """).fetchall()
-
-        Log.info(f'Table: "posts" found in "{Settings.DB_POSTS_ROOT}"')
-    except Exception:
-        Log.error(f'Table: "posts" not found in "{Settings.DB_POSTS_ROOT}"')
-
-        postsTable = """
-        CREATE TABLE "posts" (
-            "id"    integer not null unique,
-            "title" text not null,
-            "tags"  text not null,
-            "content"   text not null,
-            "banner"    BLOB not null,
-            "author"    text not null,
-            "views" integer,
-            "timeStamp" integer,
-            "lastEditTimeStamp" integer,
-            "category"  text not null,
-            "urlID" TEXT NOT NULL,
-            "abstract" text not null default "",
-            primary key("id" autoincrement)
-        );"""
-
-        cursor.execute(postsTable)
-
-        connection.commit()
-
-        Log.success(f'Table: "posts" created in "{Settings.DB_POSTS_ROOT}"')
-
-    # Ensure downvotes column exists
-    try:
-        cursor.execute("""select downvotes from posts limit 1""")
-    except Exception:
-        cursor.execute("alter table posts add column downvotes integer default 0")
-        connection.commit()
-        Log.success('Column: "downvotes" added to "posts" table')
-
-    # Ensure postDownvotes table exists
-    try:
-        cursor.execute("""select id from postDownvotes;""")
-    except Exception:
-        postDownvotesTable = """
-        create table if not exists postDownvotes(
-            "id" integer not null,
-            "postID" integer not null,
-            "user" text not null,
-            primary key("id" autoincrement),
-            unique(postID, user)
-        );"""
-
-        cursor.execute(postDownvotesTable)
-        connection.commit()
-        Log.success(f'Table: "postDownvotes" created in "{Settings.DB_POSTS_ROOT}"')
-
-    # Ensure deletedPosts table exists
-    try:
-        cursor.execute("""select urlID from deletedPosts limit 1""")
-    except Exception:
-        deletedPostsTable = """
-        create table if not exists deletedPosts(
-            "urlID" text not null unique
-        );"""
-
-        cursor.execute(deletedPostsTable)
-        connection.commit()
-        Log.success(f'Table: "deletedPosts" created in "{Settings.DB_POSTS_ROOT}"')
-
-    connection.close()
+    _databaseFile("Analytics", Settings.DB_ANALYTICS_ROOT)
+    migrate("DB_ANALYTICS_ROOT")
 
 
-def commentsTable():
+def blacklistTable():
     """
-    Checks if the comments table exists in the database, and creates it if it does not.
+    Checks if the blacklist database exists, creates it if it does not and
+    applies its pending migrations.
 
     Returns:
         None
     """
 
-    if exists(Settings.DB_COMMENTS_ROOT):
-        Log.info(f'Comments database: "{Settings.DB_COMMENTS_ROOT}" found')
-    else:
-        Log.error(f'Comments database: "{Settings.DB_COMMENTS_ROOT}" not found')
-
-        open(Settings.DB_COMMENTS_ROOT, "x")
-
-        Log.success(f'Comments database: "{Settings.DB_COMMENTS_ROOT}" created')
-    Log.database(f"Connecting to '{Settings.DB_COMMENTS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-    connection.set_trace_callback(Log.database)
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""select id from comments; """).fetchall()
-
-        Log.info(f'Table: "comments" found in "{Settings.DB_COMMENTS_ROOT}"')
-    except Exception:
-        Log.error(f'Table: "comments" not found in "{Settings.DB_COMMENTS_ROOT}"')
-
-        commentsTable = """
-        create table if not exists comments(
-            "id"    integer not null,
-            "post"  integer,
-            "comment"   text,
-            "user"  text,
-            "timeStamp" integer,
-            "upvotes" integer default 0,
-            primary key("id" autoincrement)
-        );"""
-
-        cursor.execute(commentsTable)
-
-        connection.commit()
-
-        Log.success(f'Table: "comments" created in "{Settings.DB_COMMENTS_ROOT}"')
-
-    # Ensure upvotes column exists
-    try:
-        cursor.execute("""select upvotes from comments limit 1""")
-    except Exception:
-        cursor.execute("alter table comments add column upvotes integer default 0")
-        connection.commit()
-        Log.success('Column: "upvotes" added to "comments" table')
-
-    # Ensure commentVotes table exists
-    try:
-        cursor.execute("""select id from commentVotes;""")
-    except Exception:
-        commentVotesTable = """
-        create table if not exists commentVotes(
-            "id" integer not null,
-            "commentID" integer not null,
-            "user" text not null,
-            primary key("id" autoincrement),
-            unique(commentID, user)
-        );"""
-
-        cursor.execute(commentVotesTable)
-        connection.commit()
-        Log.success(f'Table: "commentVotes" created in "{Settings.DB_COMMENTS_ROOT}"')
-
-    # Ensure deletedComments table exists
-    try:
-        cursor.execute("""select commentID from deletedComments limit 1""")
-    except Exception:
-        deletedCommentsTable = """
-        create table if not exists deletedComments(
-            "commentID" integer not null unique
-        );"""
-
-        cursor.execute(deletedCommentsTable)
-        connection.commit()
-        Log.success(f'Table: "deletedComments" created in "{Settings.DB_COMMENTS_ROOT}"')
-
-    connection.close()
+    _databaseFile("Blacklist", Settings.DB_BLACKLIST_ROOT)
+    migrate("DB_BLACKLIST_ROOT")
 
 
-def analyticsTable():
+def pragmaProfile():
     """
-    Checks if the analytics table exists in the database, and creates it if it does not.
+    Applies ``Settings.DB_PRAGMAS`` to every database and checks the result.
+
+    ``journal_mode`` is stored in the database file, so this switches existing
+    databases to WAL once; the other PRAGMAs are per connection and are applied
+    by ``utils.db`` whenever it opens one.
 
     Returns:
         None
     """
 
-    if exists(Settings.DB_ANALYTICS_ROOT):
-        Log.info(f'Analytics database: "{Settings.DB_ANALYTICS_ROOT}" found')
-    else:
-        Log.error(f'Analytics database: "{Settings.DB_ANALYTICS_ROOT}" not found')
-
-        open(Settings.DB_ANALYTICS_ROOT, "x")
+    expected = str(Settings.DB_PRAGMAS.get("journal_mode", "delete")).lower()
+    for path in databases():
+        connection = getConnection(path)
+        journalMode = applyPragmas(connection).get("journal_mode", expected)
+        connection.close()
+        if str(journalMode).lower() == expected:
+            Log.info(f'Journal mode: "{journalMode}" in "{path}"')
+        else:
+            Log.error(
+                f'Journal mode: "{journalMode}" instead of "{expected}" in "{path}"'
+            )
 
-        Log.success(f'Analytics database: "{Settings.DB_ANALYTICS_ROOT}" created')
-    Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
 
-    connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-    connection.set_trace_callback(Log.database)
-    cursor = connection.cursor()
-    try:
-        cursor.execute("select id from postsAnalytics;").fetchall()
-        Log.info(
-            f'Table: "postsAnalytics" found in "{Settings.DB_ANALYTICS_ROOT}"'
-        )
-    except Exception:
-        Log.error(
-            f'Table: "postsAnalytics" not found in "{Settings.DB_ANALYTICS_ROOT}"'
+# (database setting, index the plan must use, hot query, sample parameters)
+HOT_QUERIES = [
+    (
+        "DB_USERS_ROOT",
+        "usersUserNameLower",
+        "select profilePicture from users where lower(userName) = ?",
+        ("admin",),
+    ),
+    (
+        "DB_POSTS_ROOT",
+        "postsAuthorTimeStamp",
+        "select * from posts where author = ? order by timeStamp desc",
+        ("admin",),
+    ),
+    (
+        "DB_POSTS_ROOT",
+        "onchainPostsBlockNumber",
+        "select max(blockNumber) from onchainPosts",
+        (),
+    ),
+    (
+        "DB_POSTS_ROOT",
+        "postsUrlID",
+        "select * from posts where urlID = ?",
+        ("0",),
+    ),
+    (
+        "DB_COMMENTS_ROOT",
+        "commentsUserLower",
+        "select * from comments where lower(user) = ? order by timeStamp desc",
+        ("admin",),
+    ),
+    (
+        "DB_COMMENTS_ROOT",
+        "commentsPost",
+        "select count(*) from comments where post = ?",
+        (0,),
+    ),
+    (
+        "DB_ANALYTICS_ROOT",
+        "postsAnalyticsPostIDTimeStamp",
+        "select country as countryName, count(*) as countryCount from postsAnalytics where postID = ? GROUP BY country ORDER BY countryCount DESC",
+        (0,),
+    ),
+    (
+        "DB_ANALYTICS_ROOT",
+        "postsAnalyticsTimeStamp",
+        "select count(*) from postsAnalytics where timeStamp > ?",
+        (0,),
+    ),
+    *(
+        (
+            "DB_ANALYTICS_ROOT",
+            f"{table}Bucket",
+            f"select strftime('%Y-%m-%d %H:%M', bucket, 'unixepoch'), sum(visits) from {table} where bucket >= ? group by bucket order by bucket",
+            (0,),
         )
-        cursor.execute(
-            """
-        create table if not exists postsAnalytics(
-            "id"    integer not null,
-            "postID"  integer,
-            "visitorUserName"  text,
-            "country" text,
-            "os" text,
-            "continent" text,
-            "timeSpendDuration" int default 0,
-            "timeStamp" integer,
-            primary key("id" autoincrement)
-        );"""
-        )
-        connection.commit()
-        Log.success(
-            f'Table: "postsAnalytics" created in "{Settings.DB_ANALYTICS_ROOT}"'
-        )
-
-    try:
-        cursor.execute("select id from userActivity;").fetchall()
-        Log.info(
-            f'Table: "userActivity" found in "{Settings.DB_ANALYTICS_ROOT}"'
-        )
-    except Exception:
-        Log.error(
-            f'Table: "userActivity" not found in "{Settings.DB_ANALYTICS_ROOT}"'
-        )
-        cursor.execute(
-            """
-        create table if not exists userActivity(
-            "id" integer not null,
-            "ip" text,
-            "path" text,
-            "method" text,
-            "country" text,
-            "userName" text,
-            "timeStamp" integer,
-            primary key("id" autoincrement)
-        );"""
-        )
-        connection.commit()
-        Log.success(
-            f'Table: "userActivity" created in "{Settings.DB_ANALYTICS_ROOT}"'
-        )
-
-    connection.close()
+        for table in ROLLUPS
+    ),
+    (
+        "DB_ANALYTICS_ROOT",
+        "userActivityTimeStamp",
+        "select ip, country, path, method, userName, timeStamp from userActivity order by timeStamp desc limit 100",
+        (),
+    ),
+]
+
+
+def tableIndexes():
+    """
+    Checks that every query in ``HOT_QUERIES`` is planned with its index by
+    ``EXPLAIN QUERY PLAN``. The indexes are created by ``utils.migrations``.
 
+    Returns:
+        bool: ``True`` if every hot query uses its index.
+    """
 
-def blacklistTable():
-    """Ensure the blacklist table exists."""
-    if exists(Settings.DB_BLACKLIST_ROOT):
-        Log.info(f'Blacklist database: "{Settings.DB_BLACKLIST_ROOT}" found')
-    else:
-        Log.error(f'Blacklist database: "{Settings.DB_BLACKLIST_ROOT}" not found')
-        open(Settings.DB_BLACKLIST_ROOT, "x")
-        Log.success(f'Blacklist database: "{Settings.DB_BLACKLIST_ROOT}" created')
-
-    Log.database(f"Connecting to '{Settings.DB_BLACKLIST_ROOT}' database")
-    connection = sqlite3.connect(Settings.DB_BLACKLIST_ROOT)
-    connection.set_trace_callback(Log.database)
-    cursor = connection.cursor()
-    try:
-        cursor.execute("select id from blacklist;").fetchall()
-        Log.info(f'Table: "blacklist" found in "{Settings.DB_BLACKLIST_ROOT}"')
-    except Exception:
-        Log.error(f'Table: "blacklist" not found in "{Settings.DB_BLACKLIST_ROOT}"')
-        blacklist_table = """
-        create table if not exists blacklist(
-            "id" integer not null,
-            "type" text,
-            "contentID" integer,
-            primary key("id" autoincrement)
-        );"""
-        cursor.execute(blacklist_table)
-        connection.commit()
-        Log.success(f'Table: "blacklist" created in "{Settings.DB_BLACKLIST_ROOT}"')
-    connection.close()
+    verified = True
+    for setting, name, query, parameters in HOT_QUERIES:
+        path = getattr(Settings, setting)
+        connection = getConnection(path)
+        plan = " | ".join(
+            row[3]
+            for row in connection.execute(f"explain query plan {query}", parameters)
+        )
+        connection.close()
+        if f"INDEX {name}" in plan:
+            Log.info(f'Index: "{name}" used by the query plan: {plan}')
+        else:
+            verified = False
+            Log.error(f'Index: "{name}" not used by "{query}" in "{path}": {plan}')
+    return verified
@@ -0,0 +1,319 @@
+"""
+This module contains the single-writer coordination of the SQLite databases.
+
+SQLite lets one connection at a time write to a database file. Instead of
+every request thread taking the write lock on its own connection and retrying
+on ``database is locked``, writes are submitted as jobs to a
+``DatabaseWriter``: one daemon thread per database that owns the only writing
+connection. The writer takes up to ``Settings.DB_WRITER_BATCH_SIZE`` queued
+jobs at once and runs them in one transaction, each inside its own savepoint
+so a failing job is rolled back alone, commits, and then resolves each job's
+``concurrent.futures.Future`` with its result or exception.
+
+A job is a callable taking the writer's cursor; it must not commit, and it
+must not submit other jobs. ``execute`` wraps a single statement.
+
+Work that must be atomic across several databases runs through
+``writeAttached``: it holds the writer of every database it writes, so each
+of them finishes its current batch and then waits, runs the job in one
+transaction on the caller's attached connection and releases the writers
+after the commit. No file has two writing connections at a time, and the
+transaction only takes the write locks of the files the job touches. In WAL
+mode such a transaction is atomic against errors and concurrent readers, but
+SQLite does not guarantee atomicity across the files if the process crashes
+mid-commit.
+
+The queue of each writer holds at most ``Settings.DB_WRITER_QUEUE_SIZE``
+jobs. When it is full ``submit`` blocks for up to
+``Settings.DB_WRITER_SUBMIT_TIMEOUT`` seconds and then raises ``WriterBusy``,
+so a write burst slows callers down instead of growing the queue without
+bound. ``stopWriters`` drains every queue; it runs at interpreter exit.
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from settings import Settings
+from utils.db import getAttachedConnection, getConnection
+from utils.log import Log
+
+_STOP = object()
+
+_lock = threading.Lock()
+_attachedLock = threading.Lock()
+_writers = {}
+
+
+class WriterBusy(Exception):
+    """Raised when a writer queue stays full for ``DB_WRITER_SUBMIT_TIMEOUT``."""
+
+
+class _Hold:
+    """Queue item pausing a writer between two batches until it is released."""
+
+    def __init__(self):
+        self.held = threading.Event()
+        self.released = threading.Event()
+
+    def wait(self):
+        self.held.set()
+        self.released.wait()
+
+    def release(self):
+        self.released.set()
+
+
+class DatabaseWriter:
+    """Daemon thread running the write jobs of one database in batches."""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue(maxsize=Settings.DB_WRITER_QUEUE_SIZE)
+        self._thread = None
+        self._stats = {
+            "jobs": 0,
+            "failed": 0,
+            "rejected": 0,
+            "batches": 0,
+            "maxDepth": 0,
+            "waitMs": 0.0,
+            "transactionMs": 0.0,
+        }
+
+    def start(self):
+        """Start the writer thread."""
+        self._thread = threading.Thread(
+            target=self.run, name=f"dbWriter:{self.path}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def submit(self, job):
+        """
+        Queues ``job`` for the next transaction.
+
+        Args:
+            job (callable): Function taking the writer's cursor.
+
+        Returns:
+            Future: Resolved with the job's return value once its transaction
+            committed, or with its exception.
+
+        Raises:
+            WriterBusy: The queue stayed full for ``DB_WRITER_SUBMIT_TIMEOUT``.
+        """
+        future = Future()
+        self._put((job, future, time.perf_counter()))
+        return future
+
+    def hold(self):
+        """
+        Queues a hold: after the jobs queued before it the writer waits,
+        outside any transaction, until the returned hold is released.
+        """
+        hold = _Hold()
+        self._put(hold)
+        return hold
+
+    def _put(self, item):
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Write jobs must not submit other write jobs")
+        try:
+            self._queue.put(item, timeout=Settings.DB_WRITER_SUBMIT_TIMEOUT)
+        except queue.Full:
+            with _lock:
+                self._stats["rejected"] += 1
+            raise WriterBusy(
+                f"Write queue of '{self.path}' is full ({self._queue.maxsize} jobs)"
+            ) from None
+        depth = self._queue.qsize()
+        with _lock:
+            self._stats["maxDepth"] = max(self._stats["maxDepth"], depth)
+
+    def run(self):
+        """Run queued jobs until ``stop`` is called."""
+        connection = getConnection(self.path)
+        item = self._queue.get()
+        while item is not _STOP:
+            if isinstance(item, _Hold):
+                item.wait()
+                item = self._queue.get()
+                continue
+            batch = [item]
+            item = None
+            while len(batch) < Settings.DB_WRITER_BATCH_SIZE:
+                try:
+                    queued = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is _STOP or isinstance(queued, _Hold):
+                    item = queued
+                    break
+                batch.append(queued)
+            self._runBatch(connection, batch)
+            if item is None:
+                item = self._queue.get()
+        connection.closePhysically()
+
+    def _runBatch(self, connection, batch):
+        start = time.perf_counter()
+        cursor = connection.cursor()
+        outcomes = []
+        try:
+            cursor.execute("begin immediate")
+            for job, future, _ in batch:
+                cursor.execute("savepoint job")
+                try:
+                    outcomes.append((future, job(cursor), None))
+                    cursor.execute("release job")
+                except Exception as exc:
+                    cursor.execute("rollback to job")
+                    cursor.execute("release job")
+                    outcomes.append((future, None, exc))
+            connection.commit()
+        except sqlite3.Error as exc:
+            if connection.in_transaction:
+                connection.rollback()
+            Log.error(f"Writer: transaction on '{self.path}' failed: {exc}")
+            outcomes = [(future, None, exc) for _, future, _ in batch]
+        end = time.perf_counter()
+        failed = 0
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                future.set_exception(exc)
+        with _lock:
+            self._stats["jobs"] += len(batch)
+            self._stats["failed"] += failed
+            self._stats["batches"] += 1
+            self._stats["transactionMs"] += (end - start) * 1000
+            self._stats["waitMs"] += sum(
+                (start - queuedAt) * 1000 for _, _, queuedAt in batch
+            )
+
+    def stop(self):
+        """Run the queued jobs and stop the thread."""
+        self._queue.put(_STOP)
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        with _lock:
+            counters = dict(self._stats)
+        batches = counters["batches"] or 1
+        jobs = counters["jobs"] or 1
+        return {
+            **counters,
+            "depth": self._queue.qsize(),
+            "queueSize": self._queue.maxsize,
+            "jobsPerBatch": round(counters["jobs"] / batches, 2),
+            "waitMs": round(counters["waitMs"] / jobs, 3),
+            "transactionMs": round(counters["transactionMs"] / batches, 3),
+        }
+
+
+def writer(path):
+    """Return the writer of the database at ``path``, starting it on first use."""
+    with _lock:
+        databaseWriter = _writers.get(path)
+        if databaseWriter is None:
+            databaseWriter = _writers[path] = DatabaseWriter(path)
+            databaseWriter.start()
+    return databaseWriter
+
+
+def submit(path, job):
+    """Queue ``job`` on the writer of ``path``; see ``DatabaseWriter.submit``."""
+    return writer(path).submit(job)
+
+
+def execute(path, sql, parameters=()):
+    """Queue one statement; the future resolves with its ``rowcount``."""
+    return submit(path, lambda cursor: cursor.execute(sql, parameters).rowcount)
+
+
+def write(path, job):
+    """
+    Runs ``job`` on the writer of ``path`` and waits for its transaction.
+
+    Returns:
+        The job's return value.
+
+    Raises:
+        WriterBusy: The queue is full.
+        Exception: Whatever the job raised.
+    """
+    return submit(path, job).result(timeout=Settings.DB_WRITER_RESULT_TIMEOUT)
+
+
+def writeAttached(paths, job):
+    """
+    Runs ``job`` in one transaction over the attached databases.
+
+    The writers of ``paths`` are held while the job runs, so it is the only
+    writer of those files; tables must be qualified with their schema, see
+    ``utils.db.attachedSchemas``. The job must only write to ``paths``.
+
+    Args:
+        paths (list): Database files the job writes to.
+        job (callable): Function taking a cursor of the attached connection.
+
+    Returns:
+        The job's return value.
+
+    Raises:
+        WriterBusy: A writer did not reach its hold within
+        ``DB_WRITER_RESULT_TIMEOUT``.
+        Exception: Whatever the job raised; its transaction is rolled back.
+    """
+    # One cross-database job at a time, so two of them never wait on each
+    # other's holds.
+    with _attachedLock:
+        holds = []
+        try:
+            for path in paths:
+                holds.append(writer(path).hold())
+            for path, hold in zip(paths, holds):
+                if not hold.held.wait(timeout=Settings.DB_WRITER_RESULT_TIMEOUT):
+                    raise WriterBusy(f"Writer of '{path}' did not pause in time")
+            connection = getAttachedConnection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute("begin")
+                try:
+                    result = job(cursor)
+                    connection.commit()
+                except BaseException:
+                    connection.rollback()
+                    raise
+            finally:
+                connection.close()
+            return result
+        finally:
+            for hold in holds:
+                hold.release()
+
+
+def stopWriters():
+    """Drain and stop every writer."""
+    with _lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for databaseWriter in writers:
+        databaseWriter.stop()
+
+
+atexit.register(stopWriters)
+
+
+def stats():
+    """Return queue depth, batching and latency counters per database."""
+    with _lock:
+        writers = dict(_writers)
+    return {path: databaseWriter.stats() for path, databaseWriter in writers.items()}
@@ -7,7 +7,7 @@ and interacting with the posts, users, and comments tables.
 The functions in this module are:
 
 - deletePost(postID): This function deletes a post and all associated comments
-from the database.
+and analytics from the database in one transaction.
 - deleteUser(userName): This function deletes a user and all associated data
 from the database.
 - deleteComment(commentID): This function deletes a comment from the database.
@@ -18,23 +18,26 @@ The functions in this module use the following helper functions:
 - Log.{type}(message): This function sends a message to the server.
 - session: This variable stores information about the current user's session.
 - redirect(url): This function redirects the user to a new URL.
+- write(path, job): This function runs a write job on the database's writer thread.
+- writeAttached(paths, job): This function runs a write job over the attached databases.
 - DB_POSTS_ROOT: This variable stores the path to the posts database.
 - DB_USERS_ROOT: This variable stores the path to the users database.
 - DB_COMMENTS_ROOT: This variable stores the path to the comments database.
 """
 
-import sqlite3
-
 from flask import redirect, session
 from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write, writeAttached
 from utils.flashMessage import flashMessage
 from utils.log import Log
+from utils.trafficRollups import ROLLUPS
 
 
 class Delete:
     def post(postID):
         """
-        This function deletes a post and all associated comments from the database.
+        This function deletes a post and all associated comments and analytics from the database.
 
         Parameters:
         postID (str): The ID of the post to be deleted.
@@ -42,57 +45,60 @@ class Delete:
         Returns:
         None
         """
-        Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-        connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-        connection.set_trace_callback(Log.database)
-        cursor = connection.cursor()
-        cursor.execute(
-            """select urlID from posts where id = ?""",
-            (postID,),
-        )
-        row = cursor.fetchone()
-        if row:
+
+        # The post, its comments and its analytics are deleted in one
+        # transaction over the attached databases while their writers wait.
+        def deletePost(cursor):
             cursor.execute(
-                """insert or ignore into deletedPosts(urlID) values(?)""",
-                (row[0],),
+                """select urlID from posts.posts where id = ?""",
+                (postID,),
             )
-        cursor.execute(
-            """delete from posts where id = ? """,
-            (postID,),
-        )
-        cursor.execute("update sqlite_sequence set seq = seq-1")
-        connection.commit()
-        connection.close()
-        connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-        connection.set_trace_callback(Log.database)
-        cursor = connection.cursor()
-        cursor.execute(
-            """select count(*) from comments where post = ? """,
-            [(postID)],
-        )
-        commentCount = list(cursor)[0][0]
-        cursor.execute(
-            """delete from comments where post = ? """,
-            [(postID)],
-        )
-        cursor.execute(
-            """update sqlite_sequence set seq = seq - ? """,
-            [(commentCount)],
-        )
-        connection.commit()
+            row = cursor.fetchone()
+            if row:
+                cursor.execute(
+                    """insert or ignore into posts.deletedPosts(urlID) values(?)""",
+                    (row[0],),
+                )
+            cursor.execute(
+                """delete from posts.posts where id = ? """,
+                (postID,),
+            )
+            cursor.execute("update posts.sqlite_sequence set seq = seq-1")
+            cursor.execute(
+                """select count(*) from comments.comments where post = ? """,
+                [(postID)],
+            )
+            commentCount = cursor.fetchone()[0]
+            cursor.execute(
+                """delete from comments.comments where post = ? """,
+                [(postID)],
+            )
+            cursor.execute(
+                """update comments.sqlite_sequence set seq = seq - ? """,
+                [(commentCount)],
+            )
+            cursor.execute(
+                """delete from analytics.postsAnalytics where postID = ? """,
+                [(postID)],
+            )
+            cursor.execute(
+                """delete from analytics.postsAnalyticsCompacted where postID = ? """,
+                [(postID)],
+            )
+            for table in ROLLUPS:
+                cursor.execute(
+                    f"""delete from analytics.{table} where postID = ? """,
+                    [(postID)],
+                )
 
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
-        cursor = connection.cursor()
-        cursor.execute(
-            """select postID from postsAnalytics where postID = ? """,
-            [(postID)],
+        writeAttached(
+            [
+                Settings.DB_POSTS_ROOT,
+                Settings.DB_COMMENTS_ROOT,
+                Settings.DB_ANALYTICS_ROOT,
+            ],
+            deletePost,
         )
-        cursor.execute(
-            """delete from postsAnalytics where postID = ? """,
-            [(postID)],
-        )
-        connection.commit()
 
         flashMessage(
             page="delete",
@@ -112,25 +118,23 @@ class Delete:
         Returns:
         None
         """
-        Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-        connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_USERS_ROOT)
         cursor = connection.cursor()
-        cursor.execute(
-            """select * from users where lower(userName) = ? """,
-            [(userName.lower())],
-        )
         cursor.execute(
             """select role from users where userName = ? """,
             [(session["userName"])],
         )
         perpetrator = cursor.fetchone()
-        cursor.execute(
-            """delete from users where lower(userName) = ? """,
-            [(userName.lower())],
-        )
-        cursor.execute("update sqlite_sequence set seq = seq-1")
-        connection.commit()
+        connection.close()
+
+        def deleteUser(cursor):
+            cursor.execute(
+                """delete from users where lower(userName) = ? """,
+                [(userName.lower())],
+            )
+            cursor.execute("update sqlite_sequence set seq = seq-1")
+
+        write(Settings.DB_USERS_ROOT, deleteUser)
         flashMessage(
             page="delete",
             message="user",
@@ -154,23 +158,19 @@ class Delete:
         Returns:
         None
         """
-        connection = sqlite3.connect(Settings.DB_COMMENTS_ROOT)
-        connection.set_trace_callback(Log.database)
-        cursor = connection.cursor()
-        cursor.execute(
-            """select user from comments where id = ? """,
-            [(commentID)],
-        )
-        cursor.execute(
-            """insert or ignore into deletedComments(commentID) values(?)""",
-            (commentID,),
-        )
-        cursor.execute(
-            """delete from comments where id = ? """,
-            [(commentID)],
-        )
-        cursor.execute("update sqlite_sequence set seq = seq-1")
-        connection.commit()
+
+        def deleteComment(cursor):
+            cursor.execute(
+                """insert or ignore into deletedComments(commentID) values(?)""",
+                (commentID,),
+            )
+            cursor.execute(
+                """delete from comments where id = ? """,
+                [(commentID)],
+            )
+            cursor.execute("update sqlite_sequence set seq = seq-1")
+
+        write(Settings.DB_COMMENTS_ROOT, deleteComment)
         flashMessage(
             page="delete",
             message="comment",
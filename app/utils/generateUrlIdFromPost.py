@@ -1,13 +1,11 @@
-import sqlite3
 import uuid
 
 from settings import Settings
-from utils.log import Log
+from utils.db import getConnection
 
 
 def checkIfurlIDExistsInPostDb(urlID):
-    with sqlite3.connect(Settings.DB_POSTS_ROOT) as connection:
-        connection.set_trace_callback(Log.database)
+    with getConnection(Settings.DB_POSTS_ROOT) as connection:
         cursor = connection.cursor()
         cursor.execute("SELECT urlID FROM posts WHERE urlID = ?", (urlID,))
         return bool(cursor.fetchall())
@@ -0,0 +1,154 @@
+"""
+This module contains the shared GeoIP resolution of visitor addresses.
+
+``afterRequestLogger`` and ``getDataFromUserIP`` used to hold a reader of
+their own for the DB-IP country database and looked every address up again.
+The ``geoIP`` instance opens ``Settings.GEOIP_DB_ROOT`` once, memory-mapped
+(``MODE_MMAP``), and keeps the ``(country, continent)`` of the last
+``Settings.GEOIP_CACHE_SIZE`` keys in LRU order.
+
+With ``Settings.GEOIP_PREFIX_KEYS`` the cache key is the address's /24
+(IPv4) or /48 (IPv6) network instead of the address, so traffic from many
+addresses of the same networks shares entries. Country ranges are almost
+never narrower than that, but a lookup may then answer with the country of
+a neighbouring address.
+
+When the database file is missing every address resolves to ``"Unknown"``.
+"""
+
+import ipaddress
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from geoip2 import database, errors
+from maxminddb import MODE_MMAP
+
+from settings import Settings
+from utils.log import Log
+
+UNKNOWN = ("Unknown", "Unknown")
+
+
+def prefixKey(ip):
+    """
+    Returns the /24 (IPv4) or /48 (IPv6) network of ``ip`` as a string.
+
+    IPv4 addresses are not validated here, only split, to keep cache hits
+    cheap; an invalid address fails in the reader on the cache miss and is
+    never cached.
+    """
+    if ":" in ip:
+        return str(ipaddress.IPv6Network((ip, 48), strict=False))
+    return ip.rpartition(".")[0] + ".0/24"
+
+
+class GeoIPResolver:
+    """Country and continent lookups over one memory-mapped reader with an LRU cache."""
+
+    def __init__(self, path, maxEntries, prefixKeys=False):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.prefixKeys = prefixKeys
+        self._reader = None
+        self._opened = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def reader(self):
+        """Open the database on first use; ``None`` if it is not available."""
+        if not self._opened:
+            with self._lock:
+                if not self._opened:
+                    if os.path.exists(self.path):
+                        try:
+                            self._reader = database.Reader(self.path, mode=MODE_MMAP)
+                            Log.info(f"GeoIP: database loaded from {self.path}")
+                        except Exception as exc:
+                            Log.error(f"GeoIP: loading {self.path} failed: {exc}")
+                    else:
+                        Log.warning(
+                            f"GeoIP: database not found at {self.path}, "
+                            "geographic analytics is disabled"
+                        )
+                    self._opened = True
+        return self._reader
+
+    def lookup(self, ip):
+        """
+        Resolves ``ip`` to its country and continent.
+
+        Args:
+            ip (str): IPv4 or IPv6 address.
+
+        Returns:
+            tuple: ``(country, continent)``, ``("Unknown", "Unknown")`` if the
+            address is invalid, not in the database or the database is missing.
+        """
+        reader = self.reader()
+        if reader is None or not ip:
+            return UNKNOWN
+        try:
+            key = prefixKey(ip) if self.prefixKeys else ip
+        except ValueError:
+            return UNKNOWN
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        try:
+            response = reader.country(ip)
+            result = (
+                sys.intern(response.country.name or "Unknown"),
+                sys.intern(response.continent.name or "Unknown"),
+            )
+        except errors.AddressNotFoundError:
+            result = UNKNOWN
+        except ValueError:
+            return UNKNOWN
+        except Exception as exc:
+            Log.error(f"GeoIP: lookup of {ip} failed: {exc}")
+            with self._lock:
+                self.errors += 1
+            return UNKNOWN
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit, miss and eviction counters and the cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "available": self._reader is not None,
+                "prefixKeys": self.prefixKeys,
+                "entries": len(self._entries),
+                "maxEntries": self.maxEntries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+
+
+geoIP = GeoIPResolver(
+    path=Settings.GEOIP_DB_ROOT,
+    maxEntries=Settings.GEOIP_CACHE_SIZE,
+    prefixKeys=Settings.GEOIP_PREFIX_KEYS,
+)
@@ -1,8 +1,21 @@
-import sqlite3
 from datetime import datetime, timedelta
 
 from settings import Settings
+from utils.db import getAttachedConnection, getConnection
 from utils.log import Log
+from utils.trafficRollups import firstVisit, trafficSeries
+
+
+def _visits(column, where=""):
+    """
+    Returns a query of ``(column, visits)`` rows over the live and the compacted
+    visits, so totals include the rows removed by the analytics retention
+    (``utils.analyticsRetention``). ``where`` applies to both parts.
+    """
+    return (
+        f"select {column}, count(*) as visits from postsAnalytics {where} group by {column} "
+        f"union all select {column}, visits from postsAnalyticsCompacted {where}"
+    )
 
 
 def getAnalyticsPageTrafficGraphData(
@@ -27,26 +40,23 @@ def getAnalyticsPageTrafficGraphData(
         if weeks == 0 and days == 0 and hours == 0:
             hours = 48
 
-    if sincePosted:
-        sqlQuery = """select strftime('%Y-%m-%d %H:%M', timeStamp, 'unixepoch') as visitTimeStamp, count(*) as visitCount from postsAnalytics where postID = ? GROUP BY visitTimeStamp ORDER BY visitTimeStamp ASC"""
-        parameter = (postID,)
-    else:
-        timeDeltaArgs = {"weeks": weeks or 0, "days": days or 0, "hours": hours}
-
-        userQueryLimit = int((datetime.now() - timedelta(**timeDeltaArgs)).timestamp())
-
-        sqlQuery = """select strftime('%Y-%m-%d %H:%M', timeStamp, 'unixepoch') as visitTimeStamp, count(*) as visitCount from postsAnalytics where postID = ? and timeStamp > ? GROUP BY visitTimeStamp ORDER BY visitTimeStamp ASC"""
-        parameter = (postID, userQueryLimit)
-
     try:
-        Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_ANALYTICS_ROOT)
         cursor = connection.cursor()
 
-        cursor.execute(sqlQuery, parameter)
-        postTrafficData = cursor.fetchall()
+        if sincePosted:
+            userQueryLimit = firstVisit(cursor, postID)
+        else:
+            timeDeltaArgs = {"weeks": weeks or 0, "days": days or 0, "hours": hours}
+            userQueryLimit = int(
+                (datetime.now() - timedelta(**timeDeltaArgs)).timestamp()
+            )
+
+        postTrafficData = (
+            trafficSeries(cursor, userQueryLimit, postID)
+            if userQueryLimit is not None
+            else []
+        )
 
         jSTimeStampAndCount = [
             [
@@ -75,15 +85,12 @@ def getAnalyticsPageOSGraphData(postID: int) -> dict:
     """
 
     try:
-        Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_ANALYTICS_ROOT)
         cursor = connection.cursor()
 
         cursor.execute(
-            """select os as osName, count(*) as osCount from postsAnalytics where postID = ? GROUP BY os""",
-            (postID,),
+            f"""select os as osName, sum(visits) as osCount from ({_visits("os", "where postID = ?")}) GROUP BY os""",
+            (postID, postID),
         )
         postGraphOSData = cursor.fetchall() or []
 
@@ -112,19 +119,15 @@ def getAnalyticsPageCountryGraphData(postID: int, viewAll=False) -> dict:
         `dict`: osNameList: e.g. ["Russia", "Germany"...]. , osCountList: e.g. [3445, 6756, ...]
     """
 
-    if viewAll:
-        sqlQuery = """select country as countryName, count(*) as countryCount from postsAnalytics where postID = ? GROUP BY country ORDER BY countryCount DESC"""
-    else:
-        sqlQuery = """select country as countryName, count(*) as countryCount from postsAnalytics where postID = ? GROUP BY country ORDER BY countryCount DESC limit 25"""
+    sqlQuery = f"""select country as countryName, sum(visits) as countryCount from ({_visits("country", "where postID = ?")}) GROUP BY country ORDER BY countryCount DESC"""
+    if not viewAll:
+        sqlQuery += " limit 25"
 
     try:
-        Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_ANALYTICS_ROOT)
         cursor = connection.cursor()
 
-        cursor.execute(sqlQuery, (postID,))
+        cursor.execute(sqlQuery, (postID, postID))
         postCountryData = cursor.fetchall()
 
         countryGraphData = {
@@ -162,28 +165,21 @@ def getSiteTrafficGraphData(
         if weeks == 0 and days == 0 and hours == 0:
             hours = 48
 
-    if sincePosted:
-        sqlQuery = (
-            """select strftime('%Y-%m-%d %H:%M', timeStamp, 'unixepoch') as visitTimeStamp, count(*) as visitCount from postsAnalytics GROUP BY visitTimeStamp ORDER BY visitTimeStamp ASC"""
-        )
-        parameter = ()
-    else:
-        timeDeltaArgs = {"weeks": weeks or 0, "days": days or 0, "hours": hours}
-        userQueryLimit = int((datetime.now() - timedelta(**timeDeltaArgs)).timestamp())
-        sqlQuery = (
-            """select strftime('%Y-%m-%d %H:%M', timeStamp, 'unixepoch') as visitTimeStamp, count(*) as visitCount from postsAnalytics where timeStamp > ? GROUP BY visitTimeStamp ORDER BY visitTimeStamp ASC"""
-        )
-        parameter = (userQueryLimit,)
-
     try:
-        Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_ANALYTICS_ROOT)
         cursor = connection.cursor()
 
-        cursor.execute(sqlQuery, parameter)
-        siteTrafficData = cursor.fetchall()
+        if sincePosted:
+            userQueryLimit = firstVisit(cursor)
+        else:
+            timeDeltaArgs = {"weeks": weeks or 0, "days": days or 0, "hours": hours}
+            userQueryLimit = int(
+                (datetime.now() - timedelta(**timeDeltaArgs)).timestamp()
+            )
+
+        siteTrafficData = (
+            trafficSeries(cursor, userQueryLimit) if userQueryLimit is not None else []
+        )
 
         jSTimeStampAndCount = [
             [
@@ -205,14 +201,11 @@ def getSiteOSGraphData() -> dict:
     """Returns operating system distribution for the entire site."""
 
     try:
-        Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_ANALYTICS_ROOT)
         cursor = connection.cursor()
 
         cursor.execute(
-            """select os as osName, count(*) as osCount from postsAnalytics GROUP BY os"""
+            f"""select os as osName, sum(visits) as osCount from ({_visits("os")}) GROUP BY os"""
         )
         siteGraphOSData = cursor.fetchall() or []
 
@@ -231,20 +224,12 @@ def getSiteOSGraphData() -> dict:
 def getSiteCountryGraphData(viewAll: bool = False) -> dict:
     """Returns visitor country distribution for the entire site."""
 
-    if viewAll:
-        sqlQuery = (
-            """select country as countryName, count(*) as countryCount from postsAnalytics GROUP BY country ORDER BY countryCount DESC"""
-        )
-    else:
-        sqlQuery = (
-            """select country as countryName, count(*) as countryCount from postsAnalytics GROUP BY country ORDER BY countryCount DESC limit 25"""
-        )
+    sqlQuery = f"""select country as countryName, sum(visits) as countryCount from ({_visits("country")}) GROUP BY country ORDER BY countryCount DESC"""
+    if not viewAll:
+        sqlQuery += " limit 25"
 
     try:
-        Log.database(f"Connecting to '{Settings.DB_ANALYTICS_ROOT}' database")
-
-        connection = sqlite3.connect(Settings.DB_ANALYTICS_ROOT)
-        connection.set_trace_callback(Log.database)
+        connection = getConnection(Settings.DB_ANALYTICS_ROOT)
         cursor = connection.cursor()
 
         cursor.execute(sqlQuery)
@@ -264,3 +249,37 @@ def getSiteCountryGraphData(viewAll: bool = False) -> dict:
             "countryNameList": [],
             "countryCountList": [],
         }
+
+
+def getSiteTotals(hours: float = 24) -> dict:
+    """Returns the site analytics tiles in one query over the attached databases.
+
+    The totals are read from the trigger-maintained ``counters`` tables (see
+    ``utils.counters``); ``totalVisitor`` adds the visits compacted out of
+    ``postsAnalytics`` by the retention policy. ``todaysVisitor`` is a range
+    count on the ``postsAnalyticsTimeStamp`` index.
+
+    Args:
+        hours (float): Window of the ``todaysVisitor`` count.
+
+    Returns:
+        dict: ``totalVisitor``, ``todaysVisitor``, ``totalPosts`` and ``totalComments``.
+    """
+
+    since = int((datetime.now() - timedelta(hours=hours)).timestamp())
+    connection = getAttachedConnection()
+    row = connection.execute(
+        """select (select coalesce(sum(value), 0) from analytics.counters
+        where name in ('postsAnalytics', 'archivedVisits') and key = ''),
+        (select count(*) from analytics.postsAnalytics where timeStamp > ?),
+        (select value from posts.counters where name = 'posts' and key = ''),
+        (select value from comments.counters where name = 'comments' and key = '')""",
+        (since,),
+    ).fetchone()
+    connection.close()
+    return {
+        "totalVisitor": row[0] or 0,
+        "todaysVisitor": row[1] or 0,
+        "totalPosts": row[2] or 0,
+        "totalComments": row[3] or 0,
+    }
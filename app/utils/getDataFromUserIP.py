@@ -1,9 +1,7 @@
-import os
-
-import geoip2
 import requests
-from geoip2 import database
-from user_agents import parse
+
+from utils.geoIP import UNKNOWN, geoIP
+from utils.userAgent import classify
 
 """
 This function will collect user ip using api.ipify.org to fetch user's country, continents
@@ -11,39 +9,6 @@ and user Agent string to fetch user operating system to store post analytics
 """
 
 
-_reader = None
-_reader_initialized = False
-
-
-def _get_geoip_reader():
-    """
-    Lazy initialization of the GeoIP database reader.
-    Returns None if the database file doesn't exist.
-    """
-    global _reader, _reader_initialized
-
-    if _reader_initialized:
-        return _reader
-
-    _reader_initialized = True
-    db_path = "static/geoIP2database/dbip-country-lite-2025-02.mmdb"
-
-    if os.path.exists(db_path):
-        try:
-            _reader = database.Reader(db_path)
-            print(f"GeoIP database loaded successfully from {db_path}")
-        except Exception as e:
-            print(f"Failed to load GeoIP database: {e}")
-            _reader = None
-    else:
-        print(
-            f"GeoIP database not found at {db_path}. Geographic analytics will be disabled."
-        )
-        _reader = None
-
-    return _reader
-
-
 """
 Free IP geolocation databases
 The DB-IP Lite databases are subsets of the commercial databases with reduced
@@ -70,73 +35,21 @@ def getDataFromUserIP(userAgentString: str) -> dict:
         returns dict response containing country name, os, continent or failure message
         Note: If GeoIP database is not available, country and continent will be "Unknown"
     """
-    try:
-        user_agent = parse(userAgentString)
-        os_name = user_agent.os.family
-
-        reader = _get_geoip_reader()
-
-        if reader is None:
-            return {
-                "status": 0,
-                "payload": {
-                    "country": "Unknown",
-                    "os": os_name,
-                    "continent": "Unknown",
-                },
-            }
-
-        userIPAddr = requests.get("https://api.ipify.org", timeout=5)
-
-        response = reader.country(userIPAddr.text.strip())
-
-        return {
-            "status": 0,
-            "payload": {
-                "country": response.country.name or "Unknown",
-                "os": os_name,
-                "continent": response.continent.name or "Unknown",
-            },
-        }
-
-    except requests.exceptions.RequestException:
-        try:
-            user_agent = parse(userAgentString)
-            return {
-                "status": 0,
-                "payload": {
-                    "country": "Unknown",
-                    "os": user_agent.os.family,
-                    "continent": "Unknown",
-                },
-            }
-        except Exception:
-            return {"status": 1, "message": "Failed to fetch IP and parse user agent"}
-
-    except geoip2.errors.AddressNotFoundError:
-        try:
-            user_agent = parse(userAgentString)
-            return {
-                "status": 0,
-                "payload": {
-                    "country": "Unknown",
-                    "os": user_agent.os.family,
-                    "continent": "Unknown",
-                },
-            }
-        except Exception:
-            return {"status": 1, "message": "Invalid IP address"}
+    os_name = classify(userAgentString).os
+    country, continent = UNKNOWN
 
-    except Exception as e:
+    if geoIP.reader() is not None:
         try:
-            user_agent = parse(userAgentString)
-            return {
-                "status": 0,
-                "payload": {
-                    "country": "Unknown",
-                    "os": user_agent.os.family,
-                    "continent": "Unknown",
-                },
-            }
-        except Exception:
-            return {"status": 1, "message": f"Unexpected error: {str(e)}"}
+            userIPAddr = requests.get("https://api.ipify.org", timeout=5)
+            country, continent = geoIP.lookup(userIPAddr.text.strip())
+        except requests.exceptions.RequestException:
+            pass
+
+    return {
+        "status": 0,
+        "payload": {
+            "country": country,
+            "os": os_name,
+            "continent": continent,
+        },
+    }
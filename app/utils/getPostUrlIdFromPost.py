@@ -1,6 +1,5 @@
-import sqlite3
-
 from settings import Settings
+from utils.db import getConnection
 from utils.log import Log
 
 
@@ -13,10 +12,7 @@ def getPostUrlIdFromPost(postID: int):
     Returns:
         str or None: The post's urlID of the post, or None if not found.
     """
-    Log.database(f"Connecting to '{Settings.DB_POSTS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_POSTS_ROOT)
-    connection.set_trace_callback(Log.database)
+    connection = getConnection(Settings.DB_POSTS_ROOT)
 
     cursor = connection.cursor()
 
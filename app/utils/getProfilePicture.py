@@ -1,6 +1,5 @@
-import sqlite3
-
 from settings import Settings
+from utils.db import getConnection
 from utils.log import Log
 
 
@@ -15,10 +14,7 @@ def getProfilePicture(userName):
         str: The profile picture URL of the user. If no picture is stored in the
         database, a DiceBear identicon URL is generated as a fallback.
     """
-    Log.database(f"Connecting to '{Settings.DB_USERS_ROOT}' database")
-
-    connection = sqlite3.connect(Settings.DB_USERS_ROOT)
-    connection.set_trace_callback(Log.database)
+    connection = getConnection(Settings.DB_USERS_ROOT)
 
     cursor = connection.cursor()
 
@@ -0,0 +1,443 @@
+"""
+In-process stand-in for the PostStorage and CommentStorage contracts.
+
+``LocalChain`` keeps the contract state in Python and answers the JSON-RPC
+methods the app relies on (``eth_call``, ``eth_getLogs``, ``eth_blockNumber``)
+through a ``requests`` transport adapter, so a regular ``Web3.HTTPProvider``
+can talk to it without any network access, or over a loopback HTTP server
+started by ``serve``. It is used to exercise the
+chain-backed code paths offline; ``injectFaults`` adds latency, HTTP errors,
+failing calls, rejected batches or an outage to test the resilience layer.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+import requests
+from eth_abi import decode, encode
+from eth_utils import (
+    event_abi_to_log_topic,
+    function_abi_to_4byte_selector,
+    get_abi_input_types,
+    get_abi_output_types,
+    to_checksum_address,
+)
+from requests.adapters import BaseAdapter
+from settings import Settings
+from utils import web3Client
+from web3 import Web3
+
+LOCAL_CHAIN_URL = "http://localchain.invalid/rpc"
+
+_ZERO_ADDRESS = "0x" + "00" * 20
+
+
+class _Revert(Exception):
+    """Raised by a contract handler to mimic a Solidity ``require`` failure."""
+
+
+class _LocalChainAdapter(BaseAdapter):
+    """Serve JSON-RPC requests from a ``LocalChain`` instead of the network."""
+
+    def __init__(self, chain):
+        super().__init__()
+        self.chain = chain
+
+    def send(self, request, **kwargs):
+        status, content = self.chain.respond(request.body)
+        response = requests.Response()
+        response.status_code = status
+        if status == 200:
+            response.headers["Content-Type"] = "application/json"
+        response._content = content
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class _LocalChainHandler(BaseHTTPRequestHandler):
+    """Serve JSON-RPC over HTTP from ``self.server.chain``."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        try:
+            status, content = self.server.chain.respond(body)
+        except requests.ConnectionError:
+            self.close_connection = True
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalChain:
+    """Minimal chain holding PostStorage and CommentStorage state in memory."""
+
+    def __init__(self, contracts=None):
+        self.contracts = contracts or Settings.BLOCKCHAIN_CONTRACTS
+        self.blockNumber = 0
+        self.posts = {}
+        self.nextPostId = 0
+        self.comments = {}
+        self.nextCommentId = 0
+        self.logs = []
+        self.calls = Counter()
+        self.httpRequests = 0
+        self._lock = threading.Lock()
+        self.latency = 0.0
+        self.errorRate = 0.0
+        self.down = False
+        self.callErrorRate = 0.0
+        self.batchLimit = None
+        self.random = random.Random(0)
+        self._logIndex = count()
+        self._functions = {}
+        self._events = {}
+        for name in ("PostStorage", "CommentStorage"):
+            info = self.contracts[name]
+            address = info["address"].lower()
+            for entry in info["abi"]:
+                if entry.get("type") == "function":
+                    selector = function_abi_to_4byte_selector(entry)
+                    self._functions[(address, selector)] = (name, entry)
+                elif entry.get("type") == "event":
+                    self._events[(name, entry["name"])] = entry
+
+    # Fault injection --------------------------------------------------------
+
+    def injectFaults(
+        self,
+        latency=0.0,
+        errorRate=0.0,
+        down=False,
+        callErrorRate=0.0,
+        batchLimit=None,
+    ):
+        """
+        Delay every RPC request by ``latency`` seconds, answer a share
+        ``errorRate`` of them with HTTP 503 and refuse all of them while
+        ``down`` is set. A share ``callErrorRate`` of the ``eth_call``s gets a
+        JSON-RPC error instead of a result, and batches of more than
+        ``batchLimit`` calls are rejected as a whole, ``0`` rejects every
+        batch. Call without arguments to heal the chain.
+        """
+        self.latency = latency
+        self.errorRate = errorRate
+        self.down = down
+        self.callErrorRate = callErrorRate
+        self.batchLimit = batchLimit
+
+    # Contract state changes -------------------------------------------------
+
+    def createPost(
+        self,
+        author,
+        contentHash,
+        magnetURI="",
+        authorInfo="",
+        images=("banner",),
+        bannerImageIndex=0,
+        videos=(),
+    ):
+        """Store a post the way ``PostStorage.createPost`` does and mine a block."""
+        postId = self.nextPostId
+        self.nextPostId += 1
+        imageIds = [f"{postId}-{name}" for name in images]
+        self.posts[postId] = {
+            "author": to_checksum_address(author),
+            "contentHash": contentHash,
+            "magnetURI": magnetURI,
+            "authorInfo": authorInfo,
+            "exists": True,
+            "blacklisted": False,
+            "imageIds": imageIds,
+            "bannerImageId": imageIds[bannerImageIndex],
+            "videoIds": [f"{postId}-{name}" for name in videos],
+        }
+        self._mine(
+            ("PostCreated", [postId, author], [contentHash, magnetURI]),
+            ("BannerImageSet", [postId], [imageIds[bannerImageIndex]]),
+        )
+        return postId
+
+    def deletePost(self, postId):
+        self.posts.pop(postId, None)
+        self._mine(("PostDeleted", [postId], []))
+
+    def setPostBlacklist(self, postId, isBlacklisted):
+        self.posts[postId]["blacklisted"] = isBlacklisted
+        self._mine(("PostBlacklistUpdated", [postId], [isBlacklisted]))
+
+    def setBannerImage(self, postId, imageId):
+        self.posts[postId]["bannerImageId"] = imageId
+        self._mine(("BannerImageSet", [postId], [imageId]))
+
+    def updateAuthorInfo(self, postId, authorInfo):
+        self.posts[postId]["authorInfo"] = authorInfo
+        self._mine(("AuthorInfoUpdated", [postId], [authorInfo]))
+
+    def addComment(self, postId, author, content):
+        commentId = self.nextCommentId
+        self.nextCommentId += 1
+        self.comments[commentId] = {
+            "author": to_checksum_address(author),
+            "postId": postId,
+            "content": content,
+            "exists": True,
+            "blacklisted": False,
+        }
+        self._mine(("CommentAdded", [commentId, postId, author], [content]))
+        return commentId
+
+    def _mine(self, *events):
+        self.blockNumber += 1
+        for eventName, indexed, data in events:
+            contractName = (
+                "CommentStorage" if eventName.startswith("Comment") else "PostStorage"
+            )
+            entry = self._events[(contractName, eventName)]
+            indexedTypes = [i["type"] for i in entry["inputs"] if i["indexed"]]
+            dataTypes = [i["type"] for i in entry["inputs"] if not i["indexed"]]
+            topics = [event_abi_to_log_topic(entry)] + [
+                encode([kind], [value]) for kind, value in zip(indexedTypes, indexed)
+            ]
+            self.logs.append(
+                {
+                    "address": self.contracts[contractName]["address"],
+                    "topics": ["0x" + topic.hex() for topic in topics],
+                    "data": "0x" + encode(dataTypes, data).hex(),
+                    "blockNumber": hex(self.blockNumber),
+                    "blockHash": "0x" + self.blockNumber.to_bytes(32, "big").hex(),
+                    "transactionHash": "0x"
+                    + next(self._logIndex).to_bytes(32, "big").hex(),
+                    "transactionIndex": "0x0",
+                    "logIndex": hex(len(self.logs)),
+                    "removed": False,
+                }
+            )
+
+    # Contract views ---------------------------------------------------------
+
+    def _postTuple(self, postId):
+        post = self.posts.get(postId)
+        if post is None:
+            return (_ZERO_ADDRESS, "", "", "", False, False, [], "", [])
+        return (
+            post["author"],
+            post["contentHash"],
+            post["magnetURI"],
+            post["authorInfo"],
+            post["exists"],
+            post["blacklisted"],
+            post["imageIds"],
+            post["bannerImageId"],
+            post["videoIds"],
+        )
+
+    def _commentTuple(self, commentId):
+        comment = self.comments.get(commentId)
+        if comment is None:
+            return (_ZERO_ADDRESS, 0, "", False, False)
+        return (
+            comment["author"],
+            comment["postId"],
+            comment["content"],
+            comment["exists"],
+            comment["blacklisted"],
+        )
+
+    def _view(self, contractName, functionName, args):
+        if contractName == "PostStorage":
+            if functionName == "nextPostId":
+                return (self.nextPostId,)
+            if functionName == "posts":
+                post = self._postTuple(args[0])
+                return post[:6] + (post[7],)
+            if functionName == "getPost":
+                if args[0] not in self.posts:
+                    raise _Revert("no post")
+                return (self._postTuple(args[0]),)
+        if contractName == "CommentStorage":
+            if functionName == "nextCommentId":
+                return (self.nextCommentId,)
+            if functionName == "comments":
+                return self._commentTuple(args[0])
+            if functionName == "getComment":
+                if args[0] not in self.comments:
+                    raise _Revert("no comment")
+                return (self._commentTuple(args[0]),)
+        raise _Revert(f"{contractName}.{functionName} is not supported")
+
+    # JSON-RPC ---------------------------------------------------------------
+
+    def respond(self, body):
+        """
+        Answer one HTTP request body, applying the injected faults.
+
+        Returns:
+            tuple: ``(status, content)`` of the HTTP response.
+
+        Raises:
+            requests.ConnectionError: While the chain is down.
+        """
+        with self._lock:
+            self.httpRequests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.down:
+            raise requests.ConnectionError("LocalChain is down")
+        if self.errorRate and self.random.random() < self.errorRate:
+            return 503, b""
+        payload = json.loads(body)
+        if (
+            isinstance(payload, list)
+            and self.batchLimit is not None
+            and len(payload) > self.batchLimit
+        ):
+            reply = {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32600, "message": "batch size limit exceeded"},
+            }
+            return 200, json.dumps(reply).encode()
+        with self._lock:
+            reply = self.handle(payload)
+        return 200, json.dumps(reply).encode()
+
+    def handle(self, payload):
+        """Answer a single JSON-RPC request or a batch of them."""
+        if isinstance(payload, list):
+            return [self.handle(item) for item in payload]
+        method = payload.get("method")
+        self.calls[method] += 1
+        response = {"jsonrpc": "2.0", "id": payload.get("id")}
+        if (
+            method == "eth_call"
+            and self.callErrorRate
+            and self.random.random() < self.callErrorRate
+        ):
+            response["error"] = {"code": -32005, "message": "request limit exceeded"}
+            return response
+        try:
+            response["result"] = self._dispatch(method, payload.get("params") or [])
+        except _Revert as exc:
+            response["error"] = {
+                "code": 3,
+                "message": f"execution reverted: {exc}",
+                "data": "0x08c379a0" + encode(["string"], [str(exc)]).hex(),
+            }
+        except Exception as exc:
+            response["error"] = {"code": -32601, "message": str(exc)}
+        return response
+
+    def _dispatch(self, method, params):
+        if method == "eth_chainId":
+            return hex(324)
+        if method == "net_version":
+            return "324"
+        if method == "eth_blockNumber":
+            return hex(self.blockNumber)
+        if method == "eth_call":
+            return self._ethCall(params[0])
+        if method == "eth_getLogs":
+            return self._getLogs(params[0])
+        raise ValueError(f"Method {method} not supported by LocalChain")
+
+    def _ethCall(self, transaction):
+        data = bytes.fromhex(transaction["data"][2:])
+        key = (transaction["to"].lower(), data[:4])
+        if key not in self._functions:
+            raise _Revert("unknown function")
+        contractName, entry = self._functions[key]
+        args = decode(get_abi_input_types(entry), data[4:])
+        result = self._view(contractName, entry["name"], args)
+        return "0x" + encode(get_abi_output_types(entry), result).hex()
+
+    def _getLogs(self, params):
+        fromBlock = self._blockParam(params.get("fromBlock", "earliest"))
+        toBlock = self._blockParam(params.get("toBlock", "latest"))
+        addresses = params.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if addresses:
+            addresses = {address.lower() for address in addresses}
+        topics = params.get("topics") or []
+        matched = []
+        for log in self.logs:
+            blockNumber = int(log["blockNumber"], 16)
+            if not fromBlock <= blockNumber <= toBlock:
+                continue
+            if addresses and log["address"].lower() not in addresses:
+                continue
+            if not self._topicsMatch(log["topics"], topics):
+                continue
+            matched.append(log)
+        return matched
+
+    def _blockParam(self, value):
+        if value in ("latest", "pending", "safe", "finalized"):
+            return self.blockNumber
+        if value == "earliest":
+            return 0
+        return int(value, 16) if isinstance(value, str) else int(value)
+
+    @staticmethod
+    def _topicsMatch(logTopics, filterTopics):
+        for position, expected in enumerate(filterTopics):
+            if expected is None:
+                continue
+            if position >= len(logTopics):
+                return False
+            options = expected if isinstance(expected, list) else [expected]
+            if logTopics[position].lower() not in [o.lower() for o in options]:
+                return False
+        return True
+
+    # Clients ----------------------------------------------------------------
+
+    def session(self):
+        """Return a ``requests`` session whose RPC traffic stays in-process."""
+        session = requests.Session()
+        session.mount(LOCAL_CHAIN_URL, _LocalChainAdapter(self))
+        return session
+
+    def serve(self, host="127.0.0.1", port=0):
+        """
+        Serve this chain over HTTP from a daemon thread.
+
+        Unlike ``install`` this also reaches clients that do not use
+        ``requests``, such as the async reader in ``utils.asyncChain``.
+
+        Returns:
+            str: The RPC URL to put in ``Settings.BLOCKCHAIN_RPC_URL``.
+        """
+        server = ThreadingHTTPServer((host, port), _LocalChainHandler)
+        server.daemon_threads = True
+        server.chain = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f"http://{host}:{server.server_port}/"
+
+    def install(self):
+        """Point ``Settings.BLOCKCHAIN_RPC_URL`` and the shared clients at this chain."""
+        web3Client.mountAdapter(LOCAL_CHAIN_URL, _LocalChainAdapter(self))
+        Settings.BLOCKCHAIN_RPC_URL = LOCAL_CHAIN_URL
+
+    def web3(self):
+        """Return a ``Web3`` instance connected to this chain."""
+        return Web3(Web3.HTTPProvider(LOCAL_CHAIN_URL, session=self.session()))
@@ -0,0 +1,575 @@
+"""
+This module contains the versioned schema migrations of the app's databases.
+
+Each database stores the number of the last migration applied to it in
+``PRAGMA user_version``. ``migrate`` reads it in constant time and applies the
+pending entries of ``MIGRATIONS`` in order, each in its own transaction
+together with the new ``user_version``, so a failing migration leaves the
+database at the previous version. A step is either an SQL statement or a
+function taking the cursor. Migrations are append-only: never edit one that
+has shipped, add a new one instead. Steps spell out the SQL they run rather
+than calling the modules using the schema, whose code keeps changing.
+
+Databases created before the runner existed are at version 0; the baseline
+migrations use ``if not exists`` and the column migrations check
+``PRAGMA table_info`` first, so they bring such databases up to date safely.
+
+Print the pending migrations without applying them from the ``app`` directory:
+
+    python -m utils.migrations --dry-run
+"""
+
+import argparse
+
+from passlib.hash import sha512_crypt as encryption
+from settings import Settings
+from utils.db import getConnection
+from utils.log import Log
+from utils.time import currentTimeStamp
+
+
+def addColumn(table, column, definition):
+    """Return a step adding ``column`` to ``table`` unless it already exists."""
+
+    def step(cursor):
+        columns = [row[1] for row in cursor.execute(f"pragma table_info({table})")]
+        if column not in columns:
+            cursor.execute(f"alter table {table} add column {column} {definition}")
+
+    return step
+
+
+def defaultAdmin(cursor):
+    """Insert the default admin account into an empty users table."""
+    if not Settings.DEFAULT_ADMIN:
+        return
+    if cursor.execute("select 1 from users limit 1").fetchone():
+        return
+    cursor.execute(
+        """
+        insert into Users(userName,email,password,profilePicture,role,points,timeStamp,isVerified) \
+        values(?,?,?,?,?,?,?,?)
+        """,
+        (
+            Settings.DEFAULT_ADMIN_USERNAME,
+            Settings.DEFAULT_ADMIN_EMAIL,
+            encryption.hash(Settings.DEFAULT_ADMIN_PASSWORD),
+            Settings.DEFAULT_ADMIN_PROFILE_PICTURE,
+            "admin",
+            Settings.DEFAULT_ADMIN_POINT,
+            currentTimeStamp(),
+            "True",
+        ),
+    )
+    Log.success(
+        f'Admin: "{Settings.DEFAULT_ADMIN_USERNAME}" added to database as initial admin',
+    )
+
+
+# Database setting -> ordered (version, description, steps)
+MIGRATIONS = {
+    "DB_USERS_ROOT": [
+        (
+            1,
+            "users table and default admin",
+            [
+                """
+                create table if not exists Users(
+                    "userID"    integer not null unique,
+                    "userName"  text unique,
+                    "email" text unique,
+                    "password"  text,
+                    "profilePicture" text,
+                    "role"  text,
+                    "points"    integer,
+                    "timeStamp" integer,
+                    "isVerified"    text,
+                    primary key("userID" autoincrement)
+                )""",
+                defaultAdmin,
+            ],
+        ),
+        (
+            2,
+            "userName index",
+            ["create index if not exists usersUserNameLower on users(lower(userName))"],
+        ),
+    ],
+    "DB_POSTS_ROOT": [
+        (
+            1,
+            "posts, postDownvotes, deletedPosts, onchainPosts and indexerState tables",
+            [
+                """
+                create table if not exists posts(
+                    "id"    integer not null unique,
+                    "title" text not null,
+                    "tags"  text not null,
+                    "content"   text not null,
+                    "banner"    BLOB not null,
+                    "author"    text not null,
+                    "views" integer,
+                    "timeStamp" integer,
+                    "lastEditTimeStamp" integer,
+                    "category"  text not null,
+                    "urlID" TEXT NOT NULL,
+                    "abstract" text not null default "",
+                    primary key("id" autoincrement)
+                )""",
+                """
+                create table if not exists postDownvotes(
+                    "id" integer not null,
+                    "postID" integer not null,
+                    "user" text not null,
+                    primary key("id" autoincrement),
+                    unique(postID, user)
+                )""",
+                """
+                create table if not exists deletedPosts(
+                    "urlID" text not null unique
+                )""",
+                """
+                create table if not exists onchainPosts(
+                    "postID" integer not null,
+                    "author" text,
+                    "contentHash" text,
+                    "magnetURI" text,
+                    "authorInfo" text,
+                    "postExists" integer default 1,
+                    "blacklisted" integer default 0,
+                    "imageIds" text default '[]',
+                    "bannerImageId" text,
+                    "videoIds" text default '[]',
+                    "blockNumber" integer,
+                    primary key("postID")
+                )""",
+                """
+                create table if not exists indexerState(
+                    "name" text not null,
+                    "lastBlock" integer,
+                    primary key("name")
+                )""",
+            ],
+        ),
+        (
+            2,
+            "posts.downvotes column",
+            [addColumn("posts", "downvotes", "integer default 0")],
+        ),
+        (
+            3,
+            "author, category and urlID indexes",
+            [
+                "create index if not exists postsAuthorTimeStamp on posts(author, timeStamp desc)",
+                "create index if not exists postsCategoryLower on posts(lower(category))",
+                "create index if not exists postsUrlID on posts(urlID)",
+            ],
+        ),
+        (
+            4,
+            "category index covering the keyset pagination order",
+            [
+                "create index if not exists postsCategoryLowerTimeStamp on posts(lower(category), timeStamp, id)",
+                "drop index if exists postsCategoryLower",
+            ],
+        ),
+        (
+            5,
+            "trigger-maintained post and author view counters",
+            [
+                """
+                create table if not exists counters(
+                    "name" text not null,
+                    "key" text not null default '',
+                    "value" integer not null default 0,
+                    primary key("name", "key")
+                ) without rowid""",
+                """
+                create trigger if not exists postsCountersInsert after insert on posts begin
+                    insert into counters(name, key, value) values('posts', '', 1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('authorViews', new.author, coalesce(new.views, 0))
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists postsCountersDelete after delete on posts begin
+                    insert into counters(name, key, value) values('posts', '', -1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('authorViews', old.author, -coalesce(old.views, 0))
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists postsCountersUpdate after update of views, author on posts begin
+                    insert into counters(name, key, value) values('authorViews', old.author, -coalesce(old.views, 0))
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('authorViews', new.author, coalesce(new.views, 0))
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                "delete from counters where name in ('posts', 'authorViews')",
+                "insert into counters(name, key, value) select 'posts', '', count(*) from posts",
+                "insert into counters(name, key, value) select 'authorViews', author, coalesce(sum(views), 0) from posts group by author",
+            ],
+        ),
+        (
+            6,
+            "onchainPosts block index for the post feed version",
+            [
+                "create index if not exists onchainPostsBlockNumber on onchainPosts(blockNumber)",
+            ],
+        ),
+        (
+            7,
+            "drop the category index; category pages read the post feed",
+            ["drop index if exists postsCategoryLowerTimeStamp"],
+        ),
+    ],
+    "DB_COMMENTS_ROOT": [
+        (
+            1,
+            "comments, commentVotes and deletedComments tables",
+            [
+                """
+                create table if not exists comments(
+                    "id"    integer not null,
+                    "post"  integer,
+                    "comment"   text,
+                    "user"  text,
+                    "timeStamp" integer,
+                    "upvotes" integer default 0,
+                    primary key("id" autoincrement)
+                )""",
+                """
+                create table if not exists commentVotes(
+                    "id" integer not null,
+                    "commentID" integer not null,
+                    "user" text not null,
+                    primary key("id" autoincrement),
+                    unique(commentID, user)
+                )""",
+                """
+                create table if not exists deletedComments(
+                    "commentID" integer not null unique
+                )""",
+            ],
+        ),
+        (
+            2,
+            "comments.upvotes column",
+            [addColumn("comments", "upvotes", "integer default 0")],
+        ),
+        (
+            3,
+            "user and post indexes",
+            [
+                "create index if not exists commentsUserLower on comments(lower(user), timeStamp desc)",
+                "create index if not exists commentsPost on comments(post)",
+            ],
+        ),
+        (
+            4,
+            "trigger-maintained comment counter",
+            [
+                """
+                create table if not exists counters(
+                    "name" text not null,
+                    "key" text not null default '',
+                    "value" integer not null default 0,
+                    primary key("name", "key")
+                ) without rowid""",
+                """
+                create trigger if not exists commentsCountersInsert after insert on comments begin
+                    insert into counters(name, key, value) values('comments', '', 1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists commentsCountersDelete after delete on comments begin
+                    insert into counters(name, key, value) values('comments', '', -1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                "delete from counters where name = 'comments'",
+                "insert into counters(name, key, value) select 'comments', '', count(*) from comments",
+            ],
+        ),
+    ],
+    "DB_ANALYTICS_ROOT": [
+        (
+            1,
+            "postsAnalytics, userActivity, postStats and postActiveReaders tables",
+            [
+                """
+                create table if not exists postsAnalytics(
+                    "id"    integer not null,
+                    "postID"  integer,
+                    "visitorUserName"  text,
+                    "country" text,
+                    "os" text,
+                    "continent" text,
+                    "timeSpendDuration" int default 0,
+                    "timeStamp" integer,
+                    primary key("id" autoincrement)
+                )""",
+                """
+                create table if not exists userActivity(
+                    "id" integer not null,
+                    "ip" text,
+                    "path" text,
+                    "method" text,
+                    "country" text,
+                    "userName" text,
+                    "timeStamp" integer,
+                    primary key("id" autoincrement)
+                )""",
+                """
+                create table if not exists postStats(
+                    postID INTEGER PRIMARY KEY,
+                    estimatedReadTime INTEGER DEFAULT 0,
+                    avgTimeOnPage REAL DEFAULT 0,
+                    totalReaders INTEGER DEFAULT 0,
+                    currentReaders INTEGER DEFAULT 0
+                )""",
+                """
+                create table if not exists postActiveReaders(
+                    postID INTEGER,
+                    sessionID TEXT,
+                    lastSeen INTEGER,
+                    PRIMARY KEY (postID, sessionID)
+                )""",
+            ],
+        ),
+        (
+            2,
+            "postsAnalytics, userActivity and postActiveReaders indexes",
+            [
+                "create index if not exists postsAnalyticsPostIDTimeStamp on postsAnalytics(postID, timeStamp)",
+                "create index if not exists postsAnalyticsTimeStamp on postsAnalytics(timeStamp)",
+                "create index if not exists userActivityTimeStamp on userActivity(timeStamp desc)",
+                "create index if not exists postActiveReadersLastSeen on postActiveReaders(lastSeen)",
+            ],
+        ),
+        (
+            3,
+            "trigger-maintained visit and per-post visitor counters",
+            [
+                """
+                create table if not exists counters(
+                    "name" text not null,
+                    "key" text not null default '',
+                    "value" integer not null default 0,
+                    primary key("name", "key")
+                ) without rowid""",
+                """
+                create trigger if not exists postsAnalyticsCountersInsert after insert on postsAnalytics begin
+                    insert into counters(name, key, value) values('postsAnalytics', '', 1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('postVisitors', coalesce(new.postID, ''), 1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists postsAnalyticsCountersDelete after delete on postsAnalytics begin
+                    insert into counters(name, key, value) values('postsAnalytics', '', -1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('postVisitors', coalesce(old.postID, ''), -1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists postsAnalyticsCountersUpdate after update of postID on postsAnalytics begin
+                    insert into counters(name, key, value) values('postVisitors', coalesce(old.postID, ''), -1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('postVisitors', coalesce(new.postID, ''), 1)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                "delete from counters where name in ('postsAnalytics', 'postVisitors')",
+                "insert into counters(name, key, value) select 'postsAnalytics', '', count(*) from postsAnalytics",
+                "insert into counters(name, key, value) select 'postVisitors', coalesce(postID, ''), count(*) from postsAnalytics group by postID",
+            ],
+        ),
+        (
+            4,
+            "minute, hour and day traffic rollups",
+            [
+                """
+                create table if not exists trafficMinute(
+                    "postID" integer not null,
+                    "bucket" integer not null,
+                    "visits" integer not null default 0,
+                    primary key("postID", "bucket")
+                ) without rowid""",
+                "create index if not exists trafficMinuteBucket on trafficMinute(bucket, visits)",
+                """
+                create table if not exists trafficHour(
+                    "postID" integer not null,
+                    "bucket" integer not null,
+                    "visits" integer not null default 0,
+                    primary key("postID", "bucket")
+                ) without rowid""",
+                "create index if not exists trafficHourBucket on trafficHour(bucket, visits)",
+                """
+                create table if not exists trafficDay(
+                    "postID" integer not null,
+                    "bucket" integer not null,
+                    "visits" integer not null default 0,
+                    primary key("postID", "bucket")
+                ) without rowid""",
+                "create index if not exists trafficDayBucket on trafficDay(bucket, visits)",
+                "delete from trafficMinute",
+                """
+                insert into trafficMinute(postID, bucket, visits)
+                select coalesce(postID, 0), timeStamp - timeStamp % 60, count(*)
+                from postsAnalytics where timeStamp is not null
+                group by 1, 2""",
+                "delete from trafficHour",
+                """
+                insert into trafficHour(postID, bucket, visits)
+                select coalesce(postID, 0), timeStamp - timeStamp % 3600, count(*)
+                from postsAnalytics where timeStamp is not null
+                group by 1, 2""",
+                "delete from trafficDay",
+                """
+                insert into trafficDay(postID, bucket, visits)
+                select coalesce(postID, 0), timeStamp - timeStamp % 86400, count(*)
+                from postsAnalytics where timeStamp is not null
+                group by 1, 2""",
+            ],
+        ),
+        (
+            5,
+            "postsAnalyticsCompacted table and archived visitor counters",
+            [
+                """
+                create table if not exists postsAnalyticsCompacted(
+                    "postID" integer not null,
+                    "country" text not null,
+                    "os" text not null,
+                    "visits" integer not null default 0,
+                    "timeSpendDuration" integer not null default 0,
+                    primary key("postID", "country", "os")
+                ) without rowid""",
+                """
+                create trigger if not exists postsAnalyticsCompactedCountersInsert after insert on postsAnalyticsCompacted begin
+                    insert into counters(name, key, value) values('archivedVisits', '', new.visits)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('archivedPostVisitors', new.postID, new.visits)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists postsAnalyticsCompactedCountersDelete after delete on postsAnalyticsCompacted begin
+                    insert into counters(name, key, value) values('archivedVisits', '', -old.visits)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('archivedPostVisitors', old.postID, -old.visits)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                """
+                create trigger if not exists postsAnalyticsCompactedCountersUpdate after update of visits on postsAnalyticsCompacted begin
+                    insert into counters(name, key, value) values('archivedVisits', '', new.visits - old.visits)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                    insert into counters(name, key, value) values('archivedPostVisitors', new.postID, new.visits - old.visits)
+                    on conflict(name, key) do update set value = value + excluded.value;
+                end""",
+                "delete from counters where name in ('archivedVisits', 'archivedPostVisitors')",
+                "insert into counters(name, key, value) select 'archivedVisits', '', coalesce(sum(visits), 0) from postsAnalyticsCompacted",
+                "insert into counters(name, key, value) select 'archivedPostVisitors', postID, sum(visits) from postsAnalyticsCompacted group by postID",
+            ],
+        ),
+    ],
+    "DB_BLACKLIST_ROOT": [
+        (
+            1,
+            "blacklist table",
+            [
+                """
+                create table if not exists blacklist(
+                    "id" integer not null,
+                    "type" text,
+                    "contentID" integer,
+                    primary key("id" autoincrement)
+                )""",
+            ],
+        ),
+    ],
+}
+
+
+def schemaVersion(path):
+    """Return the ``user_version`` of the database at ``path``."""
+    connection = getConnection(path)
+    version = connection.execute("pragma user_version").fetchone()[0]
+    connection.close()
+    return version
+
+
+def pending(setting):
+    """Return the migrations of ``setting`` not yet applied to its database."""
+    version = schemaVersion(getattr(Settings, setting))
+    return [migration for migration in MIGRATIONS[setting] if migration[0] > version]
+
+
+def migrate(setting, dryRun=False):
+    """
+    Applies the pending migrations of one database.
+
+    Parameters:
+        setting (str): Name of the database setting, e.g. ``"DB_POSTS_ROOT"``.
+        dryRun (bool): Only log what would be applied.
+
+    Returns:
+        int: The database's version afterwards.
+    """
+    path = getattr(Settings, setting)
+    version = schemaVersion(path)
+    todo = pending(setting)
+    if not todo:
+        Log.info(f'Database: "{path}" is at version {version}')
+        return version
+    if dryRun:
+        for number, description, _ in todo:
+            Log.info(
+                f'Database: "{path}" would apply migration {number}: {description}'
+            )
+        return version
+
+    connection = getConnection(path)
+    cursor = connection.cursor()
+    for number, description, steps in todo:
+        try:
+            cursor.execute("begin")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(f"pragma user_version = {int(number)}")
+            connection.commit()
+        except Exception as exc:
+            connection.rollback()
+            Log.error(
+                f'Database: "{path}" migration {number} ({description}) failed, '
+                f"staying at version {version}: {exc}"
+            )
+            break
+        version = number
+        Log.success(f'Database: "{path}" migrated to version {number}: {description}')
+    connection.close()
+    return version
+
+
+def migrateAll(dryRun=False):
+    """Apply the pending migrations of every database."""
+    return {setting: migrate(setting, dryRun) for setting in MIGRATIONS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="list pending migrations only"
+    )
+    args = parser.parse_args()
+    for setting, version in migrateAll(args.dry_run).items():
+        todo = pending(setting)
+        print(
+            f"{getattr(Settings, setting)}: version {version}"
+            + (f", pending {[number for number, _, _ in todo]}" if todo else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
-import sqlite3
 from math import ceil
 
 from flask import request
-from utils.log import Log
+from utils.db import getConnection
 
 
 def paginate_query(db_path, count_query, select_query, params=None, per_page=9):
@@ -23,10 +22,7 @@ def paginate_query(db_path, count_query, select_query, params=None, per_page=9):
 
     page = request.args.get("page", 1, type=int)
 
-    Log.database(f"Connecting to '{db_path}' database")
-
-    connection = sqlite3.connect(db_path)
-    connection.set_trace_callback(Log.database)
+    connection = getConnection(db_path)
     cursor = connection.cursor()
 
     cursor.execute(count_query, params)
@@ -0,0 +1,117 @@
+"""
+This module contains the in-process cache for decoded on-chain posts.
+
+Popular posts used to be fetched and split on ``"|"`` on every view. The
+``postCache`` instance keeps the decoded ``PostRecord`` per post id in LRU order,
+bounded by ``Settings.POST_CACHE_MAX_ENTRIES`` and
+``Settings.POST_CACHE_MAX_BYTES``, expires entries after
+``Settings.POST_CACHE_TTL`` seconds and is invalidated by the post indexer when
+it sees an event for a cached post.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from settings import Settings
+from utils.postRecord import PostRecord
+
+
+def _recordSize(record):
+    size = sys.getsizeof(record)
+    for name in PostRecord.__slots__:
+        value = getattr(record, name)
+        size += sys.getsizeof(value)
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class PostCache:
+    """Thread-safe LRU cache with a TTL, an entry bound and a memory ceiling."""
+
+    def __init__(self, maxEntries, maxBytes, ttl):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, postID):
+        """Return the cached record for ``postID`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(postID)
+            if entry is None:
+                self.misses += 1
+                return None
+            expiresAt, size, record = entry
+            if expiresAt < time.monotonic():
+                self._remove(postID)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(postID)
+            self.hits += 1
+            return record
+
+    def set(self, postID, record):
+        """Store ``record`` for ``postID`` and evict the least recently used entries."""
+        size = _recordSize(record)
+        if size > self.maxBytes:
+            return
+        with self._lock:
+            if postID in self._entries:
+                self._remove(postID)
+            self._entries[postID] = (time.monotonic() + self.ttl, size, record)
+            self._bytes += size
+            while len(self._entries) > self.maxEntries or self._bytes > self.maxBytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, postID):
+        """Drop ``postID`` from the cache, e.g. after a delete or blacklist event."""
+        with self._lock:
+            if postID in self._entries:
+                self._remove(postID)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, postID):
+        _, size, _ = self._entries.pop(postID)
+        self._bytes -= size
+
+    def stats(self):
+        """Return hit, miss and eviction counters and the current footprint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxEntries": self.maxEntries,
+                "maxBytes": self.maxBytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+postCache = PostCache(
+    maxEntries=Settings.POST_CACHE_MAX_ENTRIES,
+    maxBytes=Settings.POST_CACHE_MAX_BYTES,
+    ttl=Settings.POST_CACHE_TTL,
+)
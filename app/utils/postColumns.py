@@ -0,0 +1,65 @@
+"""
+This module contains the named column layout of the ``posts`` table.
+
+Templates and routes read post rows by position (``post[1]`` is the title,
+``post[10]`` the ``urlID``). ``postSelect`` builds a select list that keeps
+that layout but reads only the named columns; every other column is selected
+as ``null``. ``LIST_SELECT`` is the projection of the list views: it leaves
+out ``content`` and the ``banner`` BLOB, which is served by
+``/post/<id>/banner`` instead. ``PostRow`` rows, produced by
+``postRowFactory``, can be read by position or by column name. Set the factory
+on the cursor, never on a pooled connection, which other callers of the
+request reuse.
+"""
+
+from collections import namedtuple
+
+POST_COLUMNS = (
+    "id",
+    "title",
+    "tags",
+    "content",
+    "banner",
+    "author",
+    "views",
+    "timeStamp",
+    "lastEditTimeStamp",
+    "category",
+    "urlID",
+    "abstract",
+    "downvotes",
+)
+
+LIST_COLUMNS = tuple(
+    column for column in POST_COLUMNS if column not in ("content", "banner")
+)
+
+PostRow = namedtuple("PostRow", POST_COLUMNS)
+
+
+def postSelect(*columns, table="posts"):
+    """
+    Returns a select list in ``POST_COLUMNS`` order reading only ``columns``.
+
+    Args:
+        columns (str): Columns to read; the others are selected as ``null``.
+        table (str): Table or alias to qualify the columns with.
+
+    Returns:
+        str: e.g. ``posts.id, posts.title, null as tags, ...``.
+    """
+    unknown = set(columns) - set(POST_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown posts columns: {sorted(unknown)}")
+    return ", ".join(
+        f"{table}.{column}" if column in columns else f"null as {column}"
+        for column in POST_COLUMNS
+    )
+
+
+LIST_SELECT = postSelect(*LIST_COLUMNS)
+
+
+def postRowFactory(cursor, row):
+    """``sqlite3`` row factory returning ``PostRow`` tuples."""
+    return PostRow(*row)
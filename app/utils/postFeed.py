@@ -0,0 +1,199 @@
+"""
+This module builds the compact post feed served by ``/api/v1/posts``.
+
+The feed is a newest-first snapshot of every existing post, read from the
+``onchainPosts`` mirror kept by the post indexer. The snapshot is rebuilt only
+when the mirrored posts change or an admin deletes a post, so a page view
+costs a couple of cheap SQLite lookups instead of one ``posts(id)`` RPC call
+per post. Polls of the indexer that find no events leave the snapshot and the
+ETags of its pages unchanged.
+Until the indexer has synced once the snapshot is read from the chain in
+JSON-RPC batches and kept for ``Settings.POST_FEED_TTL`` seconds.
+
+Pages are cut from per-filter views of the snapshot: the posts matching one
+category and blacklist filter, with their ids, built once per snapshot.
+``getFeedPage`` seeks past the ``cursor`` id by bisection instead of scanning
+the posts before it, and reads the filter's total from the view.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
+
+from settings import Settings
+from utils.db import getConnection
+from utils.log import Log
+from utils.postIndexer import stateName
+from utils.postRecord import PostRecord
+from utils.web3Client import batchCall, getContract
+
+# Views kept per snapshot; categories come from the query string
+FEED_VIEWS_MAX = 64
+
+_lock = threading.Lock()
+_snapshot = {"version": None, "builtAt": 0.0, "posts": [], "views": {}}
+
+
+def _feedItem(postID, author, contentHash, blacklisted, bannerImageId):
+    return PostRecord(
+        postID,
+        author,
+        contentHash,
+        blacklisted=blacklisted,
+        bannerImageId=bannerImageId or "",
+        withBody=False,
+    )
+
+
+def _version(cursor):
+    """
+    Return ``(state, lastChange, deletedPosts)`` or ``None`` if never indexed.
+
+    Every indexed event stamps its post's row with the event's block, so the
+    newest ``blockNumber`` only moves when the mirror changes; the indexer's
+    ``lastBlock`` moves on every poll.
+    """
+    state = stateName()
+    cursor.execute("select 1 from indexerState where name = ?", (state,))
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute("select max(blockNumber) from onchainPosts")
+    lastChange = cursor.fetchone()[0]
+    cursor.execute("select count(*) from deletedPosts")
+    deleted = cursor.fetchone()[0]
+    return (state, lastChange, deleted)
+
+
+def _deletedPosts(cursor):
+    cursor.execute("select urlID from deletedPosts")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _postsFromIndex(cursor):
+    deleted = _deletedPosts(cursor)
+    cursor.execute(
+        """select postID, author, contentHash, blacklisted, bannerImageId
+        from onchainPosts where postExists = 1 order by postID desc"""
+    )
+    return [_feedItem(*row) for row in cursor.fetchall() if str(row[0]) not in deleted]
+
+
+def _postsFromChain(cursor):
+    deleted = _deletedPosts(cursor)
+    nextPostId = getContract("PostStorage").functions.nextPostId().call()
+    ids = list(range(nextPostId - 1, -1, -1))
+    posts = []
+    for postID, data in zip(
+        ids, batchCall("PostStorage", "posts", [(pid,) for pid in ids])
+    ):
+        # posts(id): (author, contentHash, magnetURI, authorInfo, exists, blacklisted, bannerImageId)
+        if data is None or not data[4] or str(postID) in deleted:
+            continue
+        posts.append(_feedItem(postID, data[0], data[1], data[5], data[6]))
+    return posts
+
+
+def getFeedSnapshot():
+    """
+    Returns the current feed snapshot, rebuilding it if it is stale.
+
+    Returns:
+        tuple: ``(version, posts)`` where ``posts`` is a newest-first list of
+        body-less ``PostRecord`` objects and ``version`` changes whenever the
+        list does.
+    """
+    connection = getConnection(Settings.DB_POSTS_ROOT)
+    cursor = connection.cursor()
+    try:
+        version = _version(cursor)
+        with _lock:
+            if version is not None and _snapshot["version"] == version:
+                return version, _snapshot["posts"]
+            if (
+                version is None
+                and _snapshot["version"] is not None
+                and _snapshot["version"][0] == "chain"
+                and time.monotonic() - _snapshot["builtAt"] < Settings.POST_FEED_TTL
+            ):
+                return _snapshot["version"], _snapshot["posts"]
+        if version is None:
+            Log.info("Post feed: indexer has not synced yet, reading from chain")
+            posts = _postsFromChain(cursor)
+            version = ("chain", time.time())
+        else:
+            posts = _postsFromIndex(cursor)
+    finally:
+        connection.close()
+    with _lock:
+        _snapshot.update(
+            version=version, builtAt=time.monotonic(), posts=posts, views={}
+        )
+    Log.info(f"Post feed: snapshot rebuilt with {len(posts)} posts")
+    return version, posts
+
+
+def _feedView(version, posts, category, blacklisted):
+    """
+    Returns the posts of the snapshot ``version`` passing one filter.
+
+    Returns:
+        tuple: ``(posts, keys)``, newest first; ``keys`` holds the negated
+        post ids in ascending order for ``bisect``.
+    """
+    key = (category, blacklisted)
+    with _lock:
+        if _snapshot["version"] == version and key in _snapshot["views"]:
+            return _snapshot["views"][key]
+    selected = [
+        post
+        for post in posts
+        if (category is None or post.category.lower() == category)
+        and (blacklisted == "include" or post.blacklisted == (blacklisted == "only"))
+    ]
+    view = (selected, [-post.postID for post in selected])
+    with _lock:
+        views = _snapshot["views"]
+        if _snapshot["version"] == version and len(views) < FEED_VIEWS_MAX:
+            views[key] = view
+    return view
+
+
+def getFeedPage(category=None, blacklisted="exclude", cursor=None, limit=None):
+    """
+    Returns one page of the post feed.
+
+    Args:
+        category (str): Only return posts in this category (case-insensitive).
+        blacklisted (str): ``"exclude"`` (default), ``"include"`` or ``"only"``.
+        cursor (int): Return posts with an id lower than this one.
+        limit (int): Page size, capped at ``Settings.POST_FEED_MAX_PAGE_SIZE``.
+
+    Returns:
+        tuple: ``(page, etag)`` where ``page`` holds ``posts``,
+        ``nextCursor`` (``None`` on the last page) and ``total``, the number
+        of posts passing the filters.
+    """
+    limit = min(
+        max(limit or Settings.POST_FEED_PAGE_SIZE, 1), Settings.POST_FEED_MAX_PAGE_SIZE
+    )
+    category = category.lower() if category else None
+    version, posts = getFeedSnapshot()
+    posts, keys = _feedView(version, posts, category, blacklisted)
+
+    start = 0 if cursor is None else bisect_right(keys, -cursor)
+    selected = posts[start : start + limit]
+    nextCursor = selected[-1].postID if start + limit < len(posts) else None
+
+    page = {
+        "posts": [post.header() for post in selected],
+        "nextCursor": nextCursor,
+        "total": len(posts),
+    }
+    etag = hashlib.sha1(
+        json.dumps(
+            [version, category, blacklisted, cursor, limit], default=str
+        ).encode()
+    ).hexdigest()
+    return page, etag
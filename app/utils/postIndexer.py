@@ -0,0 +1,337 @@
+"""
+This module mirrors the PostStorage contract into the posts database.
+
+``PostIndexer`` tails the ``PostCreated``, ``PostDeleted``,
+``PostBlacklistUpdated``, ``BannerImageSet`` and ``AuthorInfoUpdated`` events
+into the ``onchainPosts`` table and remembers the last processed block in
+``indexerState`` so it can resume after a restart. ``getIndexedPost`` is the
+read API used by the post routes instead of a live RPC call. Every applied
+event invalidates the post's entry in ``postCache``.
+
+The posts a bootstrap or a block range needs are fetched with one
+``batchCall`` before anything is written; the changes are then applied in one
+short job on the posts database writer, so the write lock is never held
+across RPC round trips.
+
+The ``indexerState`` row is keyed by the contract address (``stateName``).
+When the PostStorage address is changed from ``/admin/contracts`` the
+mirror no longer matches the configured contract: ``getIndexedPost`` stops
+serving it and the next sync resets ``onchainPosts`` and indexes the new
+contract from scratch.
+"""
+
+import json
+import threading
+
+from hexbytes import HexBytes
+from settings import Settings
+from utils.db import getConnection
+from utils.dbWriter import write
+from utils.log import Log
+from utils.postCache import postCache
+from utils.web3Client import batchCall, getContract, getWeb3
+from web3 import Web3
+
+INDEXER_NAME = "PostStorage"
+
+TRACKED_EVENTS = (
+    "PostCreated",
+    "PostDeleted",
+    "PostBlacklistUpdated",
+    "BannerImageSet",
+    "AuthorInfoUpdated",
+)
+
+
+def stateName(address=None):
+    """Return the ``indexerState`` row name of the PostStorage contract at ``address``."""
+    address = address or Settings.BLOCKCHAIN_CONTRACTS["PostStorage"]["address"]
+    return f"{INDEXER_NAME}:{address.lower()}"
+
+
+def _rowToPost(row):
+    """Convert an ``onchainPosts`` row into the ``getPost`` tuple layout."""
+    return (
+        row[0],
+        row[1],
+        row[2],
+        row[3],
+        bool(row[4]),
+        bool(row[5]),
+        json.loads(row[6]),
+        row[7],
+        json.loads(row[8]),
+    )
+
+
+def getIndexedPost(postID: int, dbPath=None):
+    """
+    Returns the mirrored on-chain post for ``postID``.
+
+    Args:
+        postID (int): On-chain post id.
+        dbPath (str): Database to read from, defaults to the posts database.
+
+    Returns:
+        tuple | bool | None: The post in ``getPost`` tuple layout, ``False`` if
+        the indexer saw the post being deleted, or ``None`` if the post has not
+        been indexed yet or the mirror is of another PostStorage address.
+    """
+    try:
+        connection = getConnection(dbPath or Settings.DB_POSTS_ROOT)
+        cursor = connection.cursor()
+        cursor.execute(
+            """select author, contentHash, magnetURI, authorInfo, postExists, blacklisted,
+            imageIds, bannerImageId, videoIds from onchainPosts where postID = ?
+            and exists(select 1 from indexerState where name = ?)""",
+            (postID, stateName()),
+        )
+        row = cursor.fetchone()
+        connection.close()
+    except Exception as exc:
+        Log.error(f"Reading indexed post: '{postID}' failed: {exc}")
+        return None
+    if row is None:
+        return None
+    if not row[4]:
+        return False
+    return _rowToPost(row)
+
+
+class PostIndexer:
+    """
+    Background worker copying PostStorage events into SQLite.
+
+    The contract object is looked up with ``getContract`` on every sync, so
+    an address change takes effect on the next one.
+    """
+
+    def __init__(self, rpcUrl=None, dbPath=None):
+        self.rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+        self.w3 = getWeb3(self.rpcUrl)
+        self.dbPath = dbPath or Settings.DB_POSTS_ROOT
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def contract(self):
+        return getContract("PostStorage", self.rpcUrl)
+
+    def _connect(self):
+        connection = getConnection(self.dbPath)
+        return connection
+
+    def lastBlock(self, address=None):
+        """Return the last fully processed block of ``address`` or ``None`` if never synced."""
+        connection = self._connect()
+        row = connection.execute(
+            "select lastBlock from indexerState where name = ?",
+            (stateName(address or self.contract.address),),
+        ).fetchone()
+        connection.close()
+        return row[0] if row else None
+
+    def _saveLastBlock(self, cursor, address, blockNumber):
+        cursor.execute(
+            """insert into indexerState(name, lastBlock) values(?, ?)
+            on conflict(name) do update set lastBlock = excluded.lastBlock""",
+            (stateName(address), blockNumber),
+        )
+
+    def _reset(self, cursor):
+        """Forget the mirror and sync state of every PostStorage address."""
+        cursor.execute("delete from onchainPosts")
+        cursor.execute(
+            "delete from indexerState where name = ? or name like ?",
+            (INDEXER_NAME, f"{INDEXER_NAME}:%"),
+        )
+
+    def _fetchPosts(self, postIDs):
+        """
+        Return the live posts of ``postIDs`` by id, ``None`` for the ones whose
+        ``getPost`` reverts (deleted).
+
+        Raises:
+            IncompleteReadError: If a call failed; nothing is written then and
+            the next sync retries.
+        """
+        postIDs = sorted(set(postIDs))
+        posts = batchCall(
+            "PostStorage", "getPost", [(i,) for i in postIDs], self.rpcUrl, strict=True
+        )
+        return dict(zip(postIDs, posts))
+
+    def _storePost(self, cursor, postID, post, blockNumber):
+        cursor.execute(
+            """insert or replace into onchainPosts(postID, author, contentHash, magnetURI,
+            authorInfo, postExists, blacklisted, imageIds, bannerImageId, videoIds, blockNumber)
+            values(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                postID,
+                post[0],
+                post[1],
+                post[2],
+                post[3],
+                int(bool(post[4])),
+                int(bool(post[5])),
+                json.dumps(list(post[6])),
+                post[7],
+                json.dumps(list(post[8])),
+                blockNumber,
+            ),
+        )
+
+    def bootstrap(self, contract=None):
+        """
+        Snapshot every existing post and start tailing from the current head.
+
+        Used on first start, and after the PostStorage address changed, when
+        ``Settings.POST_INDEXER_START_BLOCK`` is ``None`` so the indexer does
+        not have to replay the whole chain.
+        """
+        contract = contract or self.contract
+        head = self.w3.eth.block_number
+        nextPostId = contract.functions.nextPostId().call()
+        Log.info(f"Indexer: bootstrapping {nextPostId} posts at block {head}")
+        posts = self._fetchPosts(range(nextPostId))
+
+        def snapshot(cursor):
+            self._reset(cursor)
+            for postID, post in posts.items():
+                if post is None:
+                    cursor.execute(
+                        """insert or replace into onchainPosts(postID, postExists, blockNumber)
+                        values(?, 0, ?)""",
+                        (postID, head),
+                    )
+                else:
+                    self._storePost(cursor, postID, post, head)
+            self._saveLastBlock(cursor, contract.address, head)
+
+        write(self.dbPath, snapshot)
+        postCache.clear()
+        Log.success(f"Indexer: bootstrapped {nextPostId} posts")
+
+    def _applyEvent(self, cursor, event, posts):
+        name = event["event"]
+        args = event["args"]
+        postID = args["postId"]
+        blockNumber = event["blockNumber"]
+        if name == "PostCreated":
+            post = posts.get(postID) or (
+                args["author"],
+                args["contentHash"],
+                args["magnetURI"],
+                "",
+                True,
+                False,
+                [],
+                "",
+                [],
+            )
+            self._storePost(cursor, postID, post, blockNumber)
+        elif name == "PostDeleted":
+            cursor.execute(
+                """insert into onchainPosts(postID, postExists, blockNumber) values(?, 0, ?)
+                on conflict(postID) do update set postExists = 0, blockNumber = excluded.blockNumber""",
+                (postID, blockNumber),
+            )
+        elif name == "PostBlacklistUpdated":
+            cursor.execute(
+                "update onchainPosts set blacklisted = ?, blockNumber = ? where postID = ?",
+                (int(args["isBlacklisted"]), blockNumber, postID),
+            )
+        elif name == "BannerImageSet":
+            cursor.execute(
+                "update onchainPosts set bannerImageId = ?, blockNumber = ? where postID = ?",
+                (args["bannerImageId"], blockNumber, postID),
+            )
+        elif name == "AuthorInfoUpdated":
+            cursor.execute(
+                "update onchainPosts set authorInfo = ?, blockNumber = ? where postID = ?",
+                (args["authorInfo"], blockNumber, postID),
+            )
+
+    def syncOnce(self):
+        """
+        Process all new blocks up to the current head.
+
+        Returns:
+            int: Number of events applied.
+        """
+        contract = self.contract
+        lastBlock = self.lastBlock(contract.address)
+        if lastBlock is None:
+            if Settings.POST_INDEXER_START_BLOCK is None:
+                self.bootstrap(contract)
+                return 0
+            lastBlock = Settings.POST_INDEXER_START_BLOCK - 1
+            write(self.dbPath, self._reset)
+            postCache.clear()
+
+        events = {}
+        for name in TRACKED_EVENTS:
+            event = getattr(contract.events, name)()
+            events[Web3.to_hex(HexBytes(event.topic))] = event
+
+        head = self.w3.eth.block_number
+        applied = 0
+        while lastBlock < head:
+            toBlock = min(lastBlock + Settings.POST_INDEXER_BLOCK_RANGE, head)
+            logs = self.w3.eth.get_logs(
+                {
+                    "address": contract.address,
+                    "fromBlock": lastBlock + 1,
+                    "toBlock": toBlock,
+                    "topics": [list(events.keys())],
+                }
+            )
+            decoded = []
+            for log in sorted(logs, key=lambda x: (x["blockNumber"], x["logIndex"])):
+                event = events.get(Web3.to_hex(HexBytes(log["topics"][0])))
+                if event is not None:
+                    decoded.append(event.process_log(log))
+            posts = self._fetchPosts(
+                event["args"]["postId"]
+                for event in decoded
+                if event["event"] == "PostCreated"
+            )
+
+            def apply(cursor, decoded=decoded, posts=posts, toBlock=toBlock):
+                for event in decoded:
+                    self._applyEvent(cursor, event, posts)
+                self._saveLastBlock(cursor, contract.address, toBlock)
+
+            write(self.dbPath, apply)
+            touched = {event["args"]["postId"] for event in decoded}
+            applied += len(decoded)
+            for postID in touched:
+                postCache.invalidate(postID)
+            lastBlock = toBlock
+        if applied:
+            Log.info(f"Indexer: applied {applied} events up to block {head}")
+        return applied
+
+    def run(self):
+        """Poll the chain until ``stop`` is called."""
+        Log.info("Indexer: started")
+        while not self._stop.is_set():
+            try:
+                self.syncOnce()
+            except Exception as exc:
+                Log.error(f"Indexer: sync failed: {exc}")
+            self._stop.wait(Settings.POST_INDEXER_POLL_INTERVAL)
+        Log.info("Indexer: stopped")
+
+    def start(self):
+        """Start the indexer in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.run, name="postIndexer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,159 @@
+"""
+This module contains ``PostRecord``, the decoded form of an on-chain post.
+
+PostStorage keeps a post's text as one ``contentHash`` string laid out as
+``title|tags|abstract|content|category``. ``PostRecord`` decodes the short
+header fields eagerly and slices the body out of ``contentHash`` only when
+``content`` is read. List views build records with ``withBody=False``: the
+raw string is dropped after decoding so a page of records only holds headers.
+"""
+
+from sys import intern
+
+
+class PostRecord:
+    """A decoded post; header fields eager, body lazy."""
+
+    __slots__ = (
+        "postID",
+        "author",
+        "title",
+        "tags",
+        "abstract",
+        "category",
+        "magnetURI",
+        "authorInfo",
+        "exists",
+        "blacklisted",
+        "imageIds",
+        "bannerImageId",
+        "videoIds",
+        "_contentHash",
+        "_bodyStart",
+        "_bodyEnd",
+    )
+
+    def __init__(
+        self,
+        postID,
+        author,
+        contentHash,
+        magnetURI="",
+        authorInfo="",
+        exists=True,
+        blacklisted=False,
+        imageIds=(),
+        bannerImageId="",
+        videoIds=(),
+        withBody=True,
+    ):
+        contentHash = contentHash or ""
+        # Separator offsets of the first five fields, matching split("|", 5).
+        bounds = [-1]
+        for _ in range(5):
+            index = contentHash.find("|", bounds[-1] + 1)
+            if index == -1:
+                break
+            bounds.append(index)
+        bounds.append(len(contentHash))
+
+        def field(position):
+            if position + 1 >= len(bounds):
+                return ""
+            return contentHash[bounds[position] + 1 : bounds[position + 1]]
+
+        self.postID = postID
+        self.author = intern(author) if author else ""
+        self.title = field(0)
+        self.tags = field(1)
+        self.abstract = field(2)
+        self.category = intern(field(4))
+        self.magnetURI = magnetURI
+        self.authorInfo = authorInfo
+        self.exists = bool(exists)
+        self.blacklisted = bool(blacklisted)
+        self.imageIds = tuple(imageIds)
+        self.bannerImageId = bannerImageId
+        self.videoIds = tuple(videoIds)
+        if withBody and len(bounds) > 4:
+            self._contentHash = contentHash
+            self._bodyStart = bounds[3] + 1
+            self._bodyEnd = bounds[4]
+        else:
+            self._contentHash = None if not withBody else ""
+            self._bodyStart = self._bodyEnd = 0
+
+    @classmethod
+    def fromGetPost(cls, postID, onchain, withBody=True):
+        """
+        Builds a record from a ``getPost`` tuple.
+
+        Args:
+            postID (int): On-chain post id.
+            onchain (tuple): (author, contentHash, magnetURI, authorInfo, exists,
+                blacklisted, imageIds, bannerImageId, videoIds)
+            withBody (bool): Keep ``contentHash`` so ``content`` can be read.
+        """
+        return cls(
+            postID,
+            onchain[0],
+            onchain[1],
+            magnetURI=onchain[2],
+            authorInfo=onchain[3],
+            exists=onchain[4],
+            blacklisted=onchain[5],
+            imageIds=onchain[6] if len(onchain) > 6 else (),
+            bannerImageId=onchain[7] if len(onchain) > 7 else "",
+            videoIds=onchain[8] if len(onchain) > 8 else (),
+            withBody=withBody,
+        )
+
+    @classmethod
+    def fromPosts(cls, postID, onchain, withBody=False):
+        """
+        Builds a record from a ``posts(id)`` mapping tuple.
+
+        Args:
+            postID (int): On-chain post id.
+            onchain (tuple): (author, contentHash, magnetURI, authorInfo, exists,
+                blacklisted, bannerImageId)
+            withBody (bool): Keep ``contentHash`` so ``content`` can be read.
+        """
+        return cls(
+            postID,
+            onchain[0],
+            onchain[1],
+            magnetURI=onchain[2],
+            authorInfo=onchain[3],
+            exists=onchain[4],
+            blacklisted=onchain[5],
+            bannerImageId=onchain[6],
+            withBody=withBody,
+        )
+
+    @property
+    def content(self):
+        """The post body, sliced out of ``contentHash`` on access."""
+        if self._contentHash is None:
+            raise AttributeError(f"post {self.postID} was decoded without its body")
+        return self._contentHash[self._bodyStart : self._bodyEnd]
+
+    @property
+    def hasBody(self):
+        return self._contentHash is not None
+
+    def header(self):
+        """Return the list view fields as a dict."""
+        return {
+            "id": self.postID,
+            "title": self.title,
+            "tags": self.tags,
+            "abstract": self.abstract,
+            "category": self.category,
+            "author": self.author,
+            "bannerImageId": self.bannerImageId,
+            "blacklisted": self.blacklisted,
+        }
+
+    def __repr__(self):
+        return f"PostRecord(postID={self.postID!r}, title={self.title!r})"
@@ -0,0 +1,236 @@
+"""
+This module contains the resilience layer around RPC-backed reads.
+
+``breakerFor`` returns the circuit breaker of an RPC endpoint. The pooled
+transport in ``utils.web3Client`` and the async reader report every request to
+it; after ``Settings.RPC_BREAKER_FAILURE_THRESHOLD`` consecutive failures the
+breaker opens and requests fail immediately with ``CircuitOpenError`` instead
+of queuing on a dead endpoint. After ``Settings.RPC_BREAKER_RESET_TIMEOUT``
+seconds one probe request is let through to close it again.
+
+``resilientRead`` serves the last known good value of a read immediately once
+it is older than ``Settings.RPC_STALE_MAX_AGE`` and refreshes it in the
+background (stale-while-revalidate). Its loaders raise, e.g.
+``IncompleteReadError`` when some items of a multi-call read failed, instead
+of returning a partial result, so only complete results are kept.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from settings import Settings
+from utils.log import Log
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to an endpoint whose breaker is open."""
+
+
+class IncompleteReadError(Exception):
+    """Raised by a read whose result would miss items that failed to load."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, failureThreshold, resetTimeout):
+        self.name = name
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.openedAt = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return ``True`` if a request may be sent now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.openedAt < self.resetTimeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                Log.info(f"RPC breaker: {self.name} half-open, sending probe")
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    return False
+                self._probing = True
+            return True
+
+    def check(self):
+        """Raise ``CircuitOpenError`` if a request may not be sent now."""
+        if not self.allow():
+            raise CircuitOpenError(f"circuit breaker for {self.name} is open")
+
+    def recordSuccess(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                Log.success(f"RPC breaker: {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def recordFailure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failureThreshold
+            ):
+                self.state = self.OPEN
+                self.openedAt = time.monotonic()
+                self.trips += 1
+                Log.warning(
+                    f"RPC breaker: {self.name} opened after {self.failures} failures"
+                )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "openForSeconds": round(time.monotonic() - self.openedAt, 3)
+                if self.state != self.CLOSED
+                else 0.0,
+            }
+
+
+_breakersLock = threading.Lock()
+_breakers = {}
+
+
+def breakerFor(rpcUrl=None):
+    """Return the circuit breaker for ``rpcUrl``."""
+    rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+    with _breakersLock:
+        breaker = _breakers.get(rpcUrl)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                rpcUrl,
+                Settings.RPC_BREAKER_FAILURE_THRESHOLD,
+                Settings.RPC_BREAKER_RESET_TIMEOUT,
+            )
+            _breakers[rpcUrl] = breaker
+    return breaker
+
+
+class StaleWhileRevalidate:
+    """Last-known-good cache that refreshes stale values in the background."""
+
+    def __init__(self, maxAge, maxEntries, workers):
+        self.maxAge = maxAge
+        self.maxEntries = maxEntries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="rpcRefresh"
+        )
+        self.freshHits = 0
+        self.staleHits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refreshFailures = 0
+
+    def get(self, key, fetch):
+        """
+        Returns the value for ``key``.
+
+        A fresh value is returned as is. A stale value is returned immediately
+        and ``fetch`` is scheduled in the background. Without any value
+        ``fetch`` is called inline and its exceptions propagate.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, fetchedAt = entry
+                if time.monotonic() - fetchedAt < self.maxAge:
+                    self.freshHits += 1
+                    return value
+                self.staleHits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, fetch)
+                return value
+            self.misses += 1
+        value = fetch()
+        self._store(key, value)
+        return value
+
+    def clear(self):
+        """Forget every last known good value."""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch()
+        except Exception as exc:
+            with self._lock:
+                self.refreshFailures += 1
+            Log.warning(f"RPC: refreshing {key} failed, serving stale value: {exc}")
+        else:
+            self._store(key, value)
+            with self._lock:
+                self.refreshes += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - fetchedAt for _, fetchedAt in self._entries.values()]
+            return {
+                "entries": len(self._entries),
+                "freshHits": self.freshHits,
+                "staleHits": self.staleHits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refreshFailures": self.refreshFailures,
+                "staleEntries": sum(age >= self.maxAge for age in ages),
+                "maxStalenessSeconds": round(max(ages, default=0.0), 3),
+            }
+
+
+rpcReads = StaleWhileRevalidate(
+    maxAge=Settings.RPC_STALE_MAX_AGE,
+    maxEntries=Settings.RPC_STALE_MAX_ENTRIES,
+    workers=Settings.RPC_REFRESH_WORKERS,
+)
+
+
+def resilientRead(key, fetch):
+    """Read ``key`` through ``rpcReads``; see ``StaleWhileRevalidate.get``."""
+    return rpcReads.get(key, fetch)
+
+
+def stats():
+    """Return breaker state per endpoint and stale cache counters."""
+    with _breakersLock:
+        breakers = dict(_breakers)
+    return {
+        "breakers": {url: breaker.stats() for url, breaker in breakers.items()},
+        "staleCache": rpcReads.stats(),
+    }
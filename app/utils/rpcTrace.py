@@ -0,0 +1,197 @@
+"""
+This module contains the per-request RPC trace and the aggregate RPC counters.
+
+Every HTTP round trip of the pooled web3 session and every call of the async
+reader is recorded with its JSON-RPC method, contract, function, number of
+calls, latency and response size. Inside a request the entries are kept in
+``g.rpcTrace``; ``finishRequest`` summarises them for the access log and the
+``Server-Timing`` header, adds them to per-route counters and warns when a
+route makes more calls than its budget in ``Settings.RPC_CALL_BUDGETS`` (or
+``Settings.RPC_CALL_BUDGET``). Work outside a request, such as the indexer or
+background refreshes, is counted under ``(background)``.
+"""
+
+import json
+import threading
+from collections import defaultdict
+
+from eth_utils import function_abi_to_4byte_selector
+from flask import g, has_request_context, request
+from settings import Settings
+from utils.log import Log
+
+BACKGROUND = "(background)"
+
+_lock = threading.Lock()
+_names = {"addresses": None, "functions": {}}
+_totals = {"httpRequests": 0, "calls": 0, "errors": 0, "ms": 0.0, "bytes": 0}
+_byFunction = defaultdict(lambda: {"calls": 0, "ms": 0.0, "bytes": 0})
+_byRoute = defaultdict(
+    lambda: {"requests": 0, "httpRequests": 0, "calls": 0, "ms": 0.0, "overBudget": 0}
+)
+
+
+def _contractNames():
+    """Map contract addresses and selectors to names, rebuilt when addresses change."""
+    addresses = {
+        info["address"].lower(): name
+        for name, info in Settings.BLOCKCHAIN_CONTRACTS.items()
+    }
+    if _names["addresses"] != addresses:
+        functions = {}
+        for name, info in Settings.BLOCKCHAIN_CONTRACTS.items():
+            for entry in info["abi"]:
+                if entry.get("type") == "function":
+                    selector = "0x" + function_abi_to_4byte_selector(entry).hex()
+                    functions[(name, selector)] = entry["name"]
+        _names.update(addresses=addresses, functions=functions)
+    return _names["addresses"], _names["functions"]
+
+
+def _describe(call):
+    """Return ``(method, "Contract.function")`` for one JSON-RPC request object."""
+    method = call.get("method", "?")
+    if method != "eth_call":
+        return method, method
+    transaction = (call.get("params") or [{}])[0]
+    addresses, functions = _contractNames()
+    contract = addresses.get(str(transaction.get("to", "")).lower(), "?")
+    selector = str(transaction.get("data", ""))[:10]
+    return method, f"{contract}.{functions.get((contract, selector), selector)}"
+
+
+def recordHttp(body, seconds, size, error=False):
+    """
+    Records one HTTP round trip of the sync web3 session.
+
+    Args:
+        body (bytes | str): JSON-RPC request body, a single call or a batch.
+        seconds (float): Round trip latency.
+        size (int): Response size in bytes.
+        error (bool): The round trip failed.
+    """
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        payload = {}
+    calls = payload if isinstance(payload, list) else [payload]
+    method, function = _describe(calls[0]) if calls else ("?", "?")
+    _record(method, function, len(calls), seconds, size, error)
+
+
+def recordCall(contract, function, seconds, size, error=False):
+    """
+    Records one ``eth_call`` made by the async reader on its event loop thread.
+
+    Returns:
+        dict: The trace entry; pass it to ``addEntries`` on the request thread.
+    """
+    return _record(
+        "eth_call", f"{contract}.{function}", 1, seconds, size, error, attach=False
+    )
+
+
+def _record(method, function, calls, seconds, size, error, attach=True):
+    entry = {
+        "method": method,
+        "function": function,
+        "calls": calls,
+        "ms": round(seconds * 1000, 3),
+        "bytes": size,
+        "error": error,
+    }
+    with _lock:
+        _totals["httpRequests"] += 1
+        _totals["calls"] += calls
+        _totals["errors"] += error
+        _totals["ms"] += entry["ms"]
+        _totals["bytes"] += size
+        counters = _byFunction[function]
+        counters["calls"] += calls
+        counters["ms"] += entry["ms"]
+        counters["bytes"] += size
+    if attach:
+        addEntries([entry])
+    return entry
+
+
+def addEntries(entries):
+    """Add entries to the current request's trace, or to ``(background)`` outside one."""
+    if has_request_context():
+        g.setdefault("rpcTrace", []).extend(entries)
+        return
+    with _lock:
+        route = _byRoute[BACKGROUND]
+        for entry in entries:
+            route["httpRequests"] += 1
+            route["calls"] += entry["calls"]
+            route["ms"] += entry["ms"]
+
+
+def requestTrace():
+    """Return the trace entries of the current request."""
+    return g.get("rpcTrace") or []
+
+
+def finishRequest():
+    """
+    Summarises the current request's trace and updates the route counters.
+
+    Returns:
+        dict | None: ``httpRequests``, ``calls``, ``ms``, ``bytes``, ``budget``
+        and the top ``functions``; ``None`` if the request made no RPC calls.
+    """
+    trace = requestTrace()
+    if not trace:
+        return None
+    route = request.endpoint or request.path
+    budget = Settings.RPC_CALL_BUDGETS.get(route, Settings.RPC_CALL_BUDGET)
+    functions = defaultdict(int)
+    for entry in trace:
+        functions[entry["function"]] += entry["calls"]
+    summary = {
+        "httpRequests": len(trace),
+        "calls": sum(entry["calls"] for entry in trace),
+        "ms": round(sum(entry["ms"] for entry in trace), 3),
+        "bytes": sum(entry["bytes"] for entry in trace),
+        "budget": budget,
+        "functions": sorted(functions.items(), key=lambda item: -item[1])[:3],
+    }
+    overBudget = budget is not None and summary["calls"] > budget
+    with _lock:
+        counters = _byRoute[route]
+        counters["requests"] += 1
+        counters["httpRequests"] += summary["httpRequests"]
+        counters["calls"] += summary["calls"]
+        counters["ms"] += summary["ms"]
+        counters["overBudget"] += overBudget
+    if overBudget:
+        Log.warning(
+            f"RPC budget exceeded: {route} made {summary['calls']} calls "
+            f"(budget {budget}), top: {summary['functions']}"
+        )
+    return summary
+
+
+def serverTiming(summary):
+    """Return the ``Server-Timing`` header value for ``summary``."""
+    return (
+        f'rpc;dur={summary["ms"]};desc="{summary["httpRequests"]} requests, '
+        f'{summary["calls"]} calls"'
+    )
+
+
+def stats():
+    """Return aggregate RPC counters in total, per function and per route."""
+    with _lock:
+        return {
+            "totals": {**_totals, "ms": round(_totals["ms"], 3)},
+            "functions": {
+                name: {**counters, "ms": round(counters["ms"], 3)}
+                for name, counters in _byFunction.items()
+            },
+            "routes": {
+                name: {**counters, "ms": round(counters["ms"], 3)}
+                for name, counters in _byRoute.items()
+            },
+        }
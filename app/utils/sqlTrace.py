@@ -0,0 +1,181 @@
+"""
+This module contains the SQL statement tracing of the pooled SQLite connections.
+
+``Settings.DB_TRACE_MODE`` selects one of three modes:
+
+- ``off``: statements run on plain cursors and nothing is recorded.
+- ``sampled``: ``Settings.DB_TRACE_SAMPLE_PERCENT`` percent of the statements
+  are timed and logged with their duration and route.
+- ``slow``: every statement is timed; the ones taking at least
+  ``Settings.DB_TRACE_SLOW_MS`` are logged with the shape of their bound
+  parameters, duration and route, and kept in a table of the
+  ``Settings.DB_TRACE_SLOW_TOP`` slowest statements seen in the last
+  ``Settings.DB_TRACE_SLOW_WINDOW`` seconds for the admin panel.
+
+The duration covers ``execute`` and ``executemany``, which for a query includes
+computing its first row; rows fetched afterwards are not counted. Statements
+are recorded with their placeholders, never with the bound values.
+"""
+
+import random
+import sqlite3
+import threading
+import time
+
+from flask import has_request_context, request
+from settings import Settings
+from utils.log import Log
+
+BACKGROUND = "(background)"
+
+_lock = threading.Lock()
+_totals = {"sampled": 0, "slow": 0}
+_slow = {}
+
+
+def enabled():
+    """Return whether statements go through ``TracedCursor``."""
+    return Settings.DB_TRACE_MODE != "off"
+
+
+def _timed():
+    mode = Settings.DB_TRACE_MODE
+    if mode == "slow":
+        return True
+    return (
+        mode == "sampled" and random.random() * 100 < Settings.DB_TRACE_SAMPLE_PERCENT
+    )
+
+
+def _route():
+    if has_request_context():
+        return request.endpoint or request.path
+    return BACKGROUND
+
+
+def parameterShape(parameters, many=False):
+    """
+    Returns the types of bound parameters, e.g. ``(int, str)``.
+
+    Args:
+        parameters: Parameters of ``execute``, or the sequence of ``executemany``.
+        many (bool): ``parameters`` is an ``executemany`` sequence.
+    """
+    if many:
+        if isinstance(parameters, (list, tuple)) and parameters:
+            return f"{len(parameters)} x {parameterShape(parameters[0])}"
+        return "many"
+    if isinstance(parameters, dict):
+        return (
+            "{"
+            + ", ".join(
+                f"{name}: {type(value).__name__}" for name, value in parameters.items()
+            )
+            + "}"
+        )
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+def record(sql, parameters, seconds, many=False):
+    """
+    Records one timed statement according to ``Settings.DB_TRACE_MODE``.
+
+    Args:
+        sql (str): The statement with its placeholders.
+        parameters: Its bound parameters, only their shape is kept.
+        seconds (float): Execution time.
+        many (bool): The statement ran through ``executemany``.
+    """
+    ms = seconds * 1000
+    mode = Settings.DB_TRACE_MODE
+    if mode == "sampled":
+        Log.database(f"{ms:.3f} ms in {_route()}: {' '.join(sql.split())}")
+        with _lock:
+            _totals["sampled"] += 1
+        return
+    if ms < Settings.DB_TRACE_SLOW_MS:
+        return
+    statement = " ".join(sql.split())
+    route = _route()
+    shape = parameterShape(parameters, many)
+    Log.warning(f"Slow SQL: {ms:.1f} ms in {route}: {statement} {shape}")
+    now = time.time()
+    with _lock:
+        _totals["slow"] += 1
+        entry = _slow.get((statement, route))
+        if entry is None:
+            entry = _slow[(statement, route)] = {
+                "statement": statement,
+                "route": route,
+                "count": 0,
+                "totalMs": 0.0,
+                "maxMs": 0.0,
+            }
+        entry["parameters"] = shape
+        entry["count"] += 1
+        entry["totalMs"] += ms
+        entry["maxMs"] = max(entry["maxMs"], ms)
+        entry["lastSeen"] = int(now)
+        _prune(now)
+
+
+def _prune(now):
+    """Drop entries older than the window and all but the slowest ``DB_TRACE_SLOW_TOP``."""
+    since = now - Settings.DB_TRACE_SLOW_WINDOW
+    for key in [key for key, entry in _slow.items() if entry["lastSeen"] < since]:
+        del _slow[key]
+    if len(_slow) > Settings.DB_TRACE_SLOW_TOP:
+        slowest = sorted(_slow, key=lambda key: -_slow[key]["maxMs"])
+        for key in slowest[Settings.DB_TRACE_SLOW_TOP :]:
+            del _slow[key]
+
+
+class TracedCursor(sqlite3.Cursor):
+    """``sqlite3.Cursor`` timing its statements for ``record``."""
+
+    def execute(self, sql, parameters=(), /):
+        if not _timed():
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record(sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, parameters, /):
+        if not _timed():
+            return super().executemany(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            record(sql, parameters, time.perf_counter() - start, many=True)
+
+
+def slowQueries():
+    """Return the slow statement table, slowest first."""
+    with _lock:
+        _prune(time.time())
+        entries = sorted(_slow.values(), key=lambda entry: -entry["maxMs"])
+        return [
+            {
+                **entry,
+                "totalMs": round(entry["totalMs"], 3),
+                "maxMs": round(entry["maxMs"], 3),
+                "avgMs": round(entry["totalMs"] / entry["count"], 3),
+            }
+            for entry in entries
+        ]
+
+
+def stats():
+    """Return the tracing mode, counters and slow statement table."""
+    with _lock:
+        totals = dict(_totals)
+    return {
+        "mode": Settings.DB_TRACE_MODE,
+        "samplePercent": Settings.DB_TRACE_SAMPLE_PERCENT,
+        "slowMs": Settings.DB_TRACE_SLOW_MS,
+        **totals,
+        "slowQueries": slowQueries(),
+    }
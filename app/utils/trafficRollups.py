@@ -0,0 +1,178 @@
+"""
+This module contains the pre-aggregated traffic rollups of ``postsAnalytics``.
+
+The traffic charts used to group the raw visits by minute on every load,
+which scanned the whole table for ``sincePosted``. The analytics database now
+keeps the visits per post and time bucket in three tables:
+
+- ``trafficMinute``: 60 second buckets.
+- ``trafficHour``: 3600 second buckets.
+- ``trafficDay``: 86400 second buckets, in UTC.
+
+Each row is ``(postID, bucket, visits)`` where ``bucket`` is the Unix time the
+bucket starts at. ``utils.analyticsIngest`` adds every batch of visits to all
+three in the transaction inserting the raw rows, and ``Delete.post`` removes a
+post's rows together with its visits. The rollups are not derived from the
+raw table afterwards, so raw rows can be pruned without changing them; see
+``utils.analyticsRetention``.
+
+``trafficSeries`` reads the coarsest rollup that still splits the requested
+window into ``Settings.ANALYTICS_ROLLUP_MIN_BUCKETS`` buckets. ``backfill``
+rebuilds the rollups from the raw rows still in ``postsAnalytics``. From the
+``app`` directory:
+
+    python -m utils.trafficRollups --backfill
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from settings import Settings
+from utils.db import getConnection
+from utils.log import Log
+
+# Rollup table -> bucket size in seconds, finest first
+ROLLUPS = {
+    "trafficMinute": 60,
+    "trafficHour": 60 * 60,
+    "trafficDay": 24 * 60 * 60,
+}
+
+
+def recordVisits(cursor, visits):
+    """
+    Adds visits to every rollup, inside the caller's transaction.
+
+    Args:
+        cursor: Cursor on the analytics database.
+        visits (list[tuple]): ``postsAnalytics`` rows as inserted by
+            ``utils.analyticsIngest``, ``timeStamp`` last.
+    """
+    for table, size in ROLLUPS.items():
+        buckets = Counter(
+            (visit[0] or 0, visit[-1] - visit[-1] % size) for visit in visits
+        )
+        cursor.executemany(
+            f"insert into {table}(postID, bucket, visits) values (?, ?, ?) "
+            "on conflict(postID, bucket) do update set visits = visits + excluded.visits",
+            [(postID, bucket, count) for (postID, bucket), count in buckets.items()],
+        )
+
+
+def rebuildRollups(cursor):
+    """
+    Recomputes the rollups from ``postsAnalytics`` inside the caller's transaction.
+
+    Only the buckets from the UTC day of the oldest raw row on are rebuilt;
+    older ones hold visits ``utils.analyticsRetention`` already removed from
+    the raw table and are kept.
+    """
+    oldest = cursor.execute("select min(timeStamp) from postsAnalytics").fetchone()[0]
+    if oldest is None:
+        return
+    since = oldest - oldest % ROLLUPS["trafficDay"]
+    for table, size in ROLLUPS.items():
+        cursor.execute(f"delete from {table} where bucket >= ?", (since,))
+        cursor.execute(
+            f"""insert into {table}(postID, bucket, visits)
+            select coalesce(postID, 0), timeStamp - timeStamp % {size}, count(*)
+            from postsAnalytics where timeStamp >= ?
+            group by 1, 2""",
+            (since,),
+        )
+
+
+def rollupFor(seconds):
+    """
+    Returns the coarsest rollup splitting a window into enough buckets.
+
+    Args:
+        seconds (float): Length of the window.
+
+    Returns:
+        tuple: ``(table, bucket size)``; the minute rollup for short windows.
+    """
+    for table, size in reversed(ROLLUPS.items()):
+        if seconds / size >= Settings.ANALYTICS_ROLLUP_MIN_BUCKETS:
+            return table, size
+    return "trafficMinute", ROLLUPS["trafficMinute"]
+
+
+def firstVisit(cursor, postID=None):
+    """Return the start of the first day with visits, of one post or the site."""
+    if postID is None:
+        row = cursor.execute("select min(bucket) from trafficDay").fetchone()
+    else:
+        row = cursor.execute(
+            "select min(bucket) from trafficDay where postID = ?", (postID,)
+        ).fetchone()
+    return row[0]
+
+
+def trafficSeries(cursor, since, postID=None):
+    """
+    Returns the visits per bucket from ``since`` until now.
+
+    Args:
+        cursor: Cursor on the analytics database.
+        since (int): Unix time the window starts at; the bucket holding it is
+            included.
+        postID (int | None): The post, or ``None`` for the whole site.
+
+    Returns:
+        list[tuple]: ``("%Y-%m-%d %H:%M" UTC bucket start, visits)`` rows in
+        time order, as the charts read them.
+    """
+    table, size = rollupFor(time.time() - since)
+    start = since - since % size
+    if postID is None:
+        return cursor.execute(
+            f"""select strftime('%Y-%m-%d %H:%M', bucket, 'unixepoch'), sum(visits)
+            from {table} where bucket >= ? group by bucket order by bucket""",
+            (start,),
+        ).fetchall()
+    return cursor.execute(
+        f"""select strftime('%Y-%m-%d %H:%M', bucket, 'unixepoch'), visits
+        from {table} where postID = ? and bucket >= ? order by bucket""",
+        (postID, start),
+    ).fetchall()
+
+
+def backfill():
+    """Rebuild every rollup from the raw visits in one write transaction."""
+    connection = getConnection(Settings.DB_ANALYTICS_ROOT)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("begin immediate")
+        rebuildRollups(cursor)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    Log.success(f'Traffic rollups: "{Settings.DB_ANALYTICS_ROOT}" backfilled')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or rebuild the traffic rollups.")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="rebuild the rollups from the raw postsAnalytics rows",
+    )
+    args = parser.parse_args()
+    if args.backfill:
+        backfill()
+    connection = getConnection(Settings.DB_ANALYTICS_ROOT)
+    for table in ROLLUPS:
+        rows, visits = connection.execute(
+            f"select count(*), coalesce(sum(visits), 0) from {table}"
+        ).fetchone()
+        print(f"{table}: {rows} buckets, {visits} visits")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
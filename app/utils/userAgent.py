@@ -0,0 +1,74 @@
+"""
+This module contains the memoized classification of user-agent strings.
+
+``user_agents.parse`` runs a long chain of regular expressions, while the
+traffic repeats a small set of user-agent strings. ``classify`` parses each
+distinct string once and keeps the last ``Settings.USER_AGENT_CACHE_SIZE``
+results in LRU order. A result is a ``UserAgentInfo`` of the OS family, the
+device class and the bot flag; equal results share one interned tuple, so
+the cache holds little more than its keys.
+"""
+
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+from user_agents import parse
+
+from settings import Settings
+
+UserAgentInfo = namedtuple("UserAgentInfo", ("os", "device", "bot"))
+
+UNKNOWN = UserAgentInfo("Unknown", "other", False)
+
+_results = {UNKNOWN: UNKNOWN}
+
+
+def _deviceClass(userAgent):
+    if userAgent.is_bot:
+        return "bot"
+    if userAgent.is_tablet:
+        return "tablet"
+    if userAgent.is_mobile:
+        return "mobile"
+    if userAgent.is_pc:
+        return "pc"
+    return "other"
+
+
+@lru_cache(maxsize=Settings.USER_AGENT_CACHE_SIZE)
+def classify(userAgentString):
+    """
+    Classifies a user-agent string.
+
+    Args:
+        userAgentString (str): The ``User-Agent`` header.
+
+    Returns:
+        UserAgentInfo: ``(os, device, bot)``, e.g.
+        ``("Windows", "pc", False)``; ``UNKNOWN`` if parsing fails.
+    """
+    try:
+        userAgent = parse(userAgentString or "")
+        info = UserAgentInfo(
+            sys.intern(userAgent.os.family),
+            _deviceClass(userAgent),
+            userAgent.is_bot,
+        )
+    except Exception:
+        return UNKNOWN
+    return _results.setdefault(info, info)
+
+
+def stats():
+    """Return hit and miss counters and the cache size."""
+    info = classify.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "entries": info.currsize,
+        "maxEntries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hitRate": round(info.hits / lookups, 4) if lookups else 0.0,
+        "distinctResults": len(_results),
+    }
@@ -0,0 +1,402 @@
+"""
+This module owns the process-wide Web3 clients and contract objects.
+
+Every blueprint used to build ``Web3(Web3.HTTPProvider(...))`` and
+``w3.eth.contract(...)`` on each request, paying for a fresh TCP/TLS handshake
+and ABI parsing every time. ``getWeb3`` keeps one keep-alive ``requests``
+session per RPC URL and ``getContract`` caches one contract object per entry in
+``Settings.BLOCKCHAIN_CONTRACTS``; the cache is keyed by address so changing an
+address from ``/admin/contracts`` rebuilds the contract on its next use.
+``batchCall`` packs many read-only calls into JSON-RPC batch requests and
+``readMapping`` reads a whole contract mapping that way. Every
+request is reported to the endpoint's circuit breaker from
+``utils.rpcResilience`` and recorded in the RPC trace from ``utils.rpcTrace``.
+"""
+
+import threading
+import time
+
+import requests
+from eth_abi.grammar import TupleType, parse
+from eth_utils import get_abi_output_types, to_checksum_address
+from flask import g, has_request_context
+from requests.adapters import HTTPAdapter
+from settings import Settings
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from utils import rpcTrace
+from utils.log import Log
+from utils.rpcResilience import (
+    CircuitOpenError,
+    IncompleteReadError,
+    breakerFor,
+    resilientRead,
+)
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+_lock = threading.Lock()
+_clients = {}
+_sessions = {}
+_contracts = {}
+_stats = {"rpcRequests": 0, "newConnections": 0}
+
+
+def _count(key):
+    with _lock:
+        _stats[key] += 1
+    if has_request_context():
+        counters = g.setdefault("web3Stats", {"rpcRequests": 0, "newConnections": 0})
+        counters[key] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count("newConnections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count("newConnections")
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTP adapter that keeps connections alive and counts their reuse."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class _GuardedSession(requests.Session):
+    """Session that counts, traces and reports RPC requests to a circuit breaker."""
+
+    def __init__(self, rpcUrl):
+        super().__init__()
+        self.breaker = breakerFor(rpcUrl)
+
+    def send(self, request, **kwargs):
+        # Requests the open breaker rejects are never sent, so not counted.
+        self.breaker.check()
+        _count("rpcRequests")
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            self.breaker.recordFailure()
+            rpcTrace.recordHttp(
+                request.body, time.perf_counter() - started, 0, error=True
+            )
+            raise
+        failed = response.status_code >= 500 or response.status_code == 429
+        if failed:
+            self.breaker.recordFailure()
+        else:
+            self.breaker.recordSuccess()
+        rpcTrace.recordHttp(
+            request.body,
+            time.perf_counter() - started,
+            len(response.content),
+            error=failed,
+        )
+        return response
+
+
+def _buildSession(rpcUrl):
+    session = _GuardedSession(rpcUrl)
+    adapter = _PooledAdapter(
+        pool_connections=Settings.BLOCKCHAIN_POOL_CONNECTIONS,
+        pool_maxsize=Settings.BLOCKCHAIN_POOL_MAXSIZE,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def getWeb3(rpcUrl=None):
+    """
+    Returns the shared Web3 client for ``rpcUrl``.
+
+    Args:
+        rpcUrl (str): RPC endpoint, defaults to ``Settings.BLOCKCHAIN_RPC_URL``.
+
+    Returns:
+        Web3: A client backed by a pooled keep-alive HTTP session.
+    """
+    rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+    with _lock:
+        client = _clients.get(rpcUrl)
+        if client is None:
+            session = _sessions.get(rpcUrl)
+            if session is None:
+                session = _sessions[rpcUrl] = _buildSession(rpcUrl)
+            client = Web3(
+                Web3.HTTPProvider(
+                    rpcUrl,
+                    request_kwargs={"timeout": Settings.BLOCKCHAIN_TIMEOUT},
+                    session=session,
+                    # The breaker decides when to give up on the endpoint;
+                    # web3's own retries would resend a rejected request and
+                    # count one failure several times.
+                    exception_retry_configuration=None,
+                    cache_allowed_requests=True,
+                )
+            )
+            _clients[rpcUrl] = client
+    return client
+
+
+def mountAdapter(rpcUrl, adapter):
+    """
+    Serves ``rpcUrl`` through ``adapter`` instead of the network.
+
+    Requests keep going through the counting, breaker-guarded session, so an
+    in-process chain such as ``utils.localChain.LocalChain`` behaves like a
+    real endpoint.
+    """
+    with _lock:
+        session = _sessions.get(rpcUrl)
+        if session is None:
+            session = _sessions[rpcUrl] = _buildSession(rpcUrl)
+        session.mount(rpcUrl, adapter)
+        _clients.pop(rpcUrl, None)
+        for key in [k for k in _contracts if k[2] == rpcUrl]:
+            del _contracts[key]
+
+
+def getContract(name, rpcUrl=None):
+    """
+    Returns the cached contract object for ``Settings.BLOCKCHAIN_CONTRACTS[name]``.
+
+    The cache key includes the configured address, so an address change from
+    the admin panel transparently builds a new contract object.
+    """
+    rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+    info = Settings.BLOCKCHAIN_CONTRACTS[name]
+    key = (name, info["address"], rpcUrl)
+    contract = _contracts.get(key)
+    if contract is None:
+        w3 = getWeb3(rpcUrl)
+        contract = w3.eth.contract(address=info["address"], abi=info["abi"])
+        with _lock:
+            for stale in [k for k in _contracts if k[0] == name and k != key]:
+                del _contracts[stale]
+            _contracts[key] = contract
+    return contract
+
+
+def _checksum(abiType, value):
+    """Checksum decoded addresses the same way ``ContractFunction.call`` does."""
+    if abiType.is_array:
+        return tuple(_checksum(abiType.item_type, item) for item in value)
+    if isinstance(abiType, TupleType):
+        return tuple(_checksum(c, item) for c, item in zip(abiType.components, value))
+    if abiType.base == "address":
+        return to_checksum_address(value)
+    return value
+
+
+def decodeCallResult(w3, outputTypes, data):
+    """Decode raw ``eth_call`` return data like ``ContractFunction.call`` does."""
+    values = w3.codec.decode(outputTypes, data)
+    values = [_checksum(parse(t), v) for t, v in zip(outputTypes, values)]
+    return values[0] if len(values) == 1 else values
+
+
+def _failed(strict, message):
+    if strict:
+        raise IncompleteReadError(message)
+    Log.warning(f"RPC: {message}")
+
+
+def _isRevert(error):
+    return "revert" in str(error.get("message", "")).lower()
+
+
+def _sequentialCall(contract, functionName, argsList, strict=False):
+    results = []
+    for args in argsList:
+        try:
+            results.append(contract.functions[functionName](*args).call())
+        except CircuitOpenError:
+            raise
+        except ContractLogicError as exc:
+            Log.warning(f"RPC: {functionName}{tuple(args)} reverted: {exc}")
+            results.append(None)
+        except Exception as exc:
+            _failed(strict, f"{functionName}{tuple(args)} failed: {exc}")
+            results.append(None)
+    return results
+
+
+def batchCall(name, functionName, argsList, rpcUrl=None, strict=False):
+    """
+    Calls a read-only contract function for every argument tuple in as few
+    round trips as possible.
+
+    Calls are packed into JSON-RPC batch requests of
+    ``Settings.BLOCKCHAIN_BATCH_SIZE`` items. If the endpoint does not accept
+    batches the calls are made one by one instead.
+
+    Args:
+        name (str): Contract name in ``Settings.BLOCKCHAIN_CONTRACTS``.
+        functionName (str): View function to call, e.g. ``"posts"``.
+        argsList (list[tuple]): Arguments for each call.
+        rpcUrl (str): RPC endpoint, defaults to ``Settings.BLOCKCHAIN_RPC_URL``.
+        strict (bool): Raise if any call fails, so only reverts give ``None``.
+
+    Returns:
+        list: Decoded results in the order of ``argsList``; ``None`` for every
+        call that reverted or failed.
+
+    Raises:
+        CircuitOpenError: If the endpoint's circuit breaker is open.
+        IncompleteReadError: If ``strict`` and a call failed or could not be
+            decoded.
+    """
+    rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+    contract = getContract(name, rpcUrl)
+    w3 = getWeb3(rpcUrl)
+    session = _sessions[rpcUrl]
+    outputTypes = get_abi_output_types(contract.get_function_by_name(functionName).abi)
+    argsList = [tuple(args) for args in argsList]
+    results = []
+    for start in range(0, len(argsList), Settings.BLOCKCHAIN_BATCH_SIZE):
+        chunk = argsList[start : start + Settings.BLOCKCHAIN_BATCH_SIZE]
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": index,
+                "method": "eth_call",
+                "params": [
+                    {
+                        "to": contract.address,
+                        "data": contract.functions[functionName](
+                            *args
+                        )._encode_transaction_data(),
+                    },
+                    "latest",
+                ],
+            }
+            for index, args in enumerate(chunk)
+        ]
+        try:
+            response = session.post(
+                rpcUrl, json=payload, timeout=Settings.BLOCKCHAIN_TIMEOUT
+            )
+            response.raise_for_status()
+            replies = response.json()
+        except CircuitOpenError:
+            raise
+        except Exception as exc:
+            Log.warning(
+                f"RPC: batch of {len(chunk)} {functionName} calls failed: {exc}"
+            )
+            replies = None
+        if not isinstance(replies, list):
+            Log.warning("RPC: endpoint rejected batch request, calling sequentially")
+            results.extend(_sequentialCall(contract, functionName, chunk, strict))
+            continue
+        byID = {reply.get("id"): reply for reply in replies}
+        for index, args in enumerate(chunk):
+            reply = byID.get(index, {})
+            if "result" not in reply:
+                error = reply.get("error") or {}
+                if _isRevert(error):
+                    Log.warning(f"RPC: {functionName}{args} reverted: {error}")
+                else:
+                    _failed(
+                        strict, f"{functionName}{args} failed: {error or 'no reply'}"
+                    )
+                results.append(None)
+                continue
+            try:
+                results.append(
+                    decodeCallResult(
+                        w3, outputTypes, bytes.fromhex(reply["result"][2:])
+                    )
+                )
+            except Exception as exc:
+                _failed(strict, f"decoding {functionName}{args} failed: {exc}")
+                results.append(None)
+    return results
+
+
+def readMapping(name, functionName, countFunction, rpcUrl=None):
+    """
+    Reads every entry of a contract mapping, e.g. ``posts(0..nextPostId-1)``.
+
+    The read goes through ``resilientRead``: a recent result is reused, an
+    older one is served immediately while it is refreshed in the background.
+    A read where any entry failed is not kept.
+
+    Args:
+        name (str): Contract name in ``Settings.BLOCKCHAIN_CONTRACTS``.
+        functionName (str): Mapping getter, e.g. ``"posts"``.
+        countFunction (str): View returning the number of entries, e.g. ``"nextPostId"``.
+        rpcUrl (str): RPC endpoint, defaults to ``Settings.BLOCKCHAIN_RPC_URL``.
+
+    Returns:
+        list[tuple]: ``(id, result)`` pairs in id order.
+
+    Raises:
+        IncompleteReadError: If an entry could not be read and no earlier
+            complete read is cached.
+    """
+    rpcUrl = rpcUrl or Settings.BLOCKCHAIN_RPC_URL
+    address = Settings.BLOCKCHAIN_CONTRACTS[name]["address"]
+
+    def fetch():
+        count = getContract(name, rpcUrl).functions[countFunction]().call()
+        ids = list(range(count))
+        results = batchCall(name, functionName, [(i,) for i in ids], rpcUrl)
+        # Mapping getters do not revert, so a missing result is a failed read.
+        if None in results:
+            raise IncompleteReadError(
+                f"{results.count(None)} of {count} {functionName} entries failed"
+            )
+        return list(zip(ids, results))
+
+    return resilientRead((rpcUrl, name, address, functionName), fetch)
+
+
+def resetContracts(name=None):
+    """Drop cached contract objects, all of them or only ``name``."""
+    with _lock:
+        for key in [k for k in _contracts if name is None or k[0] == name]:
+            del _contracts[key]
+
+
+def stats():
+    """Return aggregate RPC request and connection counters."""
+    with _lock:
+        rpcRequests = _stats["rpcRequests"]
+        newConnections = _stats["newConnections"]
+        clients = len(_clients)
+        contracts = len(_contracts)
+    return {
+        "rpcRequests": rpcRequests,
+        "newConnections": newConnections,
+        "reuseRatio": _reuseRatio(rpcRequests, newConnections),
+        "clients": clients,
+        "contracts": contracts,
+    }
+
+
+def requestStats():
+    """Return RPC request and connection counters for the current request."""
+    counters = g.get("web3Stats") or {"rpcRequests": 0, "newConnections": 0}
+    return {
+        **counters,
+        "reuseRatio": _reuseRatio(counters["rpcRequests"], counters["newConnections"]),
+    }
+
+
+def _reuseRatio(rpcRequests, newConnections):
+    if not rpcRequests:
+        return 0.0
+    return round(max(rpcRequests - newConnections, 0) / rpcRequests, 4)